@@ -1,5 +1,6 @@
 # scripts/db_manager.py
 
+import json
 import sqlite3
 import os
 import pandas as pd
@@ -10,6 +11,8 @@ DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
 def upsert_assets(assets_df, asset_class, source):
     """
     Inserts or updates asset data into the SQLite database.
+    'source' is where a symbol was first seen; which universes it belongs to
+    over time is tracked by sync_universe_membership.
     """
     if not isinstance(assets_df, pd.DataFrame) or assets_df.empty:
         print(f"Warning: Received empty data for source '{source}'. Skipping.")
@@ -35,9 +38,7 @@ def upsert_assets(assets_df, asset_class, source):
             ON CONFLICT(symbol) DO UPDATE SET
                 name=excluded.name,
                 asset_class=excluded.asset_class,
-                source=excluded.source,
-                last_seen=excluded.last_seen,
-                is_active=1;
+                last_seen=excluded.last_seen;
             """
             cursor.executemany(upsert_query, records_to_upsert)
             conn.commit()
@@ -46,7 +47,139 @@ def upsert_assets(assets_df, asset_class, source):
         print(f"Database error for source '{source}': {e}")
 
 
+def sync_universe_membership(universe, symbols, as_of=None, close_missing=True):
+    """
+    Applies one snapshot of a universe to 'universe_membership'.
+
+    Symbols without an open interval get one starting `as_of` (default:
+    today, UTC). With `close_missing`, open intervals of symbols absent from
+    the snapshot end at `as_of` (exclusive). A symbol dropped and re-added on
+    the same day keeps its interval. 'assets.is_active' is then recomputed
+    as "member of any universe". Returns (opened, closed).
+
+    Snapshots must arrive in date order: an `as_of` earlier than the latest
+    valid_from in the universe raises ValueError, since applying it would
+    close or delete intervals that later snapshots already opened.
+    """
+    as_of = as_of or datetime.utcnow().strftime("%Y-%m-%d")
+    symbols = sorted(set(symbols))
+    try:
+        with sqlite3.connect(DB_PATH, timeout=30) as conn:
+            cursor = conn.cursor()
+            latest = cursor.execute(
+                "SELECT MAX(valid_from) FROM universe_membership WHERE universe = ?",
+                (universe,),
+            ).fetchone()[0]
+            if latest is not None and as_of < latest:
+                raise ValueError(
+                    f"Snapshot date {as_of} for universe '{universe}' is earlier than its latest "
+                    f"interval start {latest}; backdated snapshots are not applied."
+                )
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS membership_snapshot (symbol TEXT PRIMARY KEY)")
+            cursor.execute("DELETE FROM membership_snapshot")
+            cursor.executemany("INSERT INTO membership_snapshot (symbol) VALUES (?)", [(s,) for s in symbols])
+
+            cursor.execute("""
+            UPDATE universe_membership SET valid_to = NULL
+            WHERE universe = ? AND valid_to = ?
+              AND asset_symbol IN (SELECT symbol FROM membership_snapshot)
+              AND NOT EXISTS (SELECT 1 FROM universe_membership o
+                              WHERE o.universe = universe_membership.universe
+                                AND o.asset_symbol = universe_membership.asset_symbol
+                                AND o.valid_to IS NULL)
+            """, (universe, as_of))
+
+            closed = 0
+            if close_missing:
+                closed = cursor.execute("""
+                UPDATE universe_membership SET valid_to = ?
+                WHERE universe = ? AND valid_to IS NULL
+                  AND asset_symbol NOT IN (SELECT symbol FROM membership_snapshot)
+                """, (as_of, universe)).rowcount
+                # Intervals opened and closed on the same day never held.
+                cursor.execute("DELETE FROM universe_membership WHERE universe = ? AND valid_to <= valid_from",
+                               (universe,))
+
+            opened = cursor.execute("""
+            INSERT INTO universe_membership (universe, asset_symbol, valid_from)
+            SELECT ?, symbol, ? FROM membership_snapshot
+            WHERE symbol NOT IN (SELECT asset_symbol FROM universe_membership
+                                 WHERE universe = ? AND valid_to IS NULL)
+            ON CONFLICT(universe, asset_symbol, valid_from) DO UPDATE SET valid_to = NULL
+            """, (universe, as_of, universe)).rowcount
+
+            cursor.execute("""
+            UPDATE assets SET is_active = (
+                symbol IN (SELECT asset_symbol FROM universe_membership WHERE valid_to IS NULL)
+            )
+            """)
+            conn.commit()
+        print(f"Universe '{universe}' on {as_of}: {opened} joined, {closed} left.")
+        return opened, closed
+
+    except ValueError:
+        raise
+    except Exception as e:
+        print(f"Database error while syncing universe '{universe}': {e}")
+        return 0, 0
+
+
+def _refresh_snapshot_metrics(cursor, metrics_df):
+    """
+    Moves 'latest_snapshot' forward using only the newest row per symbol in
+    this batch; older dates in the batch never overwrite a newer snapshot.
+    A NULL indicator keeps the stored value only when the snapshot date is
+    unchanged; a newer bar never carries indicators over from an older one.
+    """
+    latest = metrics_df.sort_values("date").drop_duplicates("asset_symbol", keep="last")
+    records = list(latest.itertuples(index=False, name=None))
+    cursor.executemany("""
+    INSERT INTO latest_snapshot (
+        asset_symbol, date, open, high, low, close, volume,
+        volatility_30d, ma_20d, ma_50d, rsi_14d
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(asset_symbol) DO UPDATE SET
+        date=excluded.date,
+        open=excluded.open,
+        high=excluded.high,
+        low=excluded.low,
+        close=excluded.close,
+        volume=excluded.volume,
+        volatility_30d=CASE WHEN excluded.date = latest_snapshot.date
+            THEN COALESCE(excluded.volatility_30d, latest_snapshot.volatility_30d) ELSE excluded.volatility_30d END,
+        ma_20d=CASE WHEN excluded.date = latest_snapshot.date
+            THEN COALESCE(excluded.ma_20d, latest_snapshot.ma_20d) ELSE excluded.ma_20d END,
+        ma_50d=CASE WHEN excluded.date = latest_snapshot.date
+            THEN COALESCE(excluded.ma_50d, latest_snapshot.ma_50d) ELSE excluded.ma_50d END,
+        rsi_14d=CASE WHEN excluded.date = latest_snapshot.date
+            THEN COALESCE(excluded.rsi_14d, latest_snapshot.rsi_14d) ELSE excluded.rsi_14d END
+    WHERE latest_snapshot.date IS NULL OR excluded.date >= latest_snapshot.date;
+    """, records)
+
+
+def _refresh_snapshot_analyst(cursor, records):
+    cursor.executemany("""
+    INSERT INTO latest_snapshot (
+        asset_symbol, recommendation_mean, recommendation_key, analyst_count, target_mean_price
+    )
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(asset_symbol) DO UPDATE SET
+        recommendation_mean=excluded.recommendation_mean,
+        recommendation_key=excluded.recommendation_key,
+        analyst_count=excluded.analyst_count,
+        target_mean_price=excluded.target_mean_price;
+    """, records)
+
+
 def upsert_analyst_scores(scores_df):
+    """
+    Writes analyst consensus only where it changed.
+
+    The batch is compared against 'analyst_scores' in one set-based query;
+    new or changed symbols get a row appended to 'analyst_score_history' and
+    their current row and snapshot updated. Unchanged symbols are not touched.
+    """
     if not isinstance(scores_df, pd.DataFrame) or scores_df.empty:
         return
 
@@ -56,18 +189,65 @@ def upsert_analyst_scores(scores_df):
             for col in ["recommendation_mean", "analyst_count", "target_mean_price"]:
                 scores_df[col] = pd.to_numeric(scores_df[col], errors="coerce")
 
-            scores_df = scores_df.where(pd.notnull(scores_df), None)
+            scores_df = scores_df.astype(object).where(pd.notnull(scores_df), None)
             records = [
                 (
                     str(row.symbol),
                     float(row.recommendation_mean) if row.recommendation_mean is not None else None,
-                    str(row.recommendation_key),
+                    str(row.recommendation_key) if row.recommendation_key is not None else None,
                     float(row.analyst_count) if row.analyst_count is not None else None,
                     float(row.target_mean_price) if row.target_mean_price is not None else None,
                 )
                 for row in scores_df.itertuples(index=False)
             ]
 
+            cursor = conn.cursor()
+            cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS incoming_analyst_scores (
+                asset_symbol TEXT PRIMARY KEY,
+                recommendation_mean REAL,
+                recommendation_key TEXT,
+                analyst_count REAL,
+                target_mean_price REAL
+            );
+            """)
+            cursor.execute("DELETE FROM incoming_analyst_scores;")
+            cursor.executemany(
+                "INSERT OR REPLACE INTO incoming_analyst_scores VALUES (?, ?, ?, ?, ?);", records
+            )
+            # IS NOT treats two NULLs as equal, so missing values don't count as changes.
+            cursor.execute("""
+            DELETE FROM incoming_analyst_scores WHERE asset_symbol IN (
+                SELECT t.asset_symbol
+                FROM incoming_analyst_scores t
+                JOIN analyst_scores s ON s.asset_symbol = t.asset_symbol
+                WHERE t.recommendation_mean IS s.recommendation_mean
+                  AND t.recommendation_key IS s.recommendation_key
+                  AND t.analyst_count IS s.analyst_count
+                  AND t.target_mean_price IS s.target_mean_price
+            );
+            """)
+            changed = cursor.execute(
+                "SELECT asset_symbol, recommendation_mean, recommendation_key, analyst_count, "
+                "target_mean_price FROM incoming_analyst_scores;"
+            ).fetchall()
+
+            cursor.execute("""
+            INSERT INTO analyst_score_history (
+                asset_symbol, valid_from, recommendation_mean, recommendation_key,
+                analyst_count, target_mean_price
+            )
+            SELECT asset_symbol, datetime('now'), recommendation_mean, recommendation_key,
+                   analyst_count, target_mean_price
+            FROM incoming_analyst_scores
+            WHERE true
+            ON CONFLICT(asset_symbol, valid_from) DO UPDATE SET
+                recommendation_mean=excluded.recommendation_mean,
+                recommendation_key=excluded.recommendation_key,
+                analyst_count=excluded.analyst_count,
+                target_mean_price=excluded.target_mean_price;
+            """)
+
             upsert_query = """
             INSERT INTO analyst_scores (
                 asset_symbol, recommendation_mean, recommendation_key, 
@@ -81,15 +261,14 @@ def upsert_analyst_scores(scores_df):
                 target_mean_price=excluded.target_mean_price,
                 updated_at=datetime('now');
             """
-
-            cursor = conn.cursor()
-            cursor.executemany(upsert_query, records)
+            cursor.executemany(upsert_query, changed)
+            _refresh_snapshot_analyst(cursor, changed)
+            cursor.execute("DELETE FROM incoming_analyst_scores;")
             conn.commit()
-            print(f"Successfully upserted {len(records)} records into 'analyst_scores'.")
+            print(f"Analyst consensus changed for {len(changed)} of {len(records)} symbols.")
     except Exception as e:
         print(f"Database error while updating analyst scores: {e}")
 
-        
 
 def upsert_insider_transactions(transactions_df):
     if not isinstance(transactions_df, pd.DataFrame) or transactions_df.empty:
@@ -151,6 +330,8 @@ def upsert_daily_metrics(metrics_df):
 
         with sqlite3.connect(DB_PATH, timeout=10) as conn:
             cursor = conn.cursor()
+            # Indicators are NULL on a download window's warm-up bars; those
+            # never overwrite values computed earlier from a longer history.
             upsert_query = """
             INSERT INTO daily_metrics (
                 asset_symbol, date, open, high, low, close, volume,
@@ -163,12 +344,13 @@ def upsert_daily_metrics(metrics_df):
                 low=excluded.low,
                 close=excluded.close,
                 volume=excluded.volume,
-                volatility_30d=excluded.volatility_30d,
-                ma_20d=excluded.ma_20d,
-                ma_50d=excluded.ma_50d,
-                rsi_14d=excluded.rsi_14d;
+                volatility_30d=COALESCE(excluded.volatility_30d, daily_metrics.volatility_30d),
+                ma_20d=COALESCE(excluded.ma_20d, daily_metrics.ma_20d),
+                ma_50d=COALESCE(excluded.ma_50d, daily_metrics.ma_50d),
+                rsi_14d=COALESCE(excluded.rsi_14d, daily_metrics.rsi_14d);
             """
             cursor.executemany(upsert_query, records)
+            _refresh_snapshot_metrics(cursor, metrics_df[expected_cols])
             conn.commit()
 
         print(f"Successfully upserted {len(records)} records into 'daily_metrics'.")
@@ -177,6 +359,23 @@ def upsert_daily_metrics(metrics_df):
         print(f"Database error while upserting daily metrics: {e}")
 
 
+def insert_data_quality_run(report):
+    """Stores one data-quality report (see fetchers/dataQuality.py)."""
+    checks = ["missing_sessions", "off_calendar", "non_positive", "stale", "ohlc_errors", "return_outliers"]
+    try:
+        with sqlite3.connect(DB_PATH, timeout=30) as conn:
+            conn.execute(f"""
+            INSERT INTO data_quality_runs (source, symbols, bars, expected_bars, {', '.join(checks)}, rejected, details)
+            VALUES ({', '.join('?' * (len(checks) + 6))})
+            """, (
+                report["source"], report["symbols"], report["bars"], report["expected_bars"],
+                *[report[name] for name in checks], report["rejected"], json.dumps(report["details"]),
+            ))
+            conn.commit()
+    except Exception as e:
+        print(f"Database error while saving data-quality report: {e}")
+
+
 def upsert_earnings_dates(earnings_df):
     """
     Inserts or updates earnings date data into the SQLite database.
@@ -186,6 +385,7 @@ def upsert_earnings_dates(earnings_df):
         - eps_estimate
         - eps_reported
         - eps_surprise_pct
+        - report_time (optional: 'bmo', 'amc' or 'dmh')
     """
     if not isinstance(earnings_df, pd.DataFrame) or earnings_df.empty:
         print("No earnings data to insert.")
@@ -213,22 +413,27 @@ def upsert_earnings_dates(earnings_df):
                 row.earnings_date,
                 row.eps_estimate if pd.notnull(row.eps_estimate) else None,
                 row.eps_reported if pd.notnull(row.eps_reported) else None,
-                row.eps_surprise_pct if pd.notnull(row.eps_surprise_pct) else None
+                row.eps_surprise_pct if pd.notnull(row.eps_surprise_pct) else None,
+                report_time if pd.notnull(report_time) else None
+            )
+            for row, report_time in zip(
+                earnings_df.itertuples(index=False),
+                earnings_df['report_time'] if 'report_time' in earnings_df.columns else [None] * len(earnings_df)
             )
-            for row in earnings_df.itertuples(index=False)
         ]
 
         with sqlite3.connect(DB_PATH, timeout=10) as conn:
             cursor = conn.cursor()
             upsert_query = """
             INSERT INTO earnings_dates (
-                asset_symbol, earnings_date, eps_estimate, eps_reported, eps_surprise_pct
+                asset_symbol, earnings_date, eps_estimate, eps_reported, eps_surprise_pct, report_time
             )
-            VALUES (?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?)
             ON CONFLICT(asset_symbol, earnings_date) DO UPDATE SET
                 eps_estimate=excluded.eps_estimate,
                 eps_reported=excluded.eps_reported,
-                eps_surprise_pct=excluded.eps_surprise_pct;
+                eps_surprise_pct=excluded.eps_surprise_pct,
+                report_time=COALESCE(excluded.report_time, earnings_dates.report_time);
             """
             cursor.executemany(upsert_query, records)
             conn.commit()
@@ -238,3 +443,322 @@ def upsert_earnings_dates(earnings_df):
     except Exception as e:
         print(f"Database error while upserting earnings dates: {e}")
 
+
+
+def upsert_intraday_bars(bars_df):
+    """
+    Inserts or updates completed minute bars from the live stream.
+    Expected columns match the 'intraday_bars' table.
+    """
+    if not isinstance(bars_df, pd.DataFrame) or bars_df.empty:
+        return
+
+    try:
+        expected_cols = [
+            "asset_symbol", "bar_time", "open", "high", "low", "close", "volume",
+            "tick_count", "ma_20", "ma_50", "rsi_14", "volatility_30"
+        ]
+        bars_df = bars_df.astype(object).where(pd.notnull(bars_df), None)
+        records = list(bars_df[expected_cols].itertuples(index=False, name=None))
+
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            upsert_query = """
+            INSERT INTO intraday_bars (
+                asset_symbol, bar_time, open, high, low, close, volume,
+                tick_count, ma_20, ma_50, rsi_14, volatility_30
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(asset_symbol, bar_time) DO UPDATE SET
+                high=MAX(intraday_bars.high, excluded.high),
+                low=MIN(intraday_bars.low, excluded.low),
+                close=excluded.close,
+                volume=intraday_bars.volume + excluded.volume,
+                tick_count=intraday_bars.tick_count + excluded.tick_count,
+                ma_20=excluded.ma_20,
+                ma_50=excluded.ma_50,
+                rsi_14=excluded.rsi_14,
+                volatility_30=excluded.volatility_30;
+            """
+            cursor.executemany(upsert_query, records)
+            conn.commit()
+
+        print(f"Flushed {len(records)} minute bars into 'intraday_bars'.")
+
+    except Exception as e:
+        print(f"Database error while upserting intraday bars: {e}")
+
+
+def upsert_features(features_df, state_df, reset_keys=None):
+    """
+    Writes computed indicator values and their bookkeeping in one transaction.
+
+    features_df: asset_symbol, feature, date, value
+    state_df: asset_symbol, indicator, definition_hash, last_date
+    reset_keys: (asset_symbol, feature) pairs whose stored rows are cleared
+        first because the indicator definition changed.
+    """
+    if not isinstance(state_df, pd.DataFrame) or state_df.empty:
+        return
+
+    try:
+        feature_records = []
+        if isinstance(features_df, pd.DataFrame) and not features_df.empty:
+            feature_records = list(features_df[
+                ["asset_symbol", "feature", "date", "value"]
+            ].itertuples(index=False, name=None))
+        state_records = list(state_df[
+            ["asset_symbol", "indicator", "definition_hash", "last_date"]
+        ].itertuples(index=False, name=None))
+
+        with sqlite3.connect(DB_PATH, timeout=30) as conn:
+            cursor = conn.cursor()
+            if reset_keys:
+                cursor.executemany(
+                    "DELETE FROM features WHERE asset_symbol = ? AND feature = ?;",
+                    list(reset_keys),
+                )
+            cursor.executemany("""
+            INSERT INTO features (asset_symbol, feature, date, value)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(asset_symbol, feature, date) DO UPDATE SET
+                value=excluded.value;
+            """, feature_records)
+            cursor.executemany("""
+            INSERT INTO feature_state (asset_symbol, indicator, definition_hash, last_date)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(asset_symbol, indicator) DO UPDATE SET
+                definition_hash=excluded.definition_hash,
+                last_date=excluded.last_date,
+                updated_at=datetime('now');
+            """, state_records)
+            conn.commit()
+
+        print(f"Successfully upserted {len(feature_records)} records into 'features'.")
+
+    except Exception as e:
+        print(f"Database error while upserting features: {e}")
+
+
+def upsert_market_breadth(breadth_df):
+    """Inserts or replaces daily rows of 'market_breadth'."""
+    if not isinstance(breadth_df, pd.DataFrame) or breadth_df.empty:
+        return
+
+    try:
+        expected_cols = [
+            "date", "advancers", "decliners", "unchanged", "symbols", "pct_above_ma50",
+            "new_highs_52w", "new_lows_52w", "volatility_p10", "volatility_p50", "volatility_p90"
+        ]
+        breadth_df = breadth_df[expected_cols].astype(object).where(pd.notnull(breadth_df[expected_cols]), None)
+        records = list(breadth_df.itertuples(index=False, name=None))
+
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            upsert_query = """
+            INSERT INTO market_breadth (
+                date, advancers, decliners, unchanged, symbols, pct_above_ma50,
+                new_highs_52w, new_lows_52w, volatility_p10, volatility_p50, volatility_p90
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(date) DO UPDATE SET
+                advancers=excluded.advancers,
+                decliners=excluded.decliners,
+                unchanged=excluded.unchanged,
+                symbols=excluded.symbols,
+                pct_above_ma50=excluded.pct_above_ma50,
+                new_highs_52w=excluded.new_highs_52w,
+                new_lows_52w=excluded.new_lows_52w,
+                volatility_p10=excluded.volatility_p10,
+                volatility_p50=excluded.volatility_p50,
+                volatility_p90=excluded.volatility_p90,
+                updated_at=datetime('now');
+            """
+            cursor.executemany(upsert_query, records)
+            conn.commit()
+
+        print(f"Successfully upserted {len(records)} records into 'market_breadth'.")
+
+    except Exception as e:
+        print(f"Database error while upserting market breadth: {e}")
+
+
+def upsert_regimes(model_record, probabilities_df, replace=False):
+    """
+    Saves a regime model and its new state probabilities in one transaction.
+
+    model_record: dict with model_key, n_states, params, filter_state,
+        last_date, n_obs, log_likelihood (params/filter_state as JSON text)
+    probabilities_df: date, state, probability
+    replace: clear the model's stored probabilities first (full refit)
+    """
+    try:
+        records = []
+        if isinstance(probabilities_df, pd.DataFrame) and not probabilities_df.empty:
+            probabilities_df = probabilities_df.assign(model_key=model_record["model_key"])
+            records = list(probabilities_df[
+                ["model_key", "date", "state", "probability"]
+            ].itertuples(index=False, name=None))
+
+        with sqlite3.connect(DB_PATH, timeout=30) as conn:
+            cursor = conn.cursor()
+            if replace:
+                cursor.execute(
+                    "DELETE FROM regime_probabilities WHERE model_key = ?;",
+                    (model_record["model_key"],),
+                )
+            cursor.executemany("""
+            INSERT INTO regime_probabilities (model_key, date, state, probability)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(model_key, date, state) DO UPDATE SET
+                probability=excluded.probability;
+            """, records)
+            cursor.execute("""
+            INSERT INTO regime_models (
+                model_key, n_states, params, filter_state, last_date, n_obs, log_likelihood
+            )
+            VALUES (:model_key, :n_states, :params, :filter_state, :last_date, :n_obs, :log_likelihood)
+            ON CONFLICT(model_key) DO UPDATE SET
+                n_states=excluded.n_states,
+                params=excluded.params,
+                filter_state=excluded.filter_state,
+                last_date=excluded.last_date,
+                n_obs=excluded.n_obs,
+                log_likelihood=excluded.log_likelihood,
+                updated_at=datetime('now');
+            """, model_record)
+            conn.commit()
+
+        print(f"Successfully upserted {len(records)} records into 'regime_probabilities'.")
+
+    except Exception as e:
+        print(f"Database error while upserting regimes: {e}")
+
+
+def upsert_series(observations_df, catalog_df=None):
+    """
+    Stores series observations and, optionally, their catalog entries.
+
+    observations_df: series_id, obs_date, release_date, value. A new
+        release_date for an existing obs_date is kept as a separate vintage.
+    catalog_df: series_id, source, name, frequency, units, release_lag_days
+    """
+    if not isinstance(observations_df, pd.DataFrame) or observations_df.empty:
+        print("No series observations to insert.")
+        return
+
+    try:
+        obs_cols = ["series_id", "obs_date", "release_date", "value"]
+        observations_df = observations_df[obs_cols].astype(object).where(pd.notnull(observations_df[obs_cols]), None)
+        records = list(observations_df.itertuples(index=False, name=None))
+
+        with sqlite3.connect(DB_PATH, timeout=30) as conn:
+            cursor = conn.cursor()
+            if isinstance(catalog_df, pd.DataFrame) and not catalog_df.empty:
+                catalog_cols = ["series_id", "source", "name", "frequency", "units", "release_lag_days"]
+                catalog_df = catalog_df[catalog_cols].astype(object).where(pd.notnull(catalog_df[catalog_cols]), None)
+                cursor.executemany("""
+                INSERT INTO series_catalog (series_id, source, name, frequency, units, release_lag_days)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(series_id) DO UPDATE SET
+                    source=excluded.source,
+                    name=excluded.name,
+                    frequency=excluded.frequency,
+                    units=excluded.units,
+                    release_lag_days=excluded.release_lag_days,
+                    updated_at=datetime('now');
+                """, list(catalog_df.itertuples(index=False, name=None)))
+            cursor.executemany("""
+            INSERT INTO series_observations (series_id, obs_date, release_date, value)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(series_id, obs_date, release_date) DO UPDATE SET
+                value=excluded.value;
+            """, records)
+            conn.commit()
+
+        print(f"Successfully upserted {len(records)} records into 'series_observations'.")
+
+    except Exception as e:
+        print(f"Database error while upserting series: {e}")
+
+
+def upsert_corporate_actions(actions_df):
+    """
+    Inserts or updates splits and dividends.
+    Expected columns: symbol, ex_date, action_type ('split' or 'dividend'), value
+    """
+    if not isinstance(actions_df, pd.DataFrame) or actions_df.empty:
+        print("No corporate actions to insert.")
+        return
+
+    try:
+        actions_df['ex_date'] = pd.to_datetime(actions_df['ex_date']).dt.strftime('%Y-%m-%d')
+        records = [
+            (str(row.symbol), row.ex_date, str(row.action_type), float(row.value))
+            for row in actions_df.itertuples(index=False)
+        ]
+
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            upsert_query = """
+            INSERT INTO corporate_actions (asset_symbol, ex_date, action_type, value)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(asset_symbol, ex_date, action_type) DO UPDATE SET
+                value=excluded.value;
+            """
+            cursor.executemany(upsert_query, records)
+            conn.commit()
+
+        print(f"Successfully upserted {len(records)} records into 'corporate_actions'.")
+
+    except Exception as e:
+        print(f"Database error while upserting corporate actions: {e}")
+
+
+def replace_adjustment_factors(factors_df, symbols, invalidate_symbols=None):
+    """
+    Replaces the cumulative adjustment factors of `symbols` with `factors_df`
+    (asset_symbol, ex_date, price_factor, volume_factor). Stored features for
+    `invalidate_symbols` are marked stale so they are recomputed on adjusted data.
+    """
+    if not symbols:
+        return
+
+    try:
+        records = []
+        if isinstance(factors_df, pd.DataFrame) and not factors_df.empty:
+            records = list(factors_df[
+                ["asset_symbol", "ex_date", "price_factor", "volume_factor"]
+            ].itertuples(index=False, name=None))
+
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "DELETE FROM adjustment_factors WHERE asset_symbol = ?;",
+                [(s,) for s in symbols],
+            )
+            cursor.executemany("""
+            INSERT INTO adjustment_factors (asset_symbol, ex_date, price_factor, volume_factor)
+            VALUES (?, ?, ?, ?);
+            """, records)
+            if invalidate_symbols:
+                stale = [(s,) for s in invalidate_symbols]
+                cursor.executemany("DELETE FROM feature_state WHERE asset_symbol = ?;", stale)
+                cursor.executemany("DELETE FROM features WHERE asset_symbol = ?;", stale)
+            conn.commit()
+
+        print(f"Rebuilt adjustment factors for {len(symbols)} symbols ({len(records)} rows).")
+
+    except Exception as e:
+        print(f"Database error while replacing adjustment factors: {e}")
+
+
+def get_active_symbols(source='sp500'):
+    """Returns the current members of a universe, in symbol order."""
+    with sqlite3.connect(DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT asset_symbol FROM universe_membership WHERE universe = ? AND valid_to IS NULL "
+            "ORDER BY asset_symbol",
+            (source,),
+        ).fetchall()
+    return [row[0] for row in rows]
@@ -0,0 +1,668 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+COPY_BATCH_SIZE = 50000
+
+
+def _connect(db_path):
+    # Autocommit mode so every migration controls its own BEGIN/COMMIT, DDL included.
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+def _ensure_version_table(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY NOT NULL,
+        description TEXT,
+        applied_at TEXT DEFAULT (datetime('now'))
+    );
+    """)
+
+
+def current_version(conn):
+    """Returns the highest applied migration version, or 0 for a fresh database."""
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def _table_exists(conn, table):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def _table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def create_index(conn, name, table, columns, unique=False):
+    """
+    Builds an index in place. SQLite builds it in a single pass inside the
+    caller's transaction, so readers on the WAL keep working while it runs.
+    """
+    unique_sql = "UNIQUE " if unique else ""
+    conn.execute(
+        f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)});"
+    )
+
+
+def rebuild_table(conn, table, create_sql, columns, batch_size=COPY_BATCH_SIZE):
+    """
+    Rewrites `table` with a new definition without dropping its data.
+    `create_sql` must create a table named `{table}__new`. Rows are copied across
+    in rowid batches, then the old table is dropped and the new one renamed.
+    Runs inside the caller's transaction, so a failure leaves the original intact.
+    """
+    new_table = f"{table}__new"
+    conn.execute(f"DROP TABLE IF EXISTS {new_table};")
+    conn.execute(create_sql)
+
+    col_list = ", ".join(columns)
+    max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+    copied = 0
+    for start in range(0, max_rowid + 1, batch_size):
+        cursor = conn.execute(
+            f"INSERT INTO {new_table} ({col_list}) "
+            f"SELECT {col_list} FROM {table} WHERE rowid >= ? AND rowid < ?",
+            (start, start + batch_size),
+        )
+        copied += cursor.rowcount
+        if max_rowid > batch_size:
+            print(f"    Copied {copied} rows of '{table}'...")
+
+    conn.execute(f"DROP TABLE {table};")
+    conn.execute(f"ALTER TABLE {new_table} RENAME TO {table};")
+    return copied
+
+
+def _0001_baseline(conn):
+    """Initial TT2 schema."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS assets (
+        symbol TEXT PRIMARY KEY NOT NULL,
+        name TEXT,
+        asset_class TEXT NOT NULL,
+        source TEXT,
+        first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_seen TIMESTAMP,
+        is_active BOOLEAN DEFAULT 1
+    );
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS earnings_calendar (
+        asset_symbol TEXT NOT NULL,
+        earnings_date DATE NOT NULL,
+        eps_estimate REAL,
+        report_time TEXT,
+        PRIMARY KEY (asset_symbol, earnings_date),
+        FOREIGN KEY (asset_symbol) REFERENCES assets (symbol) ON DELETE CASCADE
+    );
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS analyst_scores (
+        asset_symbol TEXT PRIMARY KEY NOT NULL,
+        recommendation_mean REAL,
+        recommendation_key TEXT,
+        analyst_count REAL,
+        target_mean_price REAL,
+        updated_at TEXT DEFAULT (datetime('now')),
+        FOREIGN KEY (asset_symbol) REFERENCES assets (symbol) ON DELETE CASCADE
+    );
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS insider_transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        asset_symbol TEXT NOT NULL,
+        insider_name TEXT,
+        insider_position TEXT,
+        transaction_date DATE,
+        transaction_type TEXT,
+        shares INTEGER,
+        value REAL,
+        fetch_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (asset_symbol) REFERENCES assets (symbol) ON DELETE CASCADE
+    );
+    """)
+    create_index(conn, "idx_insider_asset_symbol", "insider_transactions", ["asset_symbol"])
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS daily_metrics (
+        asset_symbol TEXT NOT NULL,
+        date DATE NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        volatility_30d REAL,
+        ma_20d REAL,
+        ma_50d REAL,
+        rsi_14d REAL,
+        PRIMARY KEY (asset_symbol, date),
+        FOREIGN KEY (asset_symbol) REFERENCES assets (symbol) ON DELETE CASCADE
+    );
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS earnings_dates (
+        asset_symbol TEXT NOT NULL,
+        earnings_date TEXT NOT NULL,
+        eps_estimate REAL,
+        eps_reported REAL,
+        eps_surprise_pct REAL,
+        PRIMARY KEY (asset_symbol, earnings_date)
+    );
+    """)
+
+
+def _0002_merge_earnings_calendar(conn):
+    """Fold 'earnings_calendar' into 'earnings_dates'."""
+    columns = ["asset_symbol", "earnings_date", "eps_estimate", "eps_reported", "eps_surprise_pct"]
+    if "report_time" in _table_columns(conn, "earnings_dates"):
+        columns.append("report_time")
+
+    rebuild_table(conn, "earnings_dates", """
+    CREATE TABLE earnings_dates__new (
+        asset_symbol TEXT NOT NULL,
+        earnings_date DATE NOT NULL,
+        eps_estimate REAL,
+        eps_reported REAL,
+        eps_surprise_pct REAL,
+        report_time TEXT,
+        PRIMARY KEY (asset_symbol, earnings_date),
+        FOREIGN KEY (asset_symbol) REFERENCES assets (symbol) ON DELETE CASCADE
+    );
+    """, columns)
+
+    if _table_exists(conn, "earnings_calendar"):
+        conn.execute("""
+        INSERT INTO earnings_dates (asset_symbol, earnings_date, eps_estimate, report_time)
+        SELECT asset_symbol, earnings_date, eps_estimate, report_time FROM earnings_calendar
+        WHERE true
+        ON CONFLICT(asset_symbol, earnings_date) DO UPDATE SET
+            eps_estimate=COALESCE(earnings_dates.eps_estimate, excluded.eps_estimate),
+            report_time=COALESCE(earnings_dates.report_time, excluded.report_time);
+        """)
+        conn.execute("DROP TABLE earnings_calendar;")
+
+    create_index(conn, "idx_earnings_dates_date", "earnings_dates", ["earnings_date"])
+
+
+def _0003_daily_metrics_date_index(conn):
+    """Index 'daily_metrics' by date for cross-sectional reads."""
+    create_index(conn, "idx_daily_metrics_date", "daily_metrics", ["date", "asset_symbol"])
+
+
+def _0004_fetch_progress(conn):
+    """Track completed pages of paginated fetchers so interrupted runs can resume."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS fetch_progress (
+        fetcher TEXT NOT NULL,
+        page_size INTEGER NOT NULL,
+        page INTEGER NOT NULL,
+        record_count INTEGER,
+        completed_at TEXT DEFAULT (datetime('now')),
+        PRIMARY KEY (fetcher, page_size, page)
+    );
+    """)
+
+
+def _0005_intraday_bars(conn):
+    """Minute bars from the live quote stream, with tick-window indicator snapshots."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS intraday_bars (
+        asset_symbol TEXT NOT NULL,
+        bar_time TEXT NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        tick_count INTEGER,
+        ma_20 REAL,
+        ma_50 REAL,
+        rsi_14 REAL,
+        volatility_30 REAL,
+        PRIMARY KEY (asset_symbol, bar_time)
+    );
+    """)
+
+
+def _0006_features(conn):
+    """Long-format feature store for registry indicators."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS features (
+        asset_symbol TEXT NOT NULL,
+        feature TEXT NOT NULL,
+        date DATE NOT NULL,
+        value REAL,
+        PRIMARY KEY (asset_symbol, feature, date)
+    ) WITHOUT ROWID;
+    """)
+    create_index(conn, "idx_features_feature_date", "features", ["feature", "date"])
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS feature_state (
+        asset_symbol TEXT NOT NULL,
+        indicator TEXT NOT NULL,
+        definition_hash TEXT NOT NULL,
+        last_date DATE,
+        updated_at TEXT DEFAULT (datetime('now')),
+        PRIMARY KEY (asset_symbol, indicator)
+    );
+    """)
+
+
+def _0007_latest_snapshot(conn):
+    """Latest bar, indicators and analyst consensus per symbol for the screener."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS latest_snapshot (
+        asset_symbol TEXT PRIMARY KEY NOT NULL,
+        date DATE,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        volatility_30d REAL,
+        ma_20d REAL,
+        ma_50d REAL,
+        rsi_14d REAL,
+        recommendation_mean REAL,
+        recommendation_key TEXT,
+        analyst_count REAL,
+        target_mean_price REAL
+    );
+    """)
+    conn.execute("""
+    INSERT INTO latest_snapshot (
+        asset_symbol, date, open, high, low, close, volume,
+        volatility_30d, ma_20d, ma_50d, rsi_14d
+    )
+    SELECT m.asset_symbol, m.date, m.open, m.high, m.low, m.close, m.volume,
+           m.volatility_30d, m.ma_20d, m.ma_50d, m.rsi_14d
+    FROM daily_metrics m
+    JOIN (
+        SELECT asset_symbol, MAX(date) AS date FROM daily_metrics GROUP BY asset_symbol
+    ) latest ON latest.asset_symbol = m.asset_symbol AND latest.date = m.date
+    WHERE true
+    ON CONFLICT(asset_symbol) DO NOTHING;
+    """)
+    conn.execute("""
+    INSERT INTO latest_snapshot (
+        asset_symbol, recommendation_mean, recommendation_key, analyst_count, target_mean_price
+    )
+    SELECT asset_symbol, recommendation_mean, recommendation_key, analyst_count, target_mean_price
+    FROM analyst_scores
+    WHERE true
+    ON CONFLICT(asset_symbol) DO UPDATE SET
+        recommendation_mean=excluded.recommendation_mean,
+        recommendation_key=excluded.recommendation_key,
+        analyst_count=excluded.analyst_count,
+        target_mean_price=excluded.target_mean_price;
+    """)
+    create_index(conn, "idx_snapshot_rsi", "latest_snapshot", ["rsi_14d"])
+    create_index(conn, "idx_snapshot_recommendation", "latest_snapshot", ["recommendation_key", "recommendation_mean"])
+    create_index(conn, "idx_snapshot_volatility", "latest_snapshot", ["volatility_30d"])
+
+
+def _0008_market_breadth(conn):
+    """Daily universe-level breadth aggregates."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS market_breadth (
+        date DATE PRIMARY KEY NOT NULL,
+        advancers INTEGER,
+        decliners INTEGER,
+        unchanged INTEGER,
+        symbols INTEGER,
+        pct_above_ma50 REAL,
+        new_highs_52w INTEGER,
+        new_lows_52w INTEGER,
+        volatility_p10 REAL,
+        volatility_p50 REAL,
+        volatility_p90 REAL,
+        updated_at TEXT DEFAULT (datetime('now'))
+    );
+    """)
+
+
+def _0009_corporate_actions(conn):
+    """Splits and dividends with cumulative per-symbol adjustment factors."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS corporate_actions (
+        asset_symbol TEXT NOT NULL,
+        ex_date DATE NOT NULL,
+        action_type TEXT NOT NULL,
+        value REAL NOT NULL,
+        fetch_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (asset_symbol, ex_date, action_type),
+        FOREIGN KEY (asset_symbol) REFERENCES assets (symbol) ON DELETE CASCADE
+    );
+    """)
+    # price_factor/volume_factor apply to every bar dated before ex_date and on
+    # or after the symbol's previous ex_date.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS adjustment_factors (
+        asset_symbol TEXT NOT NULL,
+        ex_date DATE NOT NULL,
+        price_factor REAL NOT NULL,
+        volume_factor REAL NOT NULL,
+        PRIMARY KEY (asset_symbol, ex_date)
+    ) WITHOUT ROWID;
+    """)
+
+
+def _0010_jobs(conn):
+    """Lease-based work queue for sharding fetcher batches across worker processes."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fetcher TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        lease_owner TEXT,
+        lease_expires_at REAL,
+        heartbeat_at REAL,
+        last_error TEXT,
+        created_at TEXT DEFAULT (datetime('now')),
+        finished_at TEXT
+    );
+    """)
+    create_index(conn, "idx_jobs_claim", "jobs", ["status", "lease_expires_at", "id"])
+
+
+def _0011_regimes(conn):
+    """Fitted market regime models and their per-date filtered state probabilities."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS regime_models (
+        model_key TEXT PRIMARY KEY NOT NULL,
+        n_states INTEGER NOT NULL,
+        params TEXT NOT NULL,
+        filter_state TEXT NOT NULL,
+        last_date DATE NOT NULL,
+        n_obs INTEGER NOT NULL,
+        log_likelihood REAL,
+        updated_at TEXT DEFAULT (datetime('now'))
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS regime_probabilities (
+        model_key TEXT NOT NULL,
+        date DATE NOT NULL,
+        state INTEGER NOT NULL,
+        probability REAL NOT NULL,
+        PRIMARY KEY (model_key, date, state)
+    ) WITHOUT ROWID;
+    """)
+    create_index(conn, "idx_regime_probabilities_date", "regime_probabilities", ["date"])
+
+
+def _0012_paper_trading(conn):
+    """Paper-trading ledger: accounts, orders, fills and positions."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS paper_accounts (
+        account TEXT PRIMARY KEY NOT NULL,
+        cash REAL NOT NULL,
+        starting_cash REAL NOT NULL,
+        updated_at TEXT DEFAULT (datetime('now'))
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS paper_orders (
+        order_id TEXT PRIMARY KEY NOT NULL,
+        account TEXT NOT NULL,
+        client_order_id TEXT,
+        symbol TEXT NOT NULL,
+        side TEXT NOT NULL,
+        qty REAL NOT NULL,
+        order_type TEXT NOT NULL,
+        limit_price REAL,
+        time_in_force TEXT NOT NULL,
+        status TEXT NOT NULL,
+        filled_qty REAL NOT NULL DEFAULT 0,
+        avg_fill_price REAL,
+        signal_at REAL,
+        submitted_at REAL NOT NULL,
+        signal_to_order_ms REAL,
+        updated_at REAL
+    );
+    """)
+    create_index(conn, "idx_paper_orders_status", "paper_orders", ["account", "status"])
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS paper_fills (
+        fill_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id TEXT NOT NULL,
+        account TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        side TEXT NOT NULL,
+        qty REAL NOT NULL,
+        price REAL NOT NULL,
+        bar_time TEXT,
+        filled_at REAL NOT NULL,
+        order_to_fill_ms REAL,
+        FOREIGN KEY (order_id) REFERENCES paper_orders (order_id)
+    );
+    """)
+    create_index(conn, "idx_paper_fills_order", "paper_fills", ["order_id"])
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS paper_positions (
+        account TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        qty REAL NOT NULL,
+        avg_cost REAL,
+        realized_pnl REAL NOT NULL DEFAULT 0,
+        updated_at TEXT DEFAULT (datetime('now')),
+        PRIMARY KEY (account, symbol)
+    ) WITHOUT ROWID;
+    """)
+
+
+def _0013_analyst_score_history(conn):
+    """Append-only analyst consensus history, one row per observed change."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS analyst_score_history (
+        asset_symbol TEXT NOT NULL,
+        valid_from TEXT NOT NULL,
+        recommendation_mean REAL,
+        recommendation_key TEXT,
+        analyst_count REAL,
+        target_mean_price REAL,
+        PRIMARY KEY (asset_symbol, valid_from)
+    ) WITHOUT ROWID;
+    """)
+    # Seed with the current consensus, valid from when it was last written.
+    conn.execute("""
+    INSERT INTO analyst_score_history (
+        asset_symbol, valid_from, recommendation_mean, recommendation_key,
+        analyst_count, target_mean_price
+    )
+    SELECT asset_symbol, COALESCE(updated_at, datetime('now')), recommendation_mean,
+           recommendation_key, analyst_count, target_mean_price
+    FROM analyst_scores
+    WHERE true
+    ON CONFLICT(asset_symbol, valid_from) DO NOTHING;
+    """)
+
+
+def _0014_series(conn):
+    """Generic macro / alternative-data time series with release dates."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS series_catalog (
+        series_id TEXT PRIMARY KEY NOT NULL,
+        source TEXT NOT NULL,
+        name TEXT,
+        frequency TEXT,
+        units TEXT,
+        release_lag_days INTEGER,
+        updated_at TEXT DEFAULT (datetime('now'))
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS series_observations (
+        series_id TEXT NOT NULL,
+        obs_date DATE NOT NULL,
+        release_date DATE NOT NULL,
+        value REAL,
+        PRIMARY KEY (series_id, obs_date, release_date)
+    ) WITHOUT ROWID;
+    """)
+    create_index(conn, "idx_series_observations_release", "series_observations", ["series_id", "release_date"])
+
+
+def _0015_archive_partitions(conn):
+    """Manifest of cold years archived out of 'daily_metrics' into read-only partition files."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS archive_partitions (
+        table_name TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        min_date DATE,
+        max_date DATE,
+        sqlite_bytes INTEGER,
+        archive_bytes INTEGER,
+        sha256 TEXT NOT NULL,
+        archived_at TEXT DEFAULT (datetime('now')),
+        PRIMARY KEY (table_name, year)
+    );
+    """)
+
+
+def _0016_data_quality_runs(conn):
+    """Per-run data-quality report for daily bar downloads."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS data_quality_runs (
+        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_at TEXT DEFAULT (datetime('now')),
+        source TEXT NOT NULL,
+        symbols INTEGER,
+        bars INTEGER,
+        expected_bars INTEGER,
+        missing_sessions INTEGER,
+        off_calendar INTEGER,
+        non_positive INTEGER,
+        stale INTEGER,
+        ohlc_errors INTEGER,
+        return_outliers INTEGER,
+        rejected INTEGER,
+        details TEXT
+    );
+    """)
+
+
+def _0017_universe_membership(conn):
+    """Point-in-time universe membership intervals, seeded from 'assets'."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS universe_membership (
+        universe TEXT NOT NULL,
+        asset_symbol TEXT NOT NULL,
+        valid_from DATE NOT NULL,
+        valid_to DATE,
+        PRIMARY KEY (universe, asset_symbol, valid_from)
+    ) WITHOUT ROWID;
+    """)
+    create_index(conn, "idx_universe_membership_asof", "universe_membership", ["universe", "valid_from", "valid_to"])
+    # At most one open interval per symbol and universe.
+    conn.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_universe_membership_open
+    ON universe_membership (universe, asset_symbol) WHERE valid_to IS NULL;
+    """)
+    # valid_to is exclusive; inactive assets are taken to have left the day after they were last seen.
+    conn.execute("""
+    INSERT OR IGNORE INTO universe_membership (universe, asset_symbol, valid_from, valid_to)
+    SELECT source, symbol,
+           COALESCE(date(first_seen), date(last_seen), date('now')),
+           CASE WHEN is_active = 1 THEN NULL
+                ELSE MAX(date(COALESCE(last_seen, first_seen, 'now'), '+1 day'),
+                         date(COALESCE(first_seen, last_seen, 'now'), '+1 day')) END
+    FROM assets
+    WHERE source IS NOT NULL;
+    """)
+
+
+def _0018_paper_order_submit_bar(conn):
+    """Bar time each paper order was submitted on, so it only fills on later bars."""
+    if "submit_bar_time" not in _table_columns(conn, "paper_orders"):
+        conn.execute("ALTER TABLE paper_orders ADD COLUMN submit_bar_time TEXT;")
+
+
+# Forward-only. Append new migrations to the end; never edit or reorder applied ones.
+MIGRATIONS = [
+    (1, _0001_baseline),
+    (2, _0002_merge_earnings_calendar),
+    (3, _0003_daily_metrics_date_index),
+    (4, _0004_fetch_progress),
+    (5, _0005_intraday_bars),
+    (6, _0006_features),
+    (7, _0007_latest_snapshot),
+    (8, _0008_market_breadth),
+    (9, _0009_corporate_actions),
+    (10, _0010_jobs),
+    (11, _0011_regimes),
+    (12, _0012_paper_trading),
+    (13, _0013_analyst_score_history),
+    (14, _0014_series),
+    (15, _0015_archive_partitions),
+    (16, _0016_data_quality_runs),
+    (17, _0017_universe_membership),
+    (18, _0018_paper_order_submit_bar),
+]
+
+
+def migrate(db_path=DB_PATH, target=None):
+    """
+    Brings the database at `db_path` up to `target` (default: latest) in place.
+    Each migration runs in its own transaction together with its
+    'schema_version' row, so an interrupted upgrade resumes where it stopped.
+    """
+    latest = MIGRATIONS[-1][0]
+    target = latest if target is None else target
+
+    conn = _connect(db_path)
+    try:
+        version = current_version(conn)
+        if version > latest:
+            raise RuntimeError(
+                f"Database is at schema version {version}, newer than this code ({latest})."
+            )
+        if version >= target:
+            print(f"Database schema is up to date (version {version}).")
+            return version
+
+        for number, migration in MIGRATIONS:
+            if number <= version or number > target:
+                continue
+            description = (migration.__doc__ or migration.__name__).strip()
+            print(f"Applying migration {number}: {description}")
+            conn.execute("BEGIN IMMEDIATE;")
+            try:
+                migration(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (number, description),
+                )
+                conn.execute("COMMIT;")
+            except Exception:
+                conn.execute("ROLLBACK;")
+                raise
+            version = number
+
+        print(f"Database schema migrated to version {version}.")
+        return version
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
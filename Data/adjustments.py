@@ -0,0 +1,229 @@
+import sqlite3
+import os
+
+import numpy as np
+import pandas as pd
+
+import DBManager
+import archive
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+# 'daily_metrics' stores raw prices. Price-like columns are multiplied by the
+# price factor, volume by the volume factor; RSI and volatility are scale-free.
+PRICE_COLUMNS = {"open", "high", "low", "close", "ma_20d", "ma_50d"}
+VOLUME_COLUMNS = {"volume"}
+FACTOR_COLUMNS = ["asset_symbol", "ex_date", "price_factor", "volume_factor"]
+
+
+def _keys(codes, dates):
+    """Sortable int64 keys combining a symbol code with a YYYY-MM-DD date."""
+    ymd = np.char.replace(np.asarray(dates, dtype=str), "-", "").astype(np.int64)
+    return np.asarray(codes, dtype=np.int64) * 100_000_000 + ymd
+
+
+def compute_factors(actions_df):
+    """
+    Builds cumulative factors from corporate actions.
+
+    `actions_df` has asset_symbol, ex_date, action_type, value and prev_close
+    (the raw close on the last bar before the ex-date). A split of ratio r
+    scales earlier prices by 1/r and volumes by r. A cash dividend d scales
+    earlier prices by 1 - d / prev_close; dividends without a usable prior
+    close are skipped. Each output row holds the product of every action on or
+    after its ex_date, so a bar uses the row with the first ex_date after it.
+    """
+    if actions_df.empty:
+        return pd.DataFrame(columns=FACTOR_COLUMNS)
+
+    value = actions_df["value"].to_numpy(dtype=np.float64)
+    prev_close = actions_df["prev_close"].to_numpy(dtype=np.float64)
+    is_split = (actions_df["action_type"] == "split").to_numpy() & (value > 0)
+    is_div = (actions_df["action_type"] == "dividend").to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        usable_div = is_div & np.isfinite(prev_close) & (prev_close > value)
+        price = np.where(is_split, 1.0 / value, np.where(usable_div, 1.0 - value / prev_close, 1.0))
+    volume = np.where(is_split, value, 1.0)
+
+    event = pd.DataFrame({
+        "asset_symbol": actions_df["asset_symbol"].to_numpy(),
+        "ex_date": actions_df["ex_date"].to_numpy(),
+        "price_factor": price,
+        "volume_factor": volume,
+    })
+    # Actions sharing an ex_date (e.g. a split and a dividend) combine into one row.
+    event = event.groupby(["asset_symbol", "ex_date"], as_index=False, sort=True).prod()
+    # Reverse cumulative product within each symbol: later actions apply to all earlier bars.
+    rev = event.iloc[::-1]
+    event["price_factor"] = rev.groupby("asset_symbol")["price_factor"].cumprod().iloc[::-1]
+    event["volume_factor"] = rev.groupby("asset_symbol")["volume_factor"].cumprod().iloc[::-1]
+    return event[FACTOR_COLUMNS]
+
+
+def _symbol_filter(symbols, column="asset_symbol"):
+    if not symbols:
+        return "", []
+    return f" WHERE {column} IN ({','.join('?' * len(symbols))})", list(symbols)
+
+
+def load_factors(symbols=None, db_path=None):
+    where, params = _symbol_filter(symbols)
+    with sqlite3.connect(db_path or DB_PATH) as conn:
+        return pd.read_sql_query(
+            f"SELECT {', '.join(FACTOR_COLUMNS)} FROM adjustment_factors{where} "
+            "ORDER BY asset_symbol, ex_date",
+            conn, params=params,
+        )
+
+
+def _archived_prev_close(actions):
+    """
+    Fills in the close before each ex-date from archived partitions where the
+    previous trading day may have been moved out of 'daily_metrics'.
+    """
+    cold_until = archive.cold_until(DB_PATH)
+    if not cold_until or actions.empty:
+        return actions
+    margin = (pd.Timestamp(cold_until) + pd.Timedelta(days=31)).strftime("%Y-%m-%d")
+    affected = actions["prev_close"].isna() | (actions["ex_date"] <= margin)
+    if not affected.any():
+        return actions
+
+    subset = actions.loc[affected, ["asset_symbol", "ex_date"]]
+    closes = archive.read_daily_metrics(
+        ["close"], list(subset["asset_symbol"].unique()), end=subset["ex_date"].max(), db_path=DB_PATH,
+    ).dropna(subset=["close"])
+    lookup = subset.assign(_key=pd.to_datetime(subset["ex_date"]), _row=subset.index).sort_values("_key")
+    closes = closes.assign(_key=pd.to_datetime(closes["date"])).sort_values("_key")
+    merged = pd.merge_asof(lookup, closes[["asset_symbol", "_key", "close"]], on="_key", by="asset_symbol",
+                           direction="backward", allow_exact_matches=False)
+    actions = actions.copy()
+    actions.loc[merged["_row"].to_numpy(), "prev_close"] = merged["close"].to_numpy()
+    return actions
+
+
+def refresh_factors(symbols=None):
+    """
+    Recomputes adjustment factors for `symbols` (default: every symbol with
+    corporate actions). Only symbols whose factors actually changed get their
+    stored features invalidated. Returns those symbols.
+    """
+    where, params = _symbol_filter(symbols, "a.asset_symbol")
+    with sqlite3.connect(DB_PATH) as conn:
+        actions = pd.read_sql_query(f"""
+            SELECT a.asset_symbol, a.ex_date, a.action_type, a.value,
+                   (SELECT m.close FROM daily_metrics m
+                    WHERE m.asset_symbol = a.asset_symbol AND m.date < a.ex_date
+                    ORDER BY m.date DESC LIMIT 1) AS prev_close
+            FROM corporate_actions a{where}
+            ORDER BY a.asset_symbol, a.ex_date
+        """, conn, params=params)
+    actions = _archived_prev_close(actions)
+
+    if symbols is None:
+        symbols = sorted(actions["asset_symbol"].unique())
+    symbols = list(symbols)
+    if not symbols:
+        return []
+
+    new = compute_factors(actions)
+    old = load_factors(symbols)
+
+    def _signature(df):
+        return {
+            sym: [(r.ex_date, round(r.price_factor, 12), round(r.volume_factor, 12))
+                  for r in group.itertuples(index=False)]
+            for sym, group in df.groupby("asset_symbol")
+        }
+
+    new_sig, old_sig = _signature(new), _signature(old)
+    changed = [s for s in symbols if new_sig.get(s, []) != old_sig.get(s, [])]
+    if not changed:
+        print("Adjustment factors are up to date.")
+        return []
+
+    DBManager.replace_adjustment_factors(new[new["asset_symbol"].isin(changed)], changed, changed)
+    return changed
+
+
+def _prepare(factors_df, symbols):
+    """Sorted factor keys plus integer codes for `symbols` in the same code space."""
+    universe, codes = np.unique(
+        np.concatenate([factors_df["asset_symbol"].to_numpy(dtype=str), np.asarray(symbols, dtype=str)]),
+        return_inverse=True,
+    )
+    f_codes, r_codes = codes[:len(factors_df)], codes[len(factors_df):]
+    f_keys = _keys(f_codes, factors_df["ex_date"].to_numpy())
+    order = np.argsort(f_keys, kind="stable")
+    return (
+        f_keys[order], f_codes[order],
+        factors_df["price_factor"].to_numpy(dtype=np.float64)[order],
+        factors_df["volume_factor"].to_numpy(dtype=np.float64)[order],
+        r_codes,
+    )
+
+
+def _lookup(f_keys, f_codes, f_price, f_volume, r_codes, r_keys):
+    price = np.ones(len(r_keys))
+    volume = np.ones(len(r_keys))
+    idx = np.searchsorted(f_keys, r_keys, side="right")
+    hit = idx < len(f_keys)
+    hit[hit] = f_codes[idx[hit]] == r_codes[hit]
+    price[hit] = f_price[idx[hit]]
+    volume[hit] = f_volume[idx[hit]]
+    return price, volume
+
+
+def factors_for(symbols, dates, factors_df):
+    """
+    Vectorised lookup of (price_factor, volume_factor) for each (symbol, date)
+    pair: the first factor row of the same symbol with ex_date after the date,
+    or 1 when there is none.
+    """
+    if factors_df.empty or len(symbols) == 0:
+        return np.ones(len(symbols)), np.ones(len(symbols))
+    f_keys, f_codes, f_price, f_volume, r_codes = _prepare(factors_df, symbols)
+    return _lookup(f_keys, f_codes, f_price, f_volume, r_codes, _keys(r_codes, dates))
+
+
+def adjust_frame(df, factors_df=None):
+    """Returns a copy of a daily_metrics-shaped frame with adjusted prices and volume."""
+    if df.empty:
+        return df.copy()
+    if factors_df is None:
+        factors_df = load_factors(list(df["asset_symbol"].unique()))
+    price, volume = factors_for(df["asset_symbol"].to_numpy(), df["date"].to_numpy(), factors_df)
+    out = df.copy()
+    for column in PRICE_COLUMNS.intersection(out.columns):
+        out[column] = out[column].to_numpy(dtype=np.float64) * price
+    for column in VOLUME_COLUMNS.intersection(out.columns):
+        out[column] = out[column].to_numpy(dtype=np.float64) * volume
+    return out
+
+
+def adjust_panel(dates, symbols, arrays, factors_df=None, db_path=None):
+    """Adjusts dates x symbols panels from `panels.load_panel` in place."""
+    if len(dates) == 0 or len(symbols) == 0:
+        return arrays
+    if factors_df is None:
+        factors_df = load_factors(list(symbols), db_path)
+    if factors_df.empty:
+        return arrays
+
+    f_keys, f_codes, f_price, f_volume, sym_codes = _prepare(factors_df, symbols)
+    ymd = np.char.replace(np.asarray(dates, dtype=str), "-", "").astype(np.int64)
+    grid_keys = (sym_codes.astype(np.int64)[None, :] * 100_000_000 + ymd[:, None]).ravel()
+    grid_codes = np.broadcast_to(sym_codes[None, :], (len(dates), len(symbols))).ravel()
+    price, volume = _lookup(f_keys, f_codes, f_price, f_volume, grid_codes, grid_keys)
+    price = price.reshape(len(dates), len(symbols))
+    volume = volume.reshape(len(dates), len(symbols))
+    for column, panel in arrays.items():
+        if column in PRICE_COLUMNS:
+            panel *= price
+        elif column in VOLUME_COLUMNS:
+            panel *= volume
+    return arrays
+
+
+if __name__ == "__main__":
+    refresh_factors()
@@ -0,0 +1,105 @@
+import argparse
+import sqlite3
+import os
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+CONSENSUS_COLUMNS = ["recommendation_mean", "recommendation_key", "analyst_count", "target_mean_price"]
+
+
+def _day_end(day):
+    """Exclusive upper bound for 'valid on day D': anything written before the next day."""
+    return (pd.Timestamp(day) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def consensus_as_of(day, symbols=None):
+    """
+    Analyst consensus per symbol as it stood at the end of `day` (YYYY-MM-DD):
+    the latest history row written on or before that day.
+    """
+    params = [_day_end(day)]
+    symbol_sql = ""
+    if symbols:
+        symbol_sql = f" AND asset_symbol IN ({','.join('?' * len(symbols))})"
+        params += list(symbols)
+    query = f"""
+    SELECT h.asset_symbol, h.valid_from, {', '.join('h.' + c for c in CONSENSUS_COLUMNS)}
+    FROM analyst_score_history h
+    JOIN (
+        SELECT asset_symbol, MAX(valid_from) AS valid_from
+        FROM analyst_score_history
+        WHERE valid_from < ?{symbol_sql}
+        GROUP BY asset_symbol
+    ) latest ON latest.asset_symbol = h.asset_symbol AND latest.valid_from = h.valid_from
+    ORDER BY h.asset_symbol
+    """
+    with sqlite3.connect(DB_PATH) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def consensus_for(pairs_df):
+    """
+    Point-in-time consensus for many (asset_symbol, date) pairs at once, e.g.
+    every bar of a backtest. Returns `pairs_df` with the consensus columns
+    added (NaN/None before a symbol's first recorded consensus).
+    """
+    symbols = list(pairs_df["asset_symbol"].unique())
+    query = (
+        f"SELECT asset_symbol, valid_from, {', '.join(CONSENSUS_COLUMNS)} FROM analyst_score_history "
+        f"WHERE asset_symbol IN ({','.join('?' * len(symbols))})"
+    )
+    with sqlite3.connect(DB_PATH) as conn:
+        history = pd.read_sql_query(query, conn, params=symbols)
+
+    left = pairs_df.reset_index(drop=True)
+    # A row written at any time on day D is visible to date D.
+    left_key = pd.to_datetime(left["date"]) + pd.Timedelta(days=1)
+    right_key = pd.to_datetime(history["valid_from"])
+    lookup = left.assign(_key=left_key.to_numpy(), _row=np.arange(len(left))).sort_values("_key")
+    history = history.assign(_key=right_key.to_numpy()).sort_values("_key")
+    merged = pd.merge_asof(
+        lookup, history.drop(columns="valid_from"), on="_key", by="asset_symbol",
+        direction="backward", allow_exact_matches=False,
+    )
+    return merged.sort_values("_row").drop(columns=["_key", "_row"]).reset_index(drop=True)
+
+
+def rating_changes(start=None, end=None, symbols=None):
+    """Consensus changes with the previous values, newest first."""
+    query = f"""
+    SELECT * FROM (
+        SELECT asset_symbol, valid_from,
+               {', '.join(CONSENSUS_COLUMNS)},
+               {', '.join(f'LAG({c}) OVER w AS prev_{c}' for c in CONSENSUS_COLUMNS)}
+        FROM analyst_score_history
+        WINDOW w AS (PARTITION BY asset_symbol ORDER BY valid_from)
+    ) WHERE 1=1
+    """
+    params = []
+    if start:
+        query += " AND valid_from >= ?"
+        params.append(start)
+    if end:
+        query += " AND valid_from < ?"
+        params.append(_day_end(end))
+    if symbols:
+        query += f" AND asset_symbol IN ({','.join('?' * len(symbols))})"
+        params += list(symbols)
+    query += " ORDER BY valid_from DESC, asset_symbol"
+    with sqlite3.connect(DB_PATH) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Point-in-time analyst consensus.")
+    parser.add_argument("--as-of", help="Show the consensus on this YYYY-MM-DD date.")
+    parser.add_argument("--changes-since", help="List rating changes since this date.")
+    args = parser.parse_args()
+
+    if args.as_of:
+        print(consensus_as_of(args.as_of).to_string(index=False))
+    if args.changes_since or not args.as_of:
+        print(rating_changes(start=args.changes_since).head(50).to_string(index=False))
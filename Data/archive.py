@@ -0,0 +1,350 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+TABLE = "daily_metrics"
+VALUE_COLUMNS = [
+    "open", "high", "low", "close", "volume",
+    "volatility_30d", "ma_20d", "ma_50d", "rsi_14d",
+]
+# The current year and the one before stay in the main database.
+HOT_YEARS = 2
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+# Partitions are immutable, so decoded ones can be kept keyed by checksum.
+_PARTITION_CACHE = OrderedDict()
+_PARTITION_CACHE_SIZE = 4
+
+
+def archive_dir(db_path=None):
+    """Partition files live in 'archive/' next to the database file."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path or DB_PATH)), "archive")
+
+
+# --- Partition encoding ---
+#
+# A partition is a compressed .npz of columns sorted by (symbol, date):
+# symbols dictionary-encoded as int32 codes, dates as int32 day numbers and
+# each float column byte-shuffled (all first bytes, then all second bytes...)
+# so the slowly changing sign/exponent bytes of neighbouring prices sit
+# together and deflate far better than interleaved doubles.
+
+def _shuffle(values):
+    return np.ascontiguousarray(values.astype("<f8").view(np.uint8).reshape(-1, 8).T)
+
+
+def _unshuffle(planes):
+    return np.ascontiguousarray(planes.T).view("<f8").ravel()
+
+
+def _encode(df):
+    symbols, codes = np.unique(df["asset_symbol"].to_numpy(dtype=str), return_inverse=True)
+    arrays = {
+        "symbols": symbols,
+        "codes": codes.astype(np.int32),
+        "days": (df["date"].to_numpy(dtype="datetime64[D]") - _EPOCH).astype(np.int32),
+    }
+    for column in VALUE_COLUMNS:
+        arrays[column] = _shuffle(df[column].to_numpy(dtype=np.float64))
+    return arrays
+
+
+def _decode(arrays):
+    frame = {
+        "asset_symbol": arrays["symbols"][arrays["codes"]],
+        "date": np.datetime_as_string(arrays["days"].astype("timedelta64[D]") + _EPOCH, unit="D"),
+    }
+    for column in VALUE_COLUMNS:
+        frame[column] = _unshuffle(arrays[column])
+    return pd.DataFrame(frame)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _sqlite_bytes(df):
+    """On-disk size the rows take as a 'daily_metrics' table with its indexes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "size.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(f"""
+            CREATE TABLE {TABLE} (
+                asset_symbol TEXT NOT NULL, date DATE NOT NULL,
+                {', '.join(c + ' REAL' for c in VALUE_COLUMNS)},
+                PRIMARY KEY (asset_symbol, date)
+            )""")
+            conn.execute(f"CREATE INDEX idx_size_date ON {TABLE} (date, asset_symbol)")
+            conn.executemany(
+                f"INSERT INTO {TABLE} VALUES ({','.join('?' * (len(VALUE_COLUMNS) + 2))})",
+                df[["asset_symbol", "date"] + VALUE_COLUMNS].astype(object)
+                .where(df[["asset_symbol", "date"] + VALUE_COLUMNS].notna(), None)
+                .itertuples(index=False, name=None),
+            )
+            conn.commit()
+        conn.close()
+        return os.path.getsize(path)
+
+
+def _load_partition(path, sha256):
+    key = (path, sha256)
+    if key in _PARTITION_CACHE:
+        _PARTITION_CACHE.move_to_end(key)
+        return _PARTITION_CACHE[key]
+    with np.load(path) as npz:
+        df = _decode({name: npz[name] for name in npz.files})
+    _PARTITION_CACHE[key] = df
+    while len(_PARTITION_CACHE) > _PARTITION_CACHE_SIZE:
+        _PARTITION_CACHE.popitem(last=False)
+    return df
+
+
+# --- Archiving ---
+
+def partitions(start=None, end=None, db_path=None):
+    """Manifest rows of archived years overlapping [start, end]."""
+    query = ("SELECT year, path, row_count, min_date, max_date, sqlite_bytes, archive_bytes, sha256 "
+             "FROM archive_partitions WHERE table_name = ?")
+    params = [TABLE]
+    if start:
+        query += " AND max_date >= ?"
+        params.append(start)
+    if end:
+        query += " AND min_date <= ?"
+        params.append(end)
+    with sqlite3.connect(db_path or DB_PATH) as conn:
+        return pd.read_sql_query(query + " ORDER BY year", conn, params=params)
+
+
+def archive_year(year, db_path=None):
+    """
+    Moves one calendar year of 'daily_metrics' into a read-only partition
+    file. The file is read back and compared before the manifest row and the
+    delete are committed together. A year can be archived once; rows that
+    later arrive for it stay in the hot table and take precedence over the
+    partition when reading.
+    """
+    db_path = db_path or DB_PATH
+    start, end = f"{year}-01-01", f"{year}-12-31"
+    base = os.path.dirname(os.path.abspath(db_path))
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        # Hold the write lock from read to delete so no upsert slips in between.
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT 1 FROM archive_partitions WHERE table_name = ? AND year = ?",
+                        (TABLE, year)).fetchone():
+            print(f"{year} is already archived; leaving its hot rows in place.")
+            conn.execute("ROLLBACK")
+            return None
+        df = pd.read_sql_query(
+            f"SELECT asset_symbol, date, {', '.join(VALUE_COLUMNS)} FROM {TABLE} "
+            "WHERE date BETWEEN ? AND ? ORDER BY asset_symbol, date",
+            conn, params=[start, end],
+        )
+        if df.empty:
+            print(f"No {TABLE} rows for {year}.")
+            conn.execute("ROLLBACK")
+            return None
+
+        directory = archive_dir(db_path)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{TABLE}_{year}.npz")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **_encode(df))
+            f.flush()
+            os.fsync(f.fileno())
+        with np.load(tmp_path) as npz:
+            check = _decode({name: npz[name] for name in npz.files})
+        if not (check[["asset_symbol", "date"]].equals(df[["asset_symbol", "date"]])
+                and np.array_equal(check[VALUE_COLUMNS].to_numpy(), df[VALUE_COLUMNS].to_numpy(dtype=np.float64),
+                                   equal_nan=True)):
+            os.remove(tmp_path)
+            raise RuntimeError(f"Partition for {year} did not round-trip; nothing archived.")
+        os.replace(tmp_path, path)
+        os.chmod(path, 0o444)
+
+        record = (
+            TABLE, year, os.path.relpath(path, base), len(df), df["date"].min(), df["date"].max(),
+            _sqlite_bytes(df), os.path.getsize(path), _sha256(path),
+        )
+        conn.execute("""
+        INSERT INTO archive_partitions (table_name, year, path, row_count, min_date, max_date,
+                                        sqlite_bytes, archive_bytes, sha256)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, record)
+        conn.execute(f"DELETE FROM {TABLE} WHERE date BETWEEN ? AND ?", (start, end))
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    print(f"Archived {len(df)} rows of {year} into {record[2]} "
+          f"({record[6] / 1e6:.2f} MB in SQLite -> {record[7] / 1e6:.2f} MB).")
+    return record
+
+
+def archive_cold(hot_years=HOT_YEARS, vacuum=False, db_path=None):
+    """Archives every year older than the `hot_years` most recent calendar years."""
+    db_path = db_path or DB_PATH
+    cutoff = date.today().year - hot_years + 1
+    with sqlite3.connect(db_path) as conn:
+        years = [int(r[0]) for r in conn.execute(
+            f"SELECT DISTINCT substr(date, 1, 4) FROM {TABLE} WHERE date < ? ORDER BY 1", (f"{cutoff}-01-01",)
+        )]
+    archived = [year for year in years if archive_year(year, db_path)]
+    if archived and vacuum:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("VACUUM")
+    return archived
+
+
+def verify(db_path=None):
+    """Checks every partition file against its recorded checksum. Returns the bad years."""
+    db_path = db_path or DB_PATH
+    base = os.path.dirname(os.path.abspath(db_path))
+    bad = []
+    for row in partitions(db_path=db_path).itertuples(index=False):
+        path = os.path.join(base, row.path)
+        if not os.path.exists(path) or _sha256(path) != row.sha256:
+            bad.append(row.year)
+    return bad
+
+
+# --- Reading ---
+
+def read_daily_metrics(columns=VALUE_COLUMNS, symbols=None, start=None, end=None, db_path=None, order="symbol"):
+    """
+    Long-format 'daily_metrics' rows from the hot table and any archived
+    partitions overlapping [start, end]; partitions outside the range are not
+    opened. Hot rows win over archived rows for the same symbol and date.
+    Sorted by (asset_symbol, date), or (date, asset_symbol) with order="date".
+    """
+    db_path = db_path or DB_PATH
+    columns = list(columns)
+    query = f"SELECT asset_symbol, date, {', '.join(columns)} FROM {TABLE} WHERE 1=1"
+    params = []
+    if symbols:
+        query += f" AND asset_symbol IN ({','.join('?' * len(symbols))})"
+        params += list(symbols)
+    if start:
+        query += " AND date >= ?"
+        params.append(start)
+    if end:
+        query += " AND date <= ?"
+        params.append(end)
+    keys = ["date", "asset_symbol"] if order == "date" else ["asset_symbol", "date"]
+    with sqlite3.connect(db_path) as conn:
+        hot = pd.read_sql_query(query + f" ORDER BY {', '.join(keys)}", conn, params=params)
+    try:
+        cold_parts = partitions(start, end, db_path=db_path)
+    except pd.errors.DatabaseError:
+        # Database not migrated to the archive schema yet.
+        cold_parts = pd.DataFrame()
+    if cold_parts.empty:
+        return hot
+
+    base = os.path.dirname(os.path.abspath(db_path))
+    frames = []
+    for part in cold_parts.itertuples(index=False):
+        df = _load_partition(os.path.join(base, part.path), part.sha256)
+        mask = np.ones(len(df), dtype=bool)
+        if symbols:
+            mask &= df["asset_symbol"].isin(symbols).to_numpy()
+        if start:
+            mask &= (df["date"] >= start).to_numpy()
+        if end:
+            mask &= (df["date"] <= end).to_numpy()
+        frames.append(df.loc[mask, ["asset_symbol", "date"] + columns])
+    frames.append(hot)
+    merged = pd.concat([f for f in frames if not f.empty] or [hot], ignore_index=True)
+    merged = merged.drop_duplicates(["asset_symbol", "date"], keep="last")
+    return merged.sort_values(keys, kind="stable").reset_index(drop=True)
+
+
+def cold_until(db_path=None):
+    """Last archived date, or None when nothing is archived."""
+    try:
+        with sqlite3.connect(db_path or DB_PATH) as conn:
+            row = conn.execute("SELECT MAX(max_date) FROM archive_partitions WHERE table_name = ?",
+                               (TABLE,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0]
+
+
+# --- Report ---
+
+def _time_read(start, end, db_path, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = len(read_daily_metrics(["close"], start=start, end=end, db_path=db_path))
+        timings.append(time.perf_counter() - t0)
+    return rows, float(np.median(timings)), timings[0]
+
+
+def report(db_path=None, window_days=90, repeat=5):
+    """Prints disk savings per archived year and read latency for a hot and a cold range."""
+    db_path = db_path or DB_PATH
+    parts = partitions(db_path=db_path)
+    if parts.empty:
+        print("Nothing archived yet.")
+        return
+    print(parts[["year", "row_count", "min_date", "max_date", "sqlite_bytes", "archive_bytes"]].to_string(index=False))
+    sqlite_total, archive_total = parts["sqlite_bytes"].sum(), parts["archive_bytes"].sum()
+    print(f"Cold storage: {sqlite_total / 1e6:.2f} MB as SQLite rows -> {archive_total / 1e6:.2f} MB archived "
+          f"({sqlite_total / max(archive_total, 1):.1f}x smaller). Main database: "
+          f"{os.path.getsize(db_path) / 1e6:.2f} MB.")
+
+    with sqlite3.connect(db_path) as conn:
+        hot_end = conn.execute(f"SELECT MAX(date) FROM {TABLE}").fetchone()[0]
+    span = pd.Timedelta(days=window_days)
+    cold_end = parts["max_date"].iloc[-1]
+    ranges = {"cold": ((pd.Timestamp(cold_end) - span).strftime("%Y-%m-%d"), cold_end)}
+    if hot_end:
+        ranges["hot"] = ((pd.Timestamp(hot_end) - span).strftime("%Y-%m-%d"), hot_end)
+    _PARTITION_CACHE.clear()
+    for label, (start, end) in ranges.items():
+        rows, median, first = _time_read(start, end, db_path, repeat)
+        print(f"{label:>4} {start}..{end}: {rows} rows, first read {first * 1000:.1f} ms, "
+              f"median {median * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive cold years of daily_metrics into read-only partitions.")
+    parser.add_argument("--year", type=int, nargs="+", help="Archive these years.")
+    parser.add_argument("--cold", action="store_true", help=f"Archive everything older than the last {HOT_YEARS} years.")
+    parser.add_argument("--hot-years", type=int, default=HOT_YEARS)
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the main database afterwards.")
+    parser.add_argument("--verify", action="store_true", help="Check partition checksums.")
+    args = parser.parse_args()
+
+    if args.year:
+        for year in args.year:
+            archive_year(year)
+        if args.vacuum:
+            with sqlite3.connect(DB_PATH) as conn:
+                conn.execute("VACUUM")
+    elif args.cold:
+        archive_cold(args.hot_years, args.vacuum)
+    if args.verify:
+        bad = verify()
+        print(f"Corrupt or missing partitions: {bad}" if bad else "All partitions match their checksums.")
+    report()
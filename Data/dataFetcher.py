@@ -1,5 +1,13 @@
 import argparse
+import pandas as pd
 import DBManager
+import DBMigrations
+import jobQueue
+import multiprocessing
+import adjustments
+import featureStore
+import marketBreadth
+import regimes
 import shutil
 from fetchers import updateSP500
 from fetchers import updateListingTrack
@@ -8,22 +16,31 @@ from fetchers import updateEarningDates
 from fetchers import updateAnalystRatings
 from fetchers import updateInsiderTrades
 from fetchers import updateDailyMetrics
+from fetchers import updateCorporateActions
+from fetchers import updateSeries
+from fetchers import httpTransport
 
 FETCHER_MAPPING = {
     "sp500": {
         "module": updateSP500,
         "asset_class": "equity",
-        "grouping_column": None
+        "grouping_column": None,
+        "membership": "snapshot"
     },
     "listings": {
         "module": updateListingTrack,
         "asset_class": "equity",
-        "grouping_column": "listing_method"
+        "grouping_column": "listing_method",
+        "streaming": True,
+        # Resumed runs only stream the missing pages, so a run is never
+        # known to be the complete list: members are added, never removed.
+        "membership": "additive"
     },
     "anomalies": {
         "module": updateMovers,
         "asset_class": "equity",
-        "grouping_column": "category"
+        "grouping_column": "category",
+        "membership": "snapshot"
     },
     "earnings": {
          "module": updateEarningDates,
@@ -49,35 +66,33 @@ FETCHER_MAPPING = {
         "grouping_column": None,
         "fetch_args": {"scope": "sp500"}
     },
+    "corporate_actions": {
+        "module": updateCorporateActions,
+        "asset_class": "supplemental",
+        "grouping_column": None,
+        "fetch_args": {"scope": "sp500"}
+    },
+    "series": {
+        "module": updateSeries,
+        "asset_class": "macro",
+        "grouping_column": None
+    },
 }
 
 def print_separator(char="="):
     width = shutil.get_terminal_size((80, 20)).columns
     print(char * width)
 
-def run_fetch_and_store(fetcher_name):
-    if fetcher_name not in FETCHER_MAPPING:
-        print(f"Error: Fetcher '{fetcher_name}' is not recognized. Skipping.")
-        return
-
+def store_data(fetcher_name, data_df, refresh_market=True):
+    """
+    Saves one fetcher's output and refreshes what is derived from it.
+    `refresh_market=False` skips the universe-wide market breadth and regime
+    refreshes, for callers that store a universe in batches and run
+    `refresh_market_aggregates` once at the end.
+    """
     config = FETCHER_MAPPING[fetcher_name]
-    module = config["module"]
     asset_class = config["asset_class"]
     grouping_col = config.get("grouping_column")
-    fetch_args = config.get("fetch_args", {})
-
-    print(f"\nProcessing fetcher: {fetcher_name}")
-    print_separator()
-
-    if fetch_args:
-        print(f"  - Using fetch args: {fetch_args}")
-        data_df = module.fetch(**fetch_args)
-    else:
-        data_df = module.fetch()
-
-    if data_df.empty:
-        print(f"No data returned from fetcher: {fetcher_name}. Skipping DB insert.")
-        return
 
     if fetcher_name == 'analysis':
         print("  - Saving analyst scores data...")
@@ -90,6 +105,37 @@ def run_fetch_and_store(fetcher_name):
     elif fetcher_name == 'daily_metrics':
         print("  - Saving daily historical metrics...")
         DBManager.upsert_daily_metrics(data_df)
+        if 'quality_report' in data_df.attrs:
+            DBManager.insert_data_quality_run(data_df.attrs['quality_report'])
+        symbols = list(data_df['asset_symbol'].unique())
+        adjustments.refresh_factors(symbols)
+        print("  - Refreshing indicator features...")
+        featureStore.refresh(symbols=symbols)
+        if refresh_market:
+            print("  - Refreshing market breadth for touched dates...")
+            marketBreadth.refresh(dates=data_df['date'].unique())
+            print("  - Updating market regime probabilities...")
+            regimes.update()
+
+    elif fetcher_name == 'corporate_actions':
+        print("  - Saving corporate actions...")
+        DBManager.upsert_corporate_actions(data_df)
+        changed = adjustments.refresh_factors(list(data_df['symbol'].unique()))
+        if changed:
+            print(f"  - Recomputing features for {len(changed)} adjusted symbols...")
+            featureStore.refresh(symbols=changed)
+        if changed and refresh_market:
+            # Adjusted closes change A/D on the ex-date and the 52-week window for a year after.
+            ex_dates = data_df.loc[data_df['symbol'].isin(changed), 'ex_date'].unique()
+            affected = set()
+            for ex_date in ex_dates:
+                window = pd.bdate_range(ex_date, pd.Timestamp(ex_date) + pd.Timedelta(days=365))
+                affected.update(window.strftime('%Y-%m-%d'))
+            marketBreadth.refresh(dates=affected)
+
+    elif fetcher_name == 'series':
+        print("  - Saving macro / alternative-data series...")
+        DBManager.upsert_series(data_df, updateSeries.catalog(data_df['series_id'].unique()))
 
     elif fetcher_name == 'earnings':
         print(" - saving earnings dates data...")
@@ -105,12 +151,149 @@ def run_fetch_and_store(fetcher_name):
     else:
         DBManager.upsert_assets(data_df, asset_class=asset_class, source=fetcher_name)
 
+
+def _universe_members(fetcher_name, data_df):
+    """Universe name -> symbols in one batch, matching the 'source' upsert_assets uses."""
+    grouping_col = FETCHER_MAPPING[fetcher_name].get("grouping_column")
+    if not grouping_col:
+        return {fetcher_name: set(data_df['symbol'])}
+    return {
+        str(group).lower(): set(group_df['symbol'])
+        for group, group_df in data_df.groupby(grouping_col, observed=True)
+        if not group_df.empty
+    }
+
+
+def sync_membership(fetcher_name, members):
+    mode = FETCHER_MAPPING[fetcher_name].get("membership")
+    if not mode:
+        return
+    print("  - Updating universe membership...")
+    for universe, symbols in members.items():
+        # An empty snapshot would close every interval of the universe.
+        if not symbols:
+            print(f"  - No rows for universe '{universe}'; membership left unchanged.")
+            continue
+        DBManager.sync_universe_membership(universe, symbols, close_missing=(mode == "snapshot"))
+
+
+def run_fetch_and_store(fetcher_name):
+    if fetcher_name not in FETCHER_MAPPING:
+        print(f"Error: Fetcher '{fetcher_name}' is not recognized. Skipping.")
+        return
+
+    config = FETCHER_MAPPING[fetcher_name]
+    module = config["module"]
+    fetch_args = config.get("fetch_args", {})
+
+    print(f"\nProcessing fetcher: {fetcher_name}")
+    print_separator()
+
+    if fetch_args:
+        print(f"  - Using fetch args: {fetch_args}")
+
+    members = {}
+    if config.get("streaming"):
+        stored = 0
+        for batch_df in module.iter_batches(**fetch_args):
+            if batch_df.empty:
+                continue
+            store_data(fetcher_name, batch_df)
+            stored += len(batch_df)
+            if config.get("membership"):
+                for universe, symbols in _universe_members(fetcher_name, batch_df).items():
+                    members.setdefault(universe, set()).update(symbols)
+        if not stored:
+            print(f"No data returned from fetcher: {fetcher_name}. Skipping DB insert.")
+            return
+    else:
+        data_df = module.fetch(**fetch_args)
+
+        if data_df.empty:
+            print(f"No data returned from fetcher: {fetcher_name}. Skipping DB insert.")
+            return
+
+        store_data(fetcher_name, data_df)
+        if config.get("membership"):
+            members = _universe_members(fetcher_name, data_df)
+
+    sync_membership(fetcher_name, members)
+
     print_separator()
     print(f"Completed processing for: {fetcher_name}")
     print("")
     print("")
 
 
+def run_job(fetcher_name, symbols):
+    """
+    Job handler for queue workers: fetch and store one batch of symbols.
+    Whatever was fetched is stored; if any symbol failed the job raises, so
+    the worker releases it for retry instead of marking it done.
+    """
+    config = FETCHER_MAPPING[fetcher_name]
+    data_df = config["module"].fetch(scope=list(symbols))
+    if not data_df.empty:
+        # One batch is only part of the universe; breadth and regimes are
+        # refreshed once the queue has drained (see run_workers).
+        store_data(fetcher_name, data_df, refresh_market=False)
+    failed = data_df.attrs.get('failed_symbols') or []
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(symbols)} symbols failed: {', '.join(sorted(failed)[:10])}")
+
+
+def enqueue_fetchers(fetcher_names, batch_size):
+    symbols = DBManager.get_active_symbols(source='sp500')
+    for fetcher_name in fetcher_names:
+        if "scope" not in FETCHER_MAPPING[fetcher_name].get("fetch_args", {}):
+            print(f"Fetcher '{fetcher_name}' is not symbol-scoped and cannot be queued. Skipping.")
+            continue
+        jobQueue.enqueue(fetcher_name, symbols, batch_size=batch_size)
+
+
+def refresh_market_aggregates(fetcher_names):
+    """
+    Universe-wide refreshes after batched 'daily_metrics' or
+    'corporate_actions' stores: market breadth, then regime probabilities.
+    """
+    fetcher_names = set(fetcher_names)
+    if 'corporate_actions' in fetcher_names:
+        # Adjustments can reach back years; rebuild every stored date.
+        print("  - Rebuilding market breadth...")
+        marketBreadth.refresh()
+    elif 'daily_metrics' in fetcher_names:
+        # Queued batches download the same one-year window (see updateDailyMetrics).
+        print("  - Refreshing market breadth for the download window...")
+        today = pd.Timestamp.utcnow().tz_localize(None).normalize()
+        marketBreadth.refresh(dates=pd.bdate_range(today - pd.Timedelta(days=366), today).strftime('%Y-%m-%d'))
+    if 'daily_metrics' in fetcher_names:
+        print("  - Updating market regime probabilities...")
+        regimes.update()
+
+
+def run_workers(n_workers, lease_seconds, fetchers=None):
+    started = jobQueue.now()
+    if n_workers <= 1:
+        jobQueue.run_worker(run_job, lease_seconds=lease_seconds, fetchers=fetchers)
+    else:
+        _run_worker_processes(n_workers, lease_seconds, fetchers)
+    refresh_market_aggregates(jobQueue.finished_fetchers(started))
+
+
+def _run_worker_processes(n_workers, lease_seconds, fetchers):
+    processes = [
+        multiprocessing.Process(
+            target=jobQueue.run_worker, args=(run_job,),
+            kwargs={"lease_seconds": lease_seconds, "fetchers": fetchers},
+        )
+        for _ in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
 def show_menu():
     print("\nTT2 Data Fetcher Menu")
     print("===================================")
@@ -122,6 +305,8 @@ def show_menu():
     print("6) Fetch Daily Metrics")
     print("7) Fetch S&P500 Constituents")
     print("8) Fetch Earning Dates")
+    print("9) Fetch Corporate Actions")
+    print("10) Fetch Macro / Alt-Data Series")
     print("0) Exit")
     print("===================================")
 
@@ -135,7 +320,9 @@ def show_menu():
         "5": "insiders",
         "6": "daily_metrics",
         "7": "sp500",
-        "8": "earnings"
+        "8": "earnings",
+        "9": "corporate_actions",
+        "10": "series"
     }
 
     if choice == "0":
@@ -162,8 +349,35 @@ def main():
         help="Run all available fetchers."
     )
 
+    parser.add_argument(
+        "--enqueue",
+        nargs="+",
+        choices=list(FETCHER_MAPPING.keys()),
+        help="Queue symbol batches for these fetchers in the 'jobs' table instead of running them."
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Run as a queue worker, claiming queued jobs until none are left."
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes to start with --worker.")
+    parser.add_argument("--batch-size", type=int, default=jobQueue.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--lease", type=int, default=jobQueue.DEFAULT_LEASE_SECONDS, help="Lease length in seconds.")
+    parser.add_argument("--queue-status", action="store_true", help="Print job counts by fetcher and status.")
+
     args = parser.parse_args()
 
+    if args.enqueue or args.worker or args.queue_status:
+        DBMigrations.migrate()
+        if args.enqueue:
+            enqueue_fetchers(args.enqueue, args.batch_size)
+        if args.worker:
+            run_workers(args.workers, args.lease, fetchers=args.fetch)
+        if args.queue_status:
+            for fetcher_name, job_status, count in jobQueue.status():
+                print(f"{fetcher_name:<20} {job_status:<8} {count}")
+        return
+
     if not args.fetch and not args.all:
         fetchers_to_run = show_menu()
         if not fetchers_to_run:
@@ -173,10 +387,15 @@ def main():
     else:
         fetchers_to_run = args.fetch
 
+    DBMigrations.migrate()
+
     print("\nStarting data fetch sequence...\n")
     for fetcher_name in fetchers_to_run:
         run_fetch_and_store(fetcher_name)
 
+    transport_report = httpTransport.report()
+    if transport_report:
+        print(transport_report)
     print("\nAll data fetching tasks are complete.")
 
 
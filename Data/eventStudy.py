@@ -0,0 +1,175 @@
+import argparse
+import sqlite3
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import panels
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+
+def load_price_panel(symbols=None, start=None, end=None):
+    """
+    Reads closes from 'daily_metrics' into a dense panel.
+    Returns (dates, symbols, close) where close is a float64 dates x symbols
+    array with NaN where a symbol has no bar.
+    """
+    dates, syms, arrays = panels.load_panel(["close"], symbols, start, end, db_path=DB_PATH)
+    return dates, syms, arrays["close"]
+
+
+def load_events():
+    """Reads earnings events: asset_symbol, earnings_date, report_time, eps_surprise_pct."""
+    with sqlite3.connect(DB_PATH) as conn:
+        return pd.read_sql_query(
+            "SELECT asset_symbol, earnings_date, report_time, eps_surprise_pct FROM earnings_dates",
+            conn,
+        )
+
+
+def abnormal_returns(close, benchmark=None):
+    """
+    Simple returns minus a benchmark return. `benchmark` is a column index into
+    `close`; by default the equal-weighted cross-sectional mean is used.
+    """
+    returns = np.full_like(close, np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1.0
+    if benchmark is None:
+        finite = np.isfinite(returns)
+        counts = finite.sum(axis=1)
+        market = np.where(finite, returns, 0.0).sum(axis=1) / np.maximum(counts, 1)
+        market[counts == 0] = np.nan
+    else:
+        market = returns[:, benchmark]
+    return returns - market[:, None]
+
+
+def align_events(dates, symbols, event_symbols, event_dates, after_close=None):
+    """
+    As-of join of events onto the trading calendar: each event maps to the
+    first trading day on or after its date, or, for events flagged in
+    `after_close` that fall on a trading day, to the next one, since the
+    market first reacts then. Returns (day_index, symbol_index, valid)
+    arrays; events for unknown symbols or past the last date are invalid.
+    """
+    event_symbols = np.asarray(event_symbols, dtype=str)
+    event_dates = np.asarray(event_dates, dtype=str)
+    day = np.searchsorted(dates, event_dates, side="left")
+    if after_close is not None:
+        on_session = (day < len(dates)) & (dates[np.minimum(day, len(dates) - 1)] == event_dates)
+        day = day + (np.asarray(after_close, dtype=bool) & on_session)
+    sym = np.searchsorted(symbols, event_symbols)
+    sym_clipped = np.minimum(sym, len(symbols) - 1)
+    valid = (day < len(dates)) & (sym < len(symbols)) & (symbols[sym_clipped] == event_symbols)
+    return day, sym_clipped, valid
+
+
+def surprise_buckets(surprise, n_buckets=5):
+    """Quantile bucket per event, 0 = most negative surprise; -1 where surprise is missing."""
+    buckets = np.full(len(surprise), -1, dtype=np.int64)
+    finite = np.isfinite(surprise)
+    if finite.sum() < n_buckets:
+        return buckets
+    edges = np.quantile(surprise[finite], np.linspace(0, 1, n_buckets + 1)[1:-1])
+    buckets[finite] = np.searchsorted(edges, surprise[finite], side="right")
+    return buckets
+
+
+def _nanmean_rows(values):
+    """Column means ignoring NaN; NaN for columns with no finite values."""
+    finite = np.isfinite(values)
+    counts = finite.sum(axis=0)
+    means = np.where(finite, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+    means[counts == 0] = np.nan
+    return means
+
+
+def event_study(dates, symbols, close, events, pre=5, post=20, n_buckets=5, benchmark=None, drift_start=2):
+    """
+    Computes abnormal and cumulative abnormal returns around every event at once.
+
+    `events` needs asset_symbol, earnings_date and eps_surprise_pct, and may
+    have report_time: after-close ('amc') reports get day 0 on the next
+    session. Windows run from -pre to +post trading days around day 0.
+    Cumulative returns start at the first day of the window and are NaN once
+    any return in the window is missing. Drift starts at day `drift_start`,
+    after the [0, +1] announcement window, so the announcement jump stays
+    out of it even when the report time is unknown. Returns a dict of
+    DataFrames:
+        events          one row per aligned event with its bucket and final CAR
+        mean_ar         mean abnormal return per offset
+        mean_car        mean CAR per offset
+        drift_by_bucket mean CAR from day `drift_start` per offset, one row per surprise bucket
+    """
+    abnormal = abnormal_returns(close, benchmark)
+    after_close = events["report_time"].to_numpy() == "amc" if "report_time" in events.columns else None
+    day, sym, valid = align_events(
+        dates, symbols, events["asset_symbol"].to_numpy(), events["earnings_date"].to_numpy(), after_close
+    )
+    day, sym = day[valid], sym[valid]
+    surprise = events["eps_surprise_pct"].to_numpy(dtype=np.float64)[valid]
+
+    offsets = np.arange(-pre, post + 1)
+    rows = day[:, None] + offsets[None, :]
+    in_range = (rows >= 0) & (rows < len(dates))
+    ar = abnormal[np.clip(rows, 0, len(dates) - 1), sym[:, None]]
+    ar[~in_range] = np.nan
+
+    car = np.cumsum(ar, axis=1)
+
+    # Post-earnings drift accumulates once the announcement window is over.
+    post_ar = ar[:, pre + drift_start:]
+    drift = np.cumsum(post_ar, axis=1)
+
+    buckets = surprise_buckets(surprise, n_buckets)
+    drift_rows = [_nanmean_rows(drift[buckets == b]) for b in range(n_buckets)]
+    mean_ar = _nanmean_rows(ar)
+    mean_car = _nanmean_rows(car)
+
+    events_out = pd.DataFrame({
+        "asset_symbol": symbols[sym],
+        "event_date": dates[day],
+        "eps_surprise_pct": surprise,
+        "surprise_bucket": buckets,
+        "car": car[:, -1],
+        "drift": drift[:, -1] if post >= drift_start else np.nan,
+    })
+    return {
+        "events": events_out,
+        "mean_ar": pd.Series(mean_ar, index=offsets, name="mean_ar"),
+        "mean_car": pd.Series(mean_car, index=offsets, name="mean_car"),
+        "drift_by_bucket": pd.DataFrame(
+            drift_rows, index=pd.Index(range(n_buckets), name="surprise_bucket"),
+            columns=offsets[pre + drift_start:]
+        ),
+    }
+
+
+def run(pre=5, post=20, n_buckets=5):
+    """Loads prices and earnings from the database and runs the event study."""
+    dates, symbols, close = load_price_panel()
+    events = load_events()
+    if len(dates) == 0 or events.empty:
+        print("Need both 'daily_metrics' and 'earnings_dates' data for an event study.")
+        return None
+    return event_study(dates, symbols, close, events, pre, post, n_buckets)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Earnings event study over the stored universe.")
+    parser.add_argument("--pre", type=int, default=5)
+    parser.add_argument("--post", type=int, default=20)
+    parser.add_argument("--buckets", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = run(args.pre, args.post, args.buckets)
+    if result is not None:
+        print(f"Processed {len(result['events'])} events in {time.perf_counter() - start:.3f}s")
+        print("\n--- Mean CAR by offset ---")
+        print(result["mean_car"].round(4).to_string())
+        print("\n--- Post-earnings drift by surprise bucket (final day) ---")
+        print(result["drift_by_bucket"].iloc[:, -1].round(4).to_string())
@@ -0,0 +1,436 @@
+import abc
+import argparse
+import math
+import os
+import sqlite3
+import time
+import uuid
+
+import numpy as np
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+ORDER_SIDES = ("buy", "sell")
+ORDER_TYPES = ("market", "limit")
+TIMES_IN_FORCE = ("day", "gtc", "ioc")
+OPEN_STATUSES = ("new", "partially_filled")
+# Positions smaller than this (in shares) are float residue and count as flat.
+FLAT_EPSILON = 1e-9
+
+ORDER_COLUMNS = [
+    "order_id", "account", "client_order_id", "symbol", "side", "qty", "order_type",
+    "limit_price", "time_in_force", "status", "filled_qty", "avg_fill_price",
+    "signal_at", "submitted_at", "signal_to_order_ms", "updated_at", "submit_bar_time"
+]
+
+
+class Order:
+    """An order and its fill state. Field names follow Alpaca's orders API."""
+
+    __slots__ = tuple(ORDER_COLUMNS) + ("seq",)
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+        self.filled_qty = self.filled_qty or 0.0
+        self.seq = self.seq or 0
+
+    @property
+    def remaining(self):
+        return self.qty - self.filled_qty
+
+    def as_row(self):
+        return tuple(getattr(self, c) for c in ORDER_COLUMNS)
+
+
+def _apply_fill(position_qty, avg_cost, realized, signed_qty, price):
+    """Position after a signed fill: average cost on increases, realised P&L on reductions."""
+    if abs(position_qty) < FLAT_EPSILON or (position_qty > 0) == (signed_qty > 0):
+        new_qty = position_qty + signed_qty
+        avg_cost = (position_qty * (avg_cost or 0.0) + signed_qty * price) / new_qty
+        return new_qty, avg_cost, realized
+
+    closed = min(abs(signed_qty), abs(position_qty))
+    direction = 1.0 if position_qty > 0 else -1.0
+    realized += closed * (price - avg_cost) * direction
+    new_qty = position_qty + signed_qty
+    if abs(new_qty) < FLAT_EPSILON:
+        return 0.0, None, realized
+    if (new_qty > 0) != (position_qty > 0):
+        # Flipped through zero: the remainder opens a new position at this price.
+        return new_qty, price, realized
+    return new_qty, avg_cost, realized
+
+
+class Ledger:
+    """
+    Persistent orders, fills, positions and cash for one paper account.
+    A fill updates all four in a single transaction.
+    """
+
+    def __init__(self, account="paper", starting_cash=100_000.0, db_path=None):
+        self.account = account
+        self.conn = sqlite3.connect(db_path or DB_PATH, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.execute(
+            "INSERT OR IGNORE INTO paper_accounts (account, cash, starting_cash) VALUES (?, ?, ?);",
+            (account, starting_cash, starting_cash),
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def save_order(self, order):
+        self.conn.execute(f"""
+        INSERT INTO paper_orders ({', '.join(ORDER_COLUMNS)})
+        VALUES ({', '.join('?' * len(ORDER_COLUMNS))})
+        ON CONFLICT(order_id) DO UPDATE SET
+            status=excluded.status,
+            filled_qty=excluded.filled_qty,
+            avg_fill_price=excluded.avg_fill_price,
+            updated_at=excluded.updated_at;
+        """, order.as_row())
+
+    def record_fill(self, order, qty, price, bar_time, filled_at):
+        signed = qty if order.side == "buy" else -qty
+        order_to_fill_ms = (filled_at - order.submitted_at) * 1000.0
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            conn.execute("""
+            INSERT INTO paper_fills (order_id, account, symbol, side, qty, price, bar_time, filled_at, order_to_fill_ms)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+            """, (order.order_id, self.account, order.symbol, order.side, qty, price, bar_time,
+                  filled_at, order_to_fill_ms))
+            self.save_order(order)
+            row = conn.execute(
+                "SELECT qty, avg_cost, realized_pnl FROM paper_positions WHERE account = ? AND symbol = ?;",
+                (self.account, order.symbol),
+            ).fetchone() or (0.0, None, 0.0)
+            new_qty, avg_cost, realized = _apply_fill(row[0], row[1], row[2], signed, price)
+            conn.execute("""
+            INSERT INTO paper_positions (account, symbol, qty, avg_cost, realized_pnl)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(account, symbol) DO UPDATE SET
+                qty=excluded.qty,
+                avg_cost=excluded.avg_cost,
+                realized_pnl=excluded.realized_pnl,
+                updated_at=datetime('now');
+            """, (self.account, order.symbol, new_qty, avg_cost, realized))
+            conn.execute(
+                "UPDATE paper_accounts SET cash = cash - ?, updated_at = datetime('now') WHERE account = ?;",
+                (signed * price, self.account),
+            )
+            conn.execute("COMMIT;")
+        except Exception:
+            conn.execute("ROLLBACK;")
+            raise
+        return order_to_fill_ms
+
+    def open_orders(self):
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(ORDER_COLUMNS)} FROM paper_orders "
+            f"WHERE account = ? AND status IN ({','.join('?' * len(OPEN_STATUSES))}) ORDER BY submitted_at",
+            (self.account,) + OPEN_STATUSES,
+        )
+        return [Order(**dict(zip(ORDER_COLUMNS, row))) for row in cursor]
+
+    def get_order(self, order_id):
+        row = self.conn.execute(
+            f"SELECT {', '.join(ORDER_COLUMNS)} FROM paper_orders WHERE order_id = ?", (order_id,)
+        ).fetchone()
+        return Order(**dict(zip(ORDER_COLUMNS, row))) if row else None
+
+    def positions(self):
+        rows = self.conn.execute(
+            "SELECT symbol, qty, avg_cost, realized_pnl FROM paper_positions WHERE account = ? ORDER BY symbol",
+            (self.account,),
+        ).fetchall()
+        return {r[0]: {"qty": r[1], "avg_cost": r[2], "realized_pnl": r[3]} for r in rows}
+
+    def cash(self):
+        return self.conn.execute(
+            "SELECT cash FROM paper_accounts WHERE account = ?", (self.account,)
+        ).fetchone()[0]
+
+    def latency_report(self, percentiles=(50, 95, 99)):
+        """Signal-to-order and order-to-fill (first fill per order) latency percentiles in ms."""
+        signal = [r[0] for r in self.conn.execute(
+            "SELECT signal_to_order_ms FROM paper_orders WHERE account = ? AND signal_to_order_ms IS NOT NULL",
+            (self.account,),
+        )]
+        fill = [r[0] for r in self.conn.execute(
+            "SELECT MIN(order_to_fill_ms) FROM paper_fills WHERE account = ? GROUP BY order_id",
+            (self.account,),
+        )]
+        report = {}
+        for name, samples in (("signal_to_order_ms", signal), ("order_to_fill_ms", fill)):
+            values = np.asarray(samples, dtype=np.float64)
+            report[name] = {
+                "count": len(values),
+                **{f"p{p}": float(np.percentile(values, p)) if len(values) else None for p in percentiles},
+                "max": float(values.max()) if len(values) else None,
+            }
+        return report
+
+
+class Broker(abc.ABC):
+    """
+    Execution interface used by strategies. A live adapter (e.g. Alpaca's
+    REST API) implements the same methods; `SimulatedBroker` is the local
+    stand-in.
+    """
+
+    @abc.abstractmethod
+    def submit_order(self, symbol, qty, side, order_type="market", limit_price=None,
+                     time_in_force="gtc", client_order_id=None, signal_at=None):
+        """Places an order and returns it."""
+
+    @abc.abstractmethod
+    def cancel_order(self, order_id):
+        """Cancels an open order; returns False if it is no longer open."""
+
+    @abc.abstractmethod
+    def get_order(self, order_id):
+        """The order with this id, or None."""
+
+    @abc.abstractmethod
+    def list_orders(self):
+        """All open orders."""
+
+    @abc.abstractmethod
+    def get_positions(self):
+        """{symbol: position} for the account."""
+
+    @abc.abstractmethod
+    def get_cash(self):
+        """Cash balance of the account."""
+
+
+class SimulatedBroker(Broker):
+    """
+    Matches orders against bars as they are replayed.
+
+    Orders submitted after a bar are eligible from the next bar time, on
+    any symbol: an order placed while bars for time T are being replayed
+    never fills on another symbol's bar at T. Market
+    orders fill at that bar's open plus slippage; limit buys fill when the
+    low reaches the limit, at the better of open and limit (sells mirror
+    this). Each side may take at most `participation` of a bar's volume,
+    allocated by price then time priority in whole shares, so large orders
+    fill partially over several bars. IOC remainders are cancelled after their first bar;
+    day orders at `end_of_day`. Open orders are reloaded from the ledger,
+    so the book survives restarts.
+    """
+
+    def __init__(self, ledger, participation=0.1, slippage_bps=1.0, clock=time.time):
+        self.ledger = ledger
+        self.participation = participation
+        self.slippage_bps = slippage_bps
+        self.clock = clock
+        self._seq = 0
+        self._book = {}
+        self.bar_time = None
+        for order in ledger.open_orders():
+            self._rest(order)
+
+    def _rest(self, order):
+        self._seq += 1
+        order.seq = self._seq
+        self._book.setdefault(order.symbol, {}).setdefault(order.order_id, order)
+
+    def submit_order(self, symbol, qty, side, order_type="market", limit_price=None,
+                     time_in_force="gtc", client_order_id=None, signal_at=None):
+        if side not in ORDER_SIDES:
+            raise ValueError(f"Unknown side '{side}'")
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"Unknown order type '{order_type}'")
+        if time_in_force not in TIMES_IN_FORCE:
+            raise ValueError(f"Unknown time in force '{time_in_force}'")
+        if not qty or qty <= 0:
+            raise ValueError("Order quantity must be positive")
+        if qty != int(qty):
+            raise ValueError("Order quantity must be a whole number of shares")
+        if order_type == "limit" and (limit_price is None or limit_price <= 0):
+            raise ValueError("Limit orders need a positive limit_price")
+
+        now = self.clock()
+        order = Order(
+            order_id=uuid.uuid4().hex,
+            account=self.ledger.account,
+            client_order_id=client_order_id,
+            symbol=symbol,
+            side=side,
+            qty=float(qty),
+            order_type=order_type,
+            limit_price=limit_price,
+            time_in_force=time_in_force,
+            status="new",
+            signal_at=signal_at,
+            submitted_at=now,
+            signal_to_order_ms=(now - signal_at) * 1000.0 if signal_at is not None else None,
+            updated_at=now,
+            submit_bar_time=str(self.bar_time) if self.bar_time is not None else None,
+        )
+        self.ledger.save_order(order)
+        self._rest(order)
+        return order
+
+    def cancel_order(self, order_id):
+        for orders in self._book.values():
+            order = orders.pop(order_id, None)
+            if order is not None:
+                order.status = "canceled"
+                order.updated_at = self.clock()
+                self.ledger.save_order(order)
+                return True
+        return False
+
+    def get_order(self, order_id):
+        for orders in self._book.values():
+            if order_id in orders:
+                return orders[order_id]
+        return self.ledger.get_order(order_id)
+
+    def list_orders(self):
+        return [o for orders in self._book.values() for o in orders.values()]
+
+    def get_positions(self):
+        return self.ledger.positions()
+
+    def get_cash(self):
+        return self.ledger.cash()
+
+    def _fill_price(self, order, open_, high, low):
+        slip = self.slippage_bps / 1e4
+        if order.order_type == "market":
+            return open_ * (1 + slip) if order.side == "buy" else open_ * (1 - slip)
+        if order.side == "buy":
+            return min(open_, order.limit_price) if low <= order.limit_price else None
+        return max(open_, order.limit_price) if high >= order.limit_price else None
+
+    def on_bar(self, symbol, bar_time, open_, high, low, close, volume):
+        """Matches resting orders for `symbol` against one bar. Returns the fills."""
+        self.bar_time = bar_time
+        orders = self._book.get(symbol)
+        if not orders:
+            return []
+
+        # Only bars strictly after the one an order was submitted on may fill it.
+        stamp = str(bar_time)
+        eligible = [o for o in orders.values() if o.submit_bar_time is None or stamp > o.submit_bar_time]
+        # Unknown volume does not limit fills; a zero-volume bar fills nothing.
+        unknown_volume = volume is None or (isinstance(volume, float) and math.isnan(volume))
+        fills = []
+        done = []
+        for side in ORDER_SIDES:
+            liquidity = math.inf if unknown_volume else self.participation * volume
+            sign = -1.0 if side == "buy" else 1.0
+            queue = sorted(
+                (o for o in eligible if o.side == side),
+                key=lambda o: (o.order_type != "market", sign * (o.limit_price or 0.0), o.seq),
+            )
+            for order in queue:
+                price = self._fill_price(order, open_, high, low)
+                # Fills are whole shares; a bar's share of volume is rounded down.
+                qty = float(math.floor(min(order.remaining, liquidity) + FLAT_EPSILON)) if price is not None else 0.0
+                if qty > 0:
+                    liquidity -= qty
+                    total = order.filled_qty + qty
+                    order.avg_fill_price = ((order.avg_fill_price or 0.0) * order.filled_qty + price * qty) / total
+                    order.filled_qty = total
+                    order.status = "filled" if order.remaining < FLAT_EPSILON else "partially_filled"
+                    order.updated_at = self.clock()
+                    latency = self.ledger.record_fill(order, qty, price, bar_time, order.updated_at)
+                    fills.append({"order_id": order.order_id, "symbol": symbol, "side": side,
+                                  "qty": qty, "price": price, "bar_time": bar_time,
+                                  "order_to_fill_ms": latency})
+                if order.status == "filled":
+                    done.append(order.order_id)
+                elif order.time_in_force == "ioc":
+                    order.status = "canceled"
+                    order.updated_at = self.clock()
+                    self.ledger.save_order(order)
+                    done.append(order.order_id)
+
+        for order_id in done:
+            orders.pop(order_id, None)
+        return fills
+
+    def end_of_day(self):
+        """Cancels resting day orders, as at the close of a session."""
+        day_orders = [o.order_id for o in self.list_orders() if o.time_in_force == "day"]
+        for order_id in day_orders:
+            self.cancel_order(order_id)
+        return len(day_orders)
+
+
+def iter_bars(source="daily_metrics", symbols=None, start=None, end=None, db_path=None):
+    """
+    Streams stored bars in time order as (symbol, bar_time, open, high, low,
+    close, volume). `source` is 'daily_metrics' or 'intraday_bars'.
+    """
+    time_col = {"daily_metrics": "date", "intraday_bars": "bar_time"}[source]
+    query = f"SELECT asset_symbol, {time_col}, open, high, low, close, volume FROM {source} WHERE 1=1"
+    params = []
+    if symbols:
+        query += f" AND asset_symbol IN ({','.join('?' * len(symbols))})"
+        params += list(symbols)
+    if start:
+        query += f" AND {time_col} >= ?"
+        params.append(start)
+    if end:
+        query += f" AND {time_col} <= ?"
+        params.append(end)
+    query += f" ORDER BY {time_col}, asset_symbol"
+    conn = sqlite3.connect(db_path or DB_PATH)
+    try:
+        yield from conn.execute(query, params)
+    finally:
+        conn.close()
+
+
+def replay(broker, bars, on_bar=None, session_key=lambda bar_time: str(bar_time)[:10]):
+    """
+    Feeds bars to the broker in order and then to the `on_bar(broker, bar,
+    fills)` strategy callback, which may submit orders for later bars. Day
+    orders are cancelled whenever the session (by default the date) changes.
+    Returns the number of bars replayed.
+    """
+    session = None
+    count = 0
+    for bar in bars:
+        current = session_key(bar[1])
+        if session is not None and current != session:
+            broker.end_of_day()
+        session = current
+        fills = broker.on_bar(*bar)
+        if on_bar is not None:
+            on_bar(broker, bar, fills)
+        count += 1
+    return count
+
+
+def print_report(ledger):
+    print(f"\n--- Account '{ledger.account}' ---")
+    print(f"Cash: {ledger.cash():,.2f}")
+    for symbol, p in ledger.positions().items():
+        avg_cost = f"{p['avg_cost']:.2f}" if p["avg_cost"] is not None else "-"
+        print(f"{symbol:<8} qty {p['qty']:>10.2f}  avg {avg_cost:>10}  realized {p['realized_pnl']:>12,.2f}")
+    print("\n--- Latency (ms) ---")
+    for name, stats in ledger.latency_report().items():
+        values = "  ".join(f"{k} {v:.3f}" if isinstance(v, float) else f"{k} {v}" for k, v in stats.items())
+        print(f"{name:<20} {values}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paper-trading ledger report.")
+    parser.add_argument("--account", default="paper")
+    args = parser.parse_args()
+
+    ledger = Ledger(args.account)
+    try:
+        print_report(ledger)
+    finally:
+        ledger.close()
@@ -0,0 +1,133 @@
+import sqlite3
+import os
+
+import numpy as np
+import pandas as pd
+
+import DBManager
+import adjustments
+import archive
+import indicators
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def _load_prices(symbols=None):
+    prices = archive.read_daily_metrics(PRICE_COLUMNS, symbols, db_path=DB_PATH)
+    return adjustments.adjust_frame(prices)
+
+
+def _load_state():
+    with sqlite3.connect(DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT asset_symbol, indicator, definition_hash, last_date FROM feature_state"
+        ).fetchall()
+    return {(row[0], row[1]): (row[2], row[3]) for row in rows}
+
+
+def refresh(symbols=None, indicator_keys=None):
+    """
+    Brings the 'features' table up to date with 'daily_metrics'.
+
+    For each symbol and registered indicator, nothing is computed unless the
+    indicator's definition changed (full recompute, old rows cleared) or new
+    price dates arrived since the last run (only the new dates are written).
+    Kernels always see the full split/dividend adjusted history so
+    path-dependent indicators such as EMA and RSI stay exact.
+    """
+    indicator_keys = list(indicator_keys or indicators.INDICATOR_REGISTRY.keys())
+    hashes = {key: indicators.definition_hash(key) for key in indicator_keys}
+
+    prices = _load_prices(symbols)
+    if prices.empty:
+        print("No daily metrics available to compute features from.")
+        return
+    state = _load_state()
+
+    sym = prices["asset_symbol"].to_numpy()
+    dates = prices["date"].to_numpy()
+    columns = {c: prices[c].to_numpy(dtype=np.float64) for c in PRICE_COLUMNS}
+    bounds = np.flatnonzero(sym[1:] != sym[:-1]) + 1
+    starts = np.r_[0, bounds]
+    ends = np.r_[bounds, len(sym)]
+
+    out_symbols, out_features, out_dates, out_values = [], [], [], []
+    state_rows = []
+    reset_keys = []
+    recomputed = 0
+
+    for s, e in zip(starts, ends):
+        symbol = sym[s]
+        symbol_dates = dates[s:e]
+        last_date = symbol_dates[-1]
+        arrays = {c: v[s:e] for c, v in columns.items()}
+
+        for key in indicator_keys:
+            previous = state.get((symbol, key))
+            if previous is not None and previous[0] == hashes[key]:
+                if previous[1] is not None and previous[1] >= last_date:
+                    continue
+                first = int(np.searchsorted(symbol_dates, previous[1], side="right")) if previous[1] else 0
+            else:
+                first = 0
+                if previous is not None:
+                    reset_keys.extend((symbol, f) for f in indicators.outputs(key))
+
+            for feature, values in indicators.compute(key, arrays).items():
+                values = values[first:]
+                mask = np.isfinite(values)
+                n = int(mask.sum())
+                if not n:
+                    continue
+                out_symbols.append(np.full(n, symbol, dtype=object))
+                out_features.append(np.full(n, feature, dtype=object))
+                out_dates.append(symbol_dates[first:][mask])
+                out_values.append(values[mask])
+
+            state_rows.append((symbol, key, hashes[key], last_date))
+            recomputed += 1
+
+    if not state_rows:
+        print("All features are up to date.")
+        return
+
+    features_df = pd.DataFrame({
+        "asset_symbol": np.concatenate(out_symbols) if out_symbols else [],
+        "feature": np.concatenate(out_features) if out_features else [],
+        "date": np.concatenate(out_dates) if out_dates else [],
+        "value": np.concatenate(out_values).astype(float) if out_values else [],
+    })
+    state_df = pd.DataFrame(
+        state_rows, columns=["asset_symbol", "indicator", "definition_hash", "last_date"]
+    )
+    print(f"Recomputed {recomputed} symbol/indicator pairs.")
+    DBManager.upsert_features(features_df, state_df, reset_keys)
+
+
+def load_features(features, symbols=None, start=None, end=None):
+    """Reads features in long format: asset_symbol, feature, date, value."""
+    query = f"SELECT asset_symbol, feature, date, value FROM features WHERE feature IN ({','.join('?' * len(features))})"
+    params = list(features)
+    if symbols:
+        query += f" AND asset_symbol IN ({','.join('?' * len(symbols))})"
+        params += list(symbols)
+    if start:
+        query += " AND date >= ?"
+        params.append(start)
+    if end:
+        query += " AND date <= ?"
+        params.append(end)
+    with sqlite3.connect(DB_PATH) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def load_panel(feature, symbols=None, start=None, end=None):
+    """One feature as a dates x symbols DataFrame."""
+    df = load_features([feature], symbols, start, end)
+    return df.pivot(index="date", columns="asset_symbol", values="value").sort_index()
+
+
+if __name__ == "__main__":
+    refresh()
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay, USMartinLutherKingJr,
+    USMemorialDay, USPresidentsDay, USThanksgivingDay, nearest_workday, sunday_to_monday,
+)
+from pandas.tseries.offsets import CustomBusinessDay
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'tt2_data.db')
+
+PRICE_FIELDS = ["Open", "High", "Low", "Close"]
+# A close repeated on this many consecutive bars is reported as stale.
+STALE_BARS = 5
+# Return outliers: robust z-score against the symbol's own returns in the
+# window, and a minimum absolute move so quiet names do not flag noise.
+OUTLIER_Z = 10.0
+OUTLIER_MIN_MOVE = 0.15
+DETAIL_LIMIT = 10
+
+CHECKS = ["missing_sessions", "off_calendar", "non_positive", "stale", "ohlc_errors", "return_outliers"]
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Regular NYSE full-day holidays (one-off closures are not included)."""
+    rules = [
+        # NYSE does not close on Friday when New Year's Day falls on a Saturday.
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def trading_sessions(start, end):
+    """NYSE sessions between two dates as 'YYYY-MM-DD' strings."""
+    sessions = pd.date_range(start, end, freq=CustomBusinessDay(calendar=NYSEHolidayCalendar()))
+    return sessions.strftime("%Y-%m-%d").to_numpy(dtype=str)
+
+
+def panels_from_download(data, symbols):
+    """
+    Dense dates x symbols arrays from a `yf.download(..., group_by='ticker')`
+    frame. Returns (dates, symbols, {field: float64 array}); symbols missing
+    from the download are all-NaN columns.
+    """
+    dates = pd.to_datetime(data.index).strftime("%Y-%m-%d").to_numpy(dtype=str)
+    symbols = list(symbols)
+    arrays = {}
+    for field in PRICE_FIELDS + ["Volume"]:
+        wide = data.xs(field, axis=1, level=1) if field in data.columns.get_level_values(1) else pd.DataFrame(index=data.index)
+        arrays[field] = wide.reindex(columns=symbols).to_numpy(dtype=np.float64)
+    return dates, np.array(symbols, dtype=str), arrays
+
+
+def _run_lengths(same):
+    """Length of the run of True values ending at each row, per column."""
+    counts = np.cumsum(same, axis=0)
+    resets = np.maximum.accumulate(np.where(same, 0, counts), axis=0)
+    return counts - resets
+
+
+def _previous_valid(values):
+    """Each cell's most recent earlier finite value in its column (NaN if none)."""
+    n = values.shape[0]
+    idx = np.where(np.isfinite(values), np.arange(n)[:, None], -1)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    prev_idx = np.vstack([np.full((1, values.shape[1]), -1), idx[:-1]])
+    prev = values[np.maximum(prev_idx, 0), np.arange(values.shape[1])[None, :]]
+    return np.where(prev_idx >= 0, prev, np.nan)
+
+
+def validate(dates, symbols, arrays, source="daily_metrics"):
+    """
+    Runs every check across the whole panel at once.
+
+    Gaps are measured on the NYSE session calendar between each symbol's
+    first and last bar. Returns (flags, reject, report): `flags` maps check
+    name to a dates x symbols bool array on `dates` (missing sessions are
+    only counted, since they have no row), `reject` marks bars too broken to
+    store (a non-positive price), and `report` is the per-run summary.
+    """
+    o, h, l, c = (arrays[f] for f in PRICE_FIELDS)
+    present = np.isfinite(c)
+    n_dates, n_symbols = c.shape
+
+    sessions = trading_sessions(str(dates[0]), str(dates[-1])) if n_dates else np.array([], dtype=str)
+    is_session = np.isin(dates, sessions)
+    grid = np.union1d(dates, sessions)
+    on_grid = np.zeros((len(grid), n_symbols), dtype=bool)
+    on_grid[np.searchsorted(grid, dates)] = present
+    rows = np.arange(len(grid))[:, None]
+    first = np.where(on_grid.any(axis=0), on_grid.argmax(axis=0), len(grid))
+    last = len(grid) - 1 - on_grid[::-1].argmax(axis=0)
+    in_span = (rows >= first[None, :]) & (rows <= last[None, :]) & np.isin(grid, sessions)[:, None]
+    missing = in_span & ~on_grid
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        non_positive = present & ((o <= 0) | (h <= 0) | (l <= 0) | (c <= 0))
+        tol = 1e-6 * np.abs(c)
+        ohlc = present & (
+            (h < np.fmax(o, c) - tol) | (l > np.fmin(o, c) + tol) | (l > h + tol)
+        )
+        same = np.zeros_like(present)
+        same[1:] = present[1:] & (c[1:] == c[:-1])
+        stale = present & (_run_lengths(same) >= STALE_BARS - 1)
+
+        valid_close = np.where(present & ~non_positive, c, np.nan)
+        returns = np.log(valid_close / _previous_valid(valid_close))
+        median = np.nanmedian(returns, axis=0) if n_dates > 1 else np.zeros(n_symbols)
+        mad = np.nanmedian(np.abs(returns - median), axis=0) if n_dates > 1 else np.zeros(n_symbols)
+        z = np.abs(returns - median) / (1.4826 * mad + 1e-12)
+        outliers = np.isfinite(returns) & (z > OUTLIER_Z) & (np.abs(returns) > OUTLIER_MIN_MOVE)
+
+    flags = {
+        "off_calendar": present & ~is_session[:, None],
+        "non_positive": non_positive,
+        "stale": stale,
+        "ohlc_errors": ohlc,
+        "return_outliers": outliers,
+    }
+    reject = non_positive
+
+    def _worst(mask):
+        counts = mask.sum(axis=0)
+        top = np.argsort(-counts, kind="stable")[:DETAIL_LIMIT]
+        return {str(symbols[j]): int(counts[j]) for j in top if counts[j]}
+
+    details = {name: _worst(mask) for name, mask in flags.items()}
+    details["missing_sessions"] = _worst(missing)
+    oi, oj = np.nonzero(outliers)
+    order = np.argsort(-np.abs(returns[oi, oj]))[:DETAIL_LIMIT]
+    details["largest_outliers"] = [
+        [str(symbols[oj[k]]), str(dates[oi[k]]), round(float(returns[oi[k], oj[k]]), 4)] for k in order
+    ]
+
+    report = {
+        "source": source,
+        "symbols": int(present.any(axis=0).sum()),
+        "bars": int(present.sum()),
+        "expected_bars": int(in_span.sum()),
+        "missing_sessions": int(missing.sum()),
+        "rejected": int(reject.sum()),
+        "details": details,
+    }
+    report.update({name: int(mask.sum()) for name, mask in flags.items()})
+    return flags, reject, report
+
+
+def summary(report):
+    """One-line text version of a report."""
+    counts = ", ".join(f"{name}={report[name]}" for name in CHECKS)
+    return (f"Quality: {report['bars']} bars / {report['expected_bars']} expected sessions "
+            f"for {report['symbols']} symbols; {counts}; rejected={report['rejected']}")
+
+
+def recent_runs(limit=10):
+    with sqlite3.connect(DB_PATH) as conn:
+        return pd.read_sql_query(
+            f"SELECT run_id, run_at, source, symbols, bars, expected_bars, {', '.join(CHECKS)}, rejected "
+            "FROM data_quality_runs ORDER BY run_id DESC LIMIT ?",
+            conn, params=[limit],
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show recent data-quality reports.")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--details", type=int, help="Print the full details of this run id.")
+    args = parser.parse_args()
+
+    if args.details:
+        with sqlite3.connect(DB_PATH) as conn:
+            row = conn.execute("SELECT details FROM data_quality_runs WHERE run_id = ?", (args.details,)).fetchone()
+        print(json.dumps(json.loads(row[0]), indent=2) if row else f"No run {args.details}.")
+    else:
+        print(recent_runs(args.limit).to_string(index=False))
@@ -0,0 +1,51 @@
+import pandas as pd
+from lxml import html as lxml_html
+
+
+def parse_table(page_html, table_xpath, columns, dtypes=None):
+    """
+    Extracts a single HTML table from a page with one XPath lookup instead of
+    parsing every table the way `pd.read_html` does.
+
+    `columns` maps header text to output column names; only those columns are
+    read. `dtypes` optionally casts the resulting frame.
+    Returns an empty DataFrame with the requested columns if the table is missing.
+    """
+    out_cols = list(columns.values())
+    root = lxml_html.fromstring(page_html)
+    tables = root.xpath(table_xpath)
+    if not tables:
+        return pd.DataFrame(columns=out_cols)
+    table = tables[0]
+
+    header_cells = table.xpath("./thead/tr[1]/th | ./thead/tr[1]/td")
+    rows = table.xpath("./tbody/tr")
+    if not header_cells:
+        all_rows = table.xpath(".//tr")
+        if not all_rows:
+            return pd.DataFrame(columns=out_cols)
+        header_cells = all_rows[0].xpath("./th | ./td")
+        rows = all_rows[1:]
+
+    headers = [cell.text_content().strip() for cell in header_cells]
+    positions = {}
+    for header, name in columns.items():
+        if header in headers:
+            positions[name] = headers.index(header)
+
+    data = {name: [] for name in out_cols}
+    for row in rows:
+        cells = row.xpath("./td | ./th")
+        if not cells:
+            continue
+        for name in out_cols:
+            pos = positions.get(name)
+            if pos is None or pos >= len(cells):
+                data[name].append(None)
+            else:
+                data[name].append(cells[pos].text_content().strip() or None)
+
+    df = pd.DataFrame(data, columns=out_cols)
+    if dtypes:
+        df = df.astype(dtypes)
+    return df
@@ -0,0 +1,99 @@
+import threading
+from urllib.parse import urlsplit
+
+from curl_cffi import CurlInfo
+from curl_cffi import requests as curl_requests
+
+# One transport for every fetcher and for yfinance. curl_cffi keeps one curl
+# handle, and with it a keep-alive connection cache, per thread, so the pool
+# grows to the number of worker threads using the session. Browser
+# impersonation brings HTTP/2 and gzip/br negotiation along with it.
+DEFAULT_IMPERSONATE = "chrome"
+DEFAULT_PER_HOST_LIMIT = 16
+DEFAULT_TIMEOUT = 30
+
+_CONNECTION_INFOS = [CurlInfo.NUM_CONNECTS, CurlInfo.CONNECT_TIME, CurlInfo.APPCONNECT_TIME]
+
+
+class PooledSession(curl_requests.Session):
+    """
+    curl_cffi session that caps concurrent requests per host and counts how
+    many requests needed a new connection and how long setting them up took.
+    """
+
+    def __init__(self, per_host_limit=DEFAULT_PER_HOST_LIMIT, **kwargs):
+        kwargs.setdefault("impersonate", DEFAULT_IMPERSONATE)
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        kwargs.setdefault("curl_infos", _CONNECTION_INFOS)
+        super().__init__(**kwargs)
+        self.per_host_limit = per_host_limit
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self.requests_made = 0
+        self.new_connections = 0
+        self.setup_seconds = 0.0
+
+    def _slots(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def request(self, method, url, *args, **kwargs):
+        with self._slots(url):
+            response = super().request(method, url, *args, **kwargs)
+        infos = getattr(response, "infos", None) or {}
+        connects = infos.get(CurlInfo.NUM_CONNECTS) or 0
+        with self._lock:
+            self.requests_made += 1
+            if connects:
+                self.new_connections += connects
+                # APPCONNECT_TIME includes the TLS handshake; it is 0 for plain HTTP.
+                self.setup_seconds += max(
+                    infos.get(CurlInfo.APPCONNECT_TIME) or 0.0, infos.get(CurlInfo.CONNECT_TIME) or 0.0
+                )
+        return response
+
+    def stats(self):
+        return {
+            "requests": self.requests_made,
+            "new_connections": self.new_connections,
+            "reused": self.requests_made - self.new_connections,
+            "setup_seconds": self.setup_seconds,
+        }
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(per_host_limit=DEFAULT_PER_HOST_LIMIT):
+    """The process-wide shared session, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession(per_host_limit=per_host_limit)
+        return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def report():
+    """One-line summary of connection reuse on the shared session, if it was used."""
+    if _session is None or not _session.requests_made:
+        return None
+    s = _session.stats()
+    # Without keep-alive every request would pay the average setup cost.
+    avg_setup = s["setup_seconds"] / max(s["new_connections"], 1)
+    saved = s["reused"] * avg_setup
+    return (
+        f"HTTP: {s['requests']} requests over {s['new_connections']} new connections "
+        f"({s['setup_seconds']:.2f}s connection setup, ~{saved:.2f}s saved by reuse)"
+    )
@@ -4,22 +4,28 @@ import yfinance as yf
 import pandas as pd
 import sqlite3
 import os
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
+try:
+    from fetchers import httpTransport
+except ImportError:
+    import httpTransport
+
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'tt2_data.db')
 
 def _get_tickers_from_db(source='sp500', limit=None):
     with sqlite3.connect(DB_PATH) as conn:
-        query = f"SELECT symbol FROM assets WHERE is_active = 1 AND source = '{source}'"
+        query = (f"SELECT asset_symbol AS symbol FROM universe_membership "
+                 f"WHERE universe = '{source}' AND valid_to IS NULL ORDER BY asset_symbol")
         if limit:
             query += f" LIMIT {limit}"
         df = pd.read_sql_query(query, conn)
     return df['symbol'].tolist()
 
-def fetch_single_score(symbol):
+def fetch_single_score(symbol, session=None):
     try:
-        ticker = yf.Ticker(symbol)
+        ticker = yf.Ticker(symbol, session=session)
         info = ticker.get_info()
 
         if not info:
@@ -53,9 +59,10 @@ def fetch_single_score(symbol):
             'target_mean_price': target_mean_price
         }
     except Exception as e:
-        return None
+        print(f"[WARN] Failed to fetch analyst score for {symbol}: {e}")
+        raise
 
-def fetch(scope, max_workers=20):
+def fetch(scope, max_workers=20, session=None):
     if scope == 'top_10_sp500':
         tickers_to_check = _get_tickers_from_db(source='sp500', limit=10)
     elif scope == 'top_250_sp500':
@@ -68,14 +75,25 @@ def fetch(scope, max_workers=20):
         print(f"Error: Unknown scope '{scope}'. Aborting scores fetch.")
         return pd.DataFrame()
 
+    session = session or httpTransport.get_session()
+    all_scores_data = []
+    failed = []
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        results = list(tqdm(executor.map(fetch_single_score, tickers_to_check), total=len(tickers_to_check)))
-
-    all_scores_data = [score for score in results if score is not None]
+        futures = {executor.submit(fetch_single_score, sym, session): sym for sym in tickers_to_check}
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            try:
+                score = future.result()
+            except Exception:
+                failed.append(futures[future])
+                continue
+            if score is not None:
+                all_scores_data.append(score)
 
     if not all_scores_data:
         print("Failed to fetch any analyst scores for the specified scope.")
-        return pd.DataFrame()
+        empty = pd.DataFrame()
+        empty.attrs['failed_symbols'] = failed
+        return empty
 
     master_df = pd.DataFrame(all_scores_data)
 
@@ -83,6 +101,7 @@ def fetch(scope, max_workers=20):
     
     for col in numeric_fields:
         master_df[col] = pd.to_numeric(master_df[col], errors='coerce')
+    master_df.attrs['failed_symbols'] = failed
 
     return master_df
 
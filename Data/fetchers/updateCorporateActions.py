@@ -0,0 +1,111 @@
+import yfinance as yf
+import pandas as pd
+import sqlite3
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+try:
+    from fetchers import httpTransport
+except ImportError:
+    import httpTransport
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'tt2_data.db')
+
+
+def _get_tickers_from_db(source='sp500', limit=None):
+    """Fetches the current members of a universe from the database."""
+    with sqlite3.connect(DB_PATH) as conn:
+        query = (f"SELECT asset_symbol AS symbol FROM universe_membership "
+                 f"WHERE universe = '{source}' AND valid_to IS NULL ORDER BY asset_symbol")
+        if limit:
+            query += f" LIMIT {limit}"
+        df = pd.read_sql_query(query, conn)
+    return df['symbol'].tolist()
+
+
+def _fetch_single_actions(symbol, session=None):
+    """Fetch split and dividend history for a single symbol."""
+    try:
+        actions = yf.Ticker(symbol, session=session).actions
+        if actions is None or actions.empty:
+            return None
+
+        actions = actions.reset_index()
+        date_col = actions.columns[0]
+        rows = []
+        if 'Stock Splits' in actions.columns:
+            splits = actions[actions['Stock Splits'] > 0]
+            rows.append(pd.DataFrame({
+                'symbol': symbol,
+                'ex_date': splits[date_col],
+                'action_type': 'split',
+                'value': splits['Stock Splits'],
+            }))
+        if 'Dividends' in actions.columns:
+            dividends = actions[actions['Dividends'] > 0]
+            rows.append(pd.DataFrame({
+                'symbol': symbol,
+                'ex_date': dividends[date_col],
+                'action_type': 'dividend',
+                'value': dividends['Dividends'],
+            }))
+        rows = [r for r in rows if not r.empty]
+        return pd.concat(rows, ignore_index=True) if rows else None
+    except Exception as e:
+        print(f"[WARN] Failed to fetch corporate actions for {symbol}: {e}")
+        raise
+
+
+def fetch(scope='top_10_sp500', max_workers=10, session=None):
+    """Fetches split and dividend history for a set of tickers."""
+    print(f"Fetching corporate actions with scope: '{scope}'")
+
+    if scope == 'top_10_sp500':
+        tickers_to_check = _get_tickers_from_db(source='sp500', limit=10)
+    elif scope == 'top_250_sp500':
+        tickers_to_check = _get_tickers_from_db(source='sp500', limit=250)
+    elif scope == 'sp500':
+        tickers_to_check = _get_tickers_from_db(source='sp500')
+    elif isinstance(scope, list):
+        tickers_to_check = scope
+    else:
+        print(f"Error: Unknown scope '{scope}'. Aborting corporate actions fetch.")
+        return pd.DataFrame()
+
+    if not tickers_to_check:
+        print("No tickers found in database to process.")
+        return pd.DataFrame()
+
+    all_actions = []
+    failed = []
+    session = session or httpTransport.get_session()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_fetch_single_actions, sym, session): sym for sym in tickers_to_check}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Fetching corporate actions"):
+            try:
+                result = future.result()
+            except Exception:
+                failed.append(futures[future])
+                continue
+            if result is not None:
+                all_actions.append(result)
+
+    if not all_actions:
+        print("No corporate actions found for specified scope.")
+        empty = pd.DataFrame()
+        empty.attrs['failed_symbols'] = failed
+        return empty
+
+    master_df = pd.concat(all_actions, ignore_index=True)
+    master_df['ex_date'] = pd.to_datetime(master_df['ex_date']).dt.strftime('%Y-%m-%d')
+    master_df['value'] = master_df['value'].astype(float)
+    master_df.attrs['failed_symbols'] = failed
+
+    print(f"Successfully fetched {len(master_df)} total corporate action records.")
+    return master_df
+
+
+if __name__ == "__main__":
+    df = fetch(scope='top_250_sp500', max_workers=20)
+    print(df.head())
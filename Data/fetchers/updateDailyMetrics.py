@@ -7,13 +7,20 @@ import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
+try:
+    from fetchers import dataQuality, httpTransport
+except ImportError:
+    import dataQuality
+    import httpTransport
+
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'tt2_data.db')
 
 
 def _get_tickers_from_db(source='sp500', limit=None):
-    """Fetches a list of active stock symbols from the database."""
+    """Fetches the current members of a universe from the database."""
     with sqlite3.connect(DB_PATH) as conn:
-        query = f"SELECT symbol FROM assets WHERE is_active = 1 AND source = '{source}'"
+        query = (f"SELECT asset_symbol AS symbol FROM universe_membership "
+                 f"WHERE universe = '{source}' AND valid_to IS NULL ORDER BY asset_symbol")
         if limit:
             query += f" LIMIT {limit}"
         df = pd.read_sql_query(query, conn)
@@ -40,6 +47,17 @@ def _process_single_ticker(symbol, data):
         hist.ta.sma(length=50, append=True, col_names=('ma_50d',))
         hist.ta.rsi(length=14, append=True, col_names=('rsi_14d',))
 
+        # Yahoo prices are split-adjusted as of download time. Undo the splits
+        # inside the window so raw prices are stored; adjustment factors are
+        # applied at read time instead (see adjustments.py).
+        if 'Stock Splits' in hist.columns:
+            splits = hist['Stock Splits'].fillna(0.0)
+            ratio = splits.where(splits > 0, 1.0)
+            later_splits = ratio[::-1].cumprod()[::-1].shift(-1, fill_value=1.0)
+            for col in ['Open', 'High', 'Low', 'Close', 'ma_20d', 'ma_50d']:
+                hist[col] = hist[col] * later_splits
+            hist['Volume'] = hist['Volume'] / later_splits
+
         hist.reset_index(inplace=True)
         hist['asset_symbol'] = symbol
 
@@ -48,19 +66,21 @@ def _process_single_ticker(symbol, data):
             'Low': 'low', 'Close': 'close', 'Volume': 'volume'
         }, inplace=True)
 
+        # Keep every bar with a close: indicators stay NaN through their
+        # warm-up and other missing fields are stored as NULL.
         metrics_df = hist[[
             'asset_symbol', 'date', 'open', 'high', 'low', 'close', 'volume',
             'volatility_30d', 'ma_20d', 'ma_50d', 'rsi_14d'
-        ]].dropna()
+        ]].dropna(subset=['close'])
 
         return metrics_df
 
     except Exception as e:
         print(f"[WARN] Failed to process {symbol}: {e}")
-        return None
+        raise
 
 
-def fetch(scope='top_10_sp500', max_workers=10):
+def fetch(scope='top_10_sp500', max_workers=10, session=None):
     """
     Fetches historical price data for assets and calculates a suite of technical metrics.
     Now uses ThreadPoolExecutor and tqdm for progress tracking.
@@ -91,29 +111,53 @@ def fetch(scope='top_10_sp500', max_workers=10):
             period="1y",
             group_by='ticker',
             auto_adjust=False,
-            threads=True
+            actions=True,
+            threads=True,
+            session=session or httpTransport.get_session()
         )
     except Exception as e:
         print(f"Bulk download failed: {e}")
-        return pd.DataFrame()
+        empty = pd.DataFrame()
+        empty.attrs['failed_symbols'] = list(tickers_to_process)
+        return empty
 
     if data.empty:
         print("No data returned from yfinance bulk download.")
-        return pd.DataFrame()
-
-    print("Download complete. Calculating metrics in parallel...")
+        empty = pd.DataFrame()
+        empty.attrs['failed_symbols'] = list(tickers_to_process)
+        return empty
+
+    print("Download complete. Validating bars...")
+    dates, symbols, arrays = dataQuality.panels_from_download(data, tickers_to_process)
+    flags, reject, report = dataQuality.validate(dates, symbols, arrays)
+    print(dataQuality.summary(report))
+    # Bars with non-positive prices would poison every indicator downstream.
+    for j in np.flatnonzero(reject.any(axis=0)):
+        bad_rows = data.index[reject[:, j]]
+        for field in dataQuality.PRICE_FIELDS + ['Volume']:
+            if (symbols[j], field) in data.columns:
+                data.loc[bad_rows, (symbols[j], field)] = np.nan
+
+    print("Calculating metrics in parallel...")
 
     all_metrics_dfs = []
+    failed = []
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = {executor.submit(_process_single_ticker, symbol, data): symbol for symbol in tickers_to_process}
         for future in tqdm(as_completed(futures), total=len(futures), desc="Calculating metrics"):
-            result = future.result()
+            try:
+                result = future.result()
+            except Exception:
+                failed.append(futures[future])
+                continue
             if result is not None:
                 all_metrics_dfs.append(result)
 
     if not all_metrics_dfs:
         print("No valid metric dataframes generated.")
-        return pd.DataFrame()
+        empty = pd.DataFrame()
+        empty.attrs['failed_symbols'] = failed
+        return empty
 
     master_df = pd.concat(all_metrics_dfs, ignore_index=True)
     master_df['date'] = pd.to_datetime(master_df['date']).dt.strftime('%Y-%m-%d')
@@ -133,6 +177,9 @@ def fetch(scope='top_10_sp500', max_workers=10):
 
     master_df = master_df.applymap(lambda x: float(x) if isinstance(x, (np.float32, np.float64)) else x)
 
+    master_df.attrs['quality_report'] = report
+    master_df.attrs['failed_symbols'] = failed
+
     print(f"Successfully calculated {len(master_df)} total daily metric records.")
     return master_df
 
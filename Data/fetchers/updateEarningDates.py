@@ -5,23 +5,33 @@ import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
+try:
+    from fetchers import httpTransport
+except ImportError:
+    import httpTransport
+
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'tt2_data.db')
 
+MARKET_TZ = 'America/New_York'
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
 
 def _get_tickers_from_db(source='sp500', limit=None):
-    """Fetches a list of active stock symbols from the database."""
+    """Fetches the current members of a universe from the database."""
     with sqlite3.connect(DB_PATH) as conn:
-        query = f"SELECT symbol FROM assets WHERE is_active = 1 AND source = '{source}'"
+        query = (f"SELECT asset_symbol AS symbol FROM universe_membership "
+                 f"WHERE universe = '{source}' AND valid_to IS NULL ORDER BY asset_symbol")
         if limit:
             query += f" LIMIT {limit}"
         df = pd.read_sql_query(query, conn)
     return df['symbol'].tolist()
 
 
-def _fetch_single_earnings(symbol):
+def _fetch_single_earnings(symbol, session=None):
     """Fetch earnings date info for a single symbol."""
     try:
-        ticker = yf.Ticker(symbol)
+        ticker = yf.Ticker(symbol, session=session)
 
         if hasattr(ticker, "get_earnings_dates"):
             df = ticker.get_earnings_dates(limit=8)
@@ -32,6 +42,7 @@ def _fetch_single_earnings(symbol):
         if df is not None and not df.empty:
             df = df.reset_index().rename(columns={
                 'index': 'earnings_date',
+                'Earnings Date': 'earnings_date',
                 'EPS Estimate': 'eps_estimate',
                 'Reported EPS': 'eps_reported',
                 'Surprise(%)': 'eps_surprise_pct'
@@ -40,10 +51,26 @@ def _fetch_single_earnings(symbol):
             return df
     except Exception as e:
         print(f"[WARN] Failed to fetch earnings data for {symbol}: {e}")
+        raise
     return None
 
 
-def fetch(scope='top_10_sp500', max_workers=10):
+def _report_time(timestamps):
+    """
+    'bmo' (before market open), 'amc' (after market close) or 'dmh' (during
+    market hours) from announcement timestamps in exchange time; None where
+    only the date is known (midnight).
+    """
+    minutes = timestamps.dt.hour * 60 + timestamps.dt.minute
+    open_, close = MARKET_OPEN[0] * 60 + MARKET_OPEN[1], MARKET_CLOSE[0] * 60 + MARKET_CLOSE[1]
+    labels = pd.Series('dmh', index=timestamps.index, dtype=object)
+    labels[minutes < open_] = 'bmo'
+    labels[minutes >= close] = 'amc'
+    labels[(minutes == 0) | timestamps.isna()] = None
+    return labels
+
+
+def fetch(scope='top_10_sp500', max_workers=10, session=None):
     """Fetches and aggregates upcoming and past earnings dates for a set of tickers."""
     print(f"Fetching earnings dates with scope: '{scope}'")
 
@@ -64,26 +91,44 @@ def fetch(scope='top_10_sp500', max_workers=10):
         return pd.DataFrame()
 
     all_earnings_data = []
+    failed = []
+    session = session or httpTransport.get_session()
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(_fetch_single_earnings, sym): sym for sym in tickers_to_check}
+        futures = {executor.submit(_fetch_single_earnings, sym, session): sym for sym in tickers_to_check}
         for future in tqdm(as_completed(futures), total=len(futures), desc="Fetching earnings data"):
-            result = future.result()
+            try:
+                result = future.result()
+            except Exception:
+                failed.append(futures[future])
+                continue
             if result is not None:
                 all_earnings_data.append(result)
 
     if not all_earnings_data:
         print("No earnings data found for specified scope.")
-        return pd.DataFrame()
+        empty = pd.DataFrame()
+        empty.attrs['failed_symbols'] = failed
+        return empty
 
     master_df = pd.concat(all_earnings_data, ignore_index=True)
 
-    master_df['earnings_date'] = pd.to_datetime(master_df['earnings_date']).dt.strftime('%Y-%m-%d')
+    # The date is the exchange-local day; after-close reports move the market
+    # on the next session, so keep the time of day too.
+    announced = pd.to_datetime(master_df['earnings_date'])
+    if announced.dt.tz is None:
+        announced = announced.dt.tz_localize(MARKET_TZ)
+    else:
+        announced = announced.dt.tz_convert(MARKET_TZ)
+    master_df['report_time'] = _report_time(announced)
+    master_df['earnings_date'] = announced.dt.strftime('%Y-%m-%d')
     master_df = master_df.astype({
         "eps_estimate": float,
         "eps_reported": float,
         "eps_surprise_pct": float
     })
 
+    master_df.attrs['failed_symbols'] = failed
+
     print(f"Successfully fetched {len(master_df)} total earnings records.")
     return master_df
 
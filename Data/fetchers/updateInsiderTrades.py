@@ -5,21 +5,27 @@ import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
+try:
+    from fetchers import httpTransport
+except ImportError:
+    import httpTransport
+
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'tt2_data.db')
 
 
 def _get_tickers_from_db(source='sp500', limit=None):
     with sqlite3.connect(DB_PATH) as conn:
-        query = f"SELECT symbol FROM assets WHERE is_active = 1 AND source = '{source}'"
+        query = (f"SELECT asset_symbol AS symbol FROM universe_membership "
+                 f"WHERE universe = '{source}' AND valid_to IS NULL ORDER BY asset_symbol")
         if limit:
             query += f" LIMIT {limit}"
         df = pd.read_sql_query(query, conn)
     return df['symbol'].tolist()
 
 
-def _fetch_single_insider(symbol):
+def _fetch_single_insider(symbol, session=None):
     try:
-        ticker = yf.Ticker(symbol)
+        ticker = yf.Ticker(symbol, session=session)
         transactions = ticker.insider_transactions
 
         if transactions is not None and not transactions.empty:
@@ -27,10 +33,11 @@ def _fetch_single_insider(symbol):
             return transactions
     except Exception as e:
         print(f"[WARN] Failed to fetch insider info for {symbol}: {e}")
+        raise
     return None
 
 
-def fetch(scope='top_10_sp500', max_workers=10):
+def fetch(scope='top_10_sp500', max_workers=10, session=None):
     if scope == 'top_10_sp500':
         tickers_to_check = _get_tickers_from_db(source='sp500', limit=10)
     elif scope == 'top_250_sp500':
@@ -44,16 +51,24 @@ def fetch(scope='top_10_sp500', max_workers=10):
         return pd.DataFrame()
 
     all_insider_data = []
+    failed = []
+    session = session or httpTransport.get_session()
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(_fetch_single_insider, sym): sym for sym in tickers_to_check}
+        futures = {executor.submit(_fetch_single_insider, sym, session): sym for sym in tickers_to_check}
         for future in tqdm(as_completed(futures), total=len(futures), desc="Fetching insider data"):
-            result = future.result()
+            try:
+                result = future.result()
+            except Exception:
+                failed.append(futures[future])
+                continue
             if result is not None:
                 all_insider_data.append(result)
 
     if not all_insider_data:
         print("No insider transactions found for the specified scope.")
-        return pd.DataFrame()
+        empty = pd.DataFrame()
+        empty.attrs['failed_symbols'] = failed
+        return empty
 
     master_df = pd.concat(all_insider_data, ignore_index=True)
 
@@ -65,6 +80,7 @@ def fetch(scope='top_10_sp500', max_workers=10):
         'Shares': 'shares',
         'Value': 'value'
     }, inplace=True)
+    master_df.attrs['failed_symbols'] = failed
 
     print(f"Successfully fetched {len(master_df)} total insider transaction records.")
     return master_df
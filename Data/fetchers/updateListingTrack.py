@@ -1,55 +1,205 @@
 # scripts/fetchers/update_listing_track.py
 
-import requests
 import pandas as pd
+import sqlite3
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def fetch():
-    """
-    Fetches all company listing events (IPOs, SPACs, etc.) from listingtrack.io.
-    Returns a pandas DataFrame with 'symbol', 'name', and 'listing_method' columns.
-    """
-    print("Fetching listing events from ListingTrack API...")
-    base_url = (
-        "https://api.listingtrack.io/odata/companies"
-        "?select=symbol,name,ipo"
-        "&inclAll=true"
-        "&$orderby=ipo/listingDate%20desc"
-        "&$expand=ipo(select=listingMethod)"
-    )
-
-    all_records = []
-    url = base_url
-    page_num = 1
+try:
+    from fetchers import httpTransport
+except ImportError:
+    import httpTransport
 
-    while url:
-        print(f"  - Fetching page {page_num}...")
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'tt2_data.db')
+
+FETCHER_NAME = 'listings'
+BASE_URL = (
+    "https://api.listingtrack.io/odata/companies"
+    "?select=symbol,name,ipo"
+    "&inclAll=true"
+    "&$orderby=ipo/listingDate%20desc"
+    "&$expand=ipo(select=listingMethod)"
+)
+PAGE_SIZE = 100
+MAX_RETRIES = 4
+RETRY_BACKOFF = 0.5
+# Listings are ordered newest first, so new IPOs shift every later page; saved
+# progress older than this is discarded rather than resumed from.
+RESUME_MAX_AGE_HOURS = 6
+
+
+def _page_url(base_url, skip, top, count=False):
+    sep = '&' if '?' in base_url else '?'
+    url = f"{base_url}{sep}$skip={skip}&$top={top}"
+    if count:
+        url += "&$count=true"
+    return url
+
+
+def _get_json(session, url, retries=MAX_RETRIES, backoff=RETRY_BACKOFF):
+    """GET with exponential backoff. Raises after the final attempt fails."""
+    for attempt in range(retries):
         try:
-            resp = requests.get(url)
+            resp = session.get(url, timeout=30)
             resp.raise_for_status()
             data = resp.json()
-            
-            batch = data.get('value')
-            if not isinstance(batch, list):
+            if not isinstance(data.get('value'), list):
                 raise ValueError("Unexpected JSON structure")
+            return data
+        except Exception:
+            if attempt == retries - 1:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+
+def _normalize_page(records):
+    if not records:
+        return pd.DataFrame(columns=['symbol', 'name', 'listing_method'])
+    df = pd.json_normalize(records)
+    df.rename(columns={'ipo.listingMethod': 'listing_method'}, inplace=True)
+    for col in ['symbol', 'name', 'listing_method']:
+        if col not in df.columns:
+            df[col] = None
+    df.dropna(subset=['symbol', 'name', 'listing_method'], inplace=True)
+    return df[['symbol', 'name', 'listing_method']]
+
+
+def _fetch_page(session, base_url, page, page_size):
+    data = _get_json(session, _page_url(base_url, page * page_size, page_size))
+    return page, _normalize_page(data['value'])
+
+
+def _completed_pages(page_size, max_age_hours=RESUME_MAX_AGE_HOURS):
+    try:
+        with sqlite3.connect(DB_PATH, timeout=10) as conn:
+            cutoff = f"-{max_age_hours} hours"
+            stale = conn.execute(
+                "DELETE FROM fetch_progress WHERE fetcher = ? AND completed_at < datetime('now', ?)",
+                (FETCHER_NAME, cutoff),
+            ).rowcount
+            if stale:
+                print(f"  - Discarded {stale} saved pages older than {max_age_hours}h.")
+            rows = conn.execute(
+                "SELECT page FROM fetch_progress WHERE fetcher = ? AND page_size = ?",
+                (FETCHER_NAME, page_size),
+            ).fetchall()
+        return {row[0] for row in rows}
+    except sqlite3.OperationalError:
+        return set()
+
+
+def _mark_page_completed(page_size, page, record_count):
+    with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        conn.execute("""
+        INSERT INTO fetch_progress (fetcher, page_size, page, record_count)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(fetcher, page_size, page) DO UPDATE SET
+            record_count=excluded.record_count,
+            completed_at=datetime('now');
+        """, (FETCHER_NAME, page_size, page, record_count))
+
+
+def _clear_progress():
+    with sqlite3.connect(DB_PATH, timeout=10) as conn:
+        conn.execute("DELETE FROM fetch_progress WHERE fetcher = ?", (FETCHER_NAME,))
 
-            all_records.extend(batch)
-            url = data.get('@odata.nextLink')
-            page_num += 1
+
+def iter_batches(base_url=BASE_URL, page_size=PAGE_SIZE, max_workers=8, resume=True, session=None):
+    """
+    Streams listing events page by page as normalized DataFrames.
+
+    The first request asks for `@odata.count`, then the remaining `$skip`/`$top`
+    pages are fetched concurrently with retries and yielded as they arrive.
+    With `resume`, a page is recorded in 'fetch_progress' once the consumer has
+    taken it, so a rerun after a failure only requests the pages still missing.
+    Page 0 is always yielded, since that is where new listings appear, and
+    progress older than RESUME_MAX_AGE_HOURS is discarded because the page
+    offsets have moved since. Progress is cleared once every page has completed.
+    """
+    session = session or httpTransport.get_session()
+    done = _completed_pages(page_size) if resume else set()
+    if done:
+        print(f"  - Resuming: {len(done)} pages already completed.")
+
+    try:
+        first = _get_json(session, _page_url(base_url, 0, page_size, count=True))
+    except Exception as e:
+        print(f"    Failed to fetch page 1: {e}")
+        return
+    total = first.get('@odata.count')
+    if total is None:
+        # Server doesn't report a count; fall back to following nextLink serially.
+        yield from _iter_next_links(session, first)
+        return
+
+    n_pages = max(1, -(-int(total) // page_size))
+    print(f"  - {total} records across {n_pages} pages of {page_size}.")
+
+    yield _normalize_page(first['value'])
+    if resume:
+        _mark_page_completed(page_size, 0, len(first['value']))
+
+    pending = [p for p in range(1, n_pages) if p not in done]
+    failed = []
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(_fetch_page, session, base_url, page, page_size): page
+            for page in pending
+        }
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                _, batch = future.result()
+            except Exception as e:
+                print(f"    Failed to fetch page {page + 1}: {e}")
+                failed.append(page)
+                continue
+            yield batch
+            if resume:
+                _mark_page_completed(page_size, page, len(batch))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if failed:
+        print(f"  - {len(failed)} of {n_pages} pages failed; rerun to resume from the missing pages.")
+    elif resume:
+        _clear_progress()
+
+
+def _iter_next_links(session, data):
+    page_num = 1
+    while True:
+        yield _normalize_page(data['value'])
+        url = data.get('@odata.nextLink')
+        if not url:
+            return
+        page_num += 1
+        print(f"  - Fetching page {page_num}...")
+        try:
+            data = _get_json(session, url)
         except Exception as e:
-            print(f"    Failed to fetch page {page_num}: {e}")
-            url = None
+            print(f"[WARN] Failed to fetch page {page_num}, stopping: {e}")
+            return
+
+
+def fetch(base_url=BASE_URL, page_size=PAGE_SIZE, max_workers=8, resume=False):
+    """
+    Fetches all company listing events (IPOs, SPACs, etc.) from listingtrack.io.
+    Returns a pandas DataFrame with 'symbol', 'name', and 'listing_method' columns.
+    """
+    print("Fetching listing events from ListingTrack API...")
+    batches = list(iter_batches(base_url, page_size, max_workers, resume=resume))
 
-    if not all_records:
+    if not batches:
         print("No records fetched from ListingTrack.")
         return pd.DataFrame()
 
-    df = pd.json_normalize(all_records)
+    df = pd.concat(batches, ignore_index=True)
     print(f"Successfully fetched a total of {len(df)} listing event records.")
-    
-    df.rename(columns={'ipo.listingMethod': 'listing_method'}, inplace=True)
-    df.dropna(subset=['symbol', 'name', 'listing_method'], inplace=True)
-    
-    return df[['symbol', 'name', 'listing_method']]
+    return df
+
 
 if __name__ == "__main__":
     data = fetch()
@@ -57,4 +207,4 @@ if __name__ == "__main__":
         print("\n--- ListingTrack Data Sample ---")
         print(data.head())
         print("\n--- Listing Method Counts ---")
-        print(data['listing_method'].value_counts())
\ No newline at end of file
+        print(data['listing_method'].value_counts())
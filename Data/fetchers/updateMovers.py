@@ -1,58 +1,75 @@
 import pandas as pd
-import requests
-import io
+from concurrent.futures import ThreadPoolExecutor
 
-def _scrape_yahoo_screener(url):
+try:
+    from fetchers import htmlTable
+except ImportError:
+    import htmlTable
+
+try:
+    from fetchers import httpTransport
+except ImportError:
+    import httpTransport
+
+SCREENER_URLS = {
+    'gainer': 'https://finance.yahoo.com/gainers',
+    'loser': 'https://finance.yahoo.com/losers',
+    'active': 'https://finance.yahoo.com/most-active',
+    '52_week_high': 'https://finance.yahoo.com/research-hub/screener/recent_52_week_highs/',
+    '52_week_low': 'https://finance.yahoo.com/research-hub/screener/recent_52_week_lows/'
+}
+SCREENER_TABLE_XPATH = "(//table)[1]"
+SCREENER_COLUMNS = {'Symbol': 'symbol', 'Name': 'name'}
+SCREENER_DTYPES = {'symbol': 'string', 'name': 'string'}
+
+def parse(page_html):
+    """Extracts the symbol and name columns of the first table on a screener page."""
+    return htmlTable.parse_table(page_html, SCREENER_TABLE_XPATH, SCREENER_COLUMNS, SCREENER_DTYPES)
+
+def _scrape_yahoo_screener(session, url):
     """
     Internal helper function to scrape a single Yahoo Finance screener page.
     Returns a pandas DataFrame.
     """
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    response = requests.get(url, headers=headers)
+    response = session.get(url)
     response.raise_for_status()
-    
-    tables = pd.read_html(io.StringIO(response.text))
-    if not tables:
-        return pd.DataFrame()
-        
-    return tables[0]
+    return parse(response.text)
+
+def _scrape_category(session, category, url):
+    print(f"  - Scraping category: {category}...")
+    try:
+        df = _scrape_yahoo_screener(session, url)
+        if df.empty:
+            print(f"    No data found for {category}.")
+            return None
+        df['category'] = category
+        return df
+    except Exception as e:
+        print(f"    Failed to scrape {category}: {e}")
+        return None
 
-def fetch():
+def fetch(session=None):
     """
     Main fetch function. Scrapes Top Gainers, Losers, and Most Active stocks.
+    All screener pages are requested concurrently over one keep-alive session.
     Returns a single DataFrame with 'symbol', 'name', and 'category' columns.
     """
     print("Fetching market movers data from Yahoo Finance...")
-    screener_urls = {
-        'gainer': 'https://finance.yahoo.com/gainers',
-        'loser': 'https://finance.yahoo.com/losers',
-        'active': 'https://finance.yahoo.com/most-active',
-        '52_week_high': 'https://finance.yahoo.com/research-hub/screener/recent_52_week_highs/',
-        '52_week_low': 'https://finance.yahoo.com/research-hub/screener/recent_52_week_lows/'
-    }
-    
-    all_movers_dfs = []
 
-    for category, url in screener_urls.items():
-        print(f"  - Scraping category: {category}...")
-        try:
-            df = _scrape_yahoo_screener(url)
-            if df.empty:
-                print(f"    No data found for {category}.")
-                continue
-            
-            df['category'] = category
-            all_movers_dfs.append(df)
-            
-        except Exception as e:
-            print(f"    Failed to scrape {category}: {e}")
+    session = session or httpTransport.get_session()
+    with ThreadPoolExecutor(max_workers=len(SCREENER_URLS)) as executor:
+        results = list(executor.map(
+            lambda item: _scrape_category(session, *item), SCREENER_URLS.items()
+        ))
+
+    all_movers_dfs = [df for df in results if df is not None]
 
     if not all_movers_dfs:
         print("Failed to scrape any market mover data.")
         return pd.DataFrame()
     master_df = pd.concat(all_movers_dfs, ignore_index=True)
-    master_df.rename(columns={'Symbol': 'symbol', 'Name': 'name'}, inplace=True)
     master_df.dropna(subset=['symbol', 'name'], inplace=True)
+    master_df['category'] = master_df['category'].astype('category')
     
     print(f"Successfully scraped a total of {len(master_df)} market mover records.")
     return master_df[['symbol', 'name', 'category']]
@@ -64,4 +81,4 @@ if __name__ == "__main__":
         print("\n--- Market Movers Data Sample ---")
         print(data.head())
         print("\n--- Category Counts ---")
-        print(data['category'].value_counts())
\ No newline at end of file
+        print(data['category'].value_counts())
@@ -1,25 +1,42 @@
 import pandas as pd
-import requests
 
-def fetch():
+try:
+    from fetchers import htmlTable
+except ImportError:
+    import htmlTable
+
+try:
+    from fetchers import httpTransport
+except ImportError:
+    import httpTransport
+
+SP500_URL = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
+SP500_TABLE_XPATH = "//table[@id='constituents']"
+SP500_COLUMNS = {'Symbol': 'symbol', 'Security': 'name'}
+SP500_DTYPES = {'symbol': 'string', 'name': 'string'}
+
+def parse(page_html):
+    """Extracts the constituents table from the Wikipedia page HTML."""
+    df = htmlTable.parse_table(page_html, SP500_TABLE_XPATH, SP500_COLUMNS, SP500_DTYPES)
+    df.dropna(subset=['symbol'], inplace=True)
+    df['symbol'] = df['symbol'].str.replace('.', '-', regex=False)
+    return df.reset_index(drop=True)
+
+def fetch(session=None):
     """
     Scrapes the list of S&P 500 tickers from Wikipedia.
     Returns a pandas DataFrame with 'symbol' and 'name' columns.
     """
     print("Scraping S&P 500 data from Wikipedia...")
-    url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
     headers = {
         'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        http = session or httpTransport.get_session()
+        response = http.get(SP500_URL, headers=headers)
         response.raise_for_status()
-        tables = pd.read_html(response.text)
-        sp500_table = tables[0]
-        
-        sp500_table['Symbol'] = sp500_table['Symbol'].str.replace('.', '-', regex=False)
-        df = sp500_table[['Symbol', 'Security']].rename(columns={'Symbol': 'symbol', 'Security': 'name'})
+        df = parse(response.text)
         
         print(f"Successfully scraped {len(df)} tickers.")
         return df
@@ -32,4 +49,4 @@ if __name__ == "__main__":
     data = fetch()
     if not data.empty:
         print("\n--- Scraped Data Sample ---")
-        print(data.head())
\ No newline at end of file
+        print(data.head())
@@ -0,0 +1,169 @@
+import argparse
+import io
+import pandas as pd
+
+try:
+    from fetchers import httpTransport
+except ImportError:
+    import httpTransport
+
+FRED_CSV_URL = "https://fred.stlouisfed.org/graph/fredgraph.csv?id={fred_id}"
+
+# Series fetched by default. 'release_lag_days' is the calendar delay between
+# an observation's date and the day it becomes public; it stands in for a
+# release date when the source does not publish vintages.
+DEFAULT_SERIES = {
+    "VIX": {"source": "fred", "fred_id": "VIXCLS", "name": "CBOE Volatility Index",
+            "frequency": "daily", "units": "index", "release_lag_days": 1},
+    "DGS10": {"source": "fred", "fred_id": "DGS10", "name": "10-Year Treasury Constant Maturity Rate",
+              "frequency": "daily", "units": "percent", "release_lag_days": 1},
+    "DFF": {"source": "fred", "fred_id": "DFF", "name": "Effective Federal Funds Rate",
+            "frequency": "daily", "units": "percent", "release_lag_days": 1},
+    "CPIAUCSL": {"source": "fred", "fred_id": "CPIAUCSL", "name": "CPI, All Urban Consumers (SA)",
+                 "frequency": "monthly", "units": "index 1982-84=100", "release_lag_days": 45},
+}
+
+# Extra series added at runtime with register(), e.g. file exports.
+SERIES = dict(DEFAULT_SERIES)
+
+
+def register(series_id, **spec):
+    """Adds or replaces a series definition; `spec` needs at least 'source'."""
+    SERIES[series_id] = spec
+
+
+def _read_text(spec, session):
+    if spec.get("path"):
+        with open(spec["path"], encoding="utf-8-sig") as f:
+            return f.read()
+    response = session.get(spec["url"])
+    response.raise_for_status()
+    return response.text
+
+
+def _fetch_fred(series_id, spec, session):
+    """FRED graph CSV: a date column followed by the value, '.' for missing."""
+    url = FRED_CSV_URL.format(fred_id=spec.get("fred_id", series_id))
+    df = pd.read_csv(io.StringIO(_read_text(dict(spec, url=url), session)))
+    return pd.DataFrame({
+        "series_id": series_id,
+        "obs_date": df.iloc[:, 0],
+        "value": pd.to_numeric(df.iloc[:, 1], errors="coerce"),
+    })
+
+
+def _fetch_trends(series_id, spec, session):
+    """
+    Google Trends 'multiTimeline.csv' export: a category preamble, then a
+    Week/Day/Month header and one column per term. '<1' is stored as 0.
+    """
+    lines = _read_text(spec, session).splitlines()
+    header = next(i for i, line in enumerate(lines) if line.split(",")[0] in ("Week", "Day", "Month"))
+    df = pd.read_csv(io.StringIO("\n".join(lines[header:])))
+    column = spec.get("column", df.columns[1])
+    return pd.DataFrame({
+        "series_id": series_id,
+        "obs_date": df.iloc[:, 0],
+        "value": pd.to_numeric(df[column].astype(str).replace("<1", "0"), errors="coerce"),
+    })
+
+
+def _fetch_finra_short_interest(series_id, spec, session):
+    """
+    FINRA equity short interest file (pipe-delimited). Produces one series per
+    symbol, '<series_id>:<symbol>', dated by settlement date.
+    """
+    df = pd.read_csv(io.StringIO(_read_text(spec, session)), sep="|")
+    if spec.get("symbols"):
+        df = df[df["symbolCode"].isin(spec["symbols"])]
+    return pd.DataFrame({
+        "series_id": series_id + ":" + df["symbolCode"].astype(str),
+        "obs_date": df["settlementDate"],
+        "value": pd.to_numeric(df["currentShortPositionQuantity"], errors="coerce"),
+    })
+
+
+# Pluggable sources: name -> function(series_id, spec, session) returning
+# series_id, obs_date, value and optionally release_date.
+SOURCES = {
+    "fred": _fetch_fred,
+    "google_trends": _fetch_trends,
+    "finra_short_interest": _fetch_finra_short_interest,
+}
+
+
+def catalog(series_ids=None):
+    """Catalog rows for `series_ids`; 'base:SUFFIX' ids inherit their base definition."""
+    rows = []
+    for series_id in series_ids if series_ids is not None else SERIES:
+        spec = SERIES.get(series_id) or SERIES.get(str(series_id).split(":")[0])
+        if spec is None:
+            continue
+        rows.append({
+            "series_id": series_id,
+            "source": spec["source"],
+            "name": spec.get("name", series_id),
+            "frequency": spec.get("frequency"),
+            "units": spec.get("units"),
+            "release_lag_days": spec.get("release_lag_days", 0),
+        })
+    return pd.DataFrame(rows, columns=["series_id", "source", "name", "frequency", "units", "release_lag_days"])
+
+
+def fetch(series=None, session=None):
+    """
+    Fetches observations for the named series (default: all registered).
+    Returns series_id, obs_date, release_date, value; release_date falls back
+    to obs_date + release_lag_days when the source has no vintage dates.
+    """
+    session = session or httpTransport.get_session()
+    frames = []
+    for series_id in series or list(SERIES):
+        spec = SERIES.get(series_id)
+        if spec is None or spec["source"] not in SOURCES:
+            print(f"[WARN] Unknown series or source for '{series_id}'. Skipping.")
+            continue
+        try:
+            df = SOURCES[spec["source"]](series_id, spec, session)
+        except Exception as e:
+            print(f"[WARN] Failed to fetch series {series_id}: {e}")
+            continue
+
+        df = df.dropna(subset=["obs_date", "value"])
+        obs_date = pd.to_datetime(df["obs_date"])
+        if "release_date" in df.columns:
+            release_date = pd.to_datetime(df["release_date"])
+        else:
+            release_date = obs_date + pd.Timedelta(days=spec.get("release_lag_days", 0))
+        frames.append(pd.DataFrame({
+            "series_id": df["series_id"].to_numpy(),
+            "obs_date": obs_date.dt.strftime("%Y-%m-%d").to_numpy(),
+            "release_date": release_date.dt.strftime("%Y-%m-%d").to_numpy(),
+            "value": df["value"].astype(float).to_numpy(),
+        }))
+
+    if not frames:
+        print("No series observations fetched.")
+        return pd.DataFrame(columns=["series_id", "obs_date", "release_date", "value"])
+
+    master_df = pd.concat(frames, ignore_index=True)
+    print(f"Successfully fetched {len(master_df)} observations for {master_df['series_id'].nunique()} series.")
+    return master_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch macro / alternative-data series.")
+    parser.add_argument("--series", nargs="+", help="Series ids to fetch (default: all).")
+    parser.add_argument("--trends-csv", help="Google Trends multiTimeline.csv export to load as 'trends'.")
+    parser.add_argument("--short-interest", help="FINRA short interest file to load as 'short_interest'.")
+    args = parser.parse_args()
+
+    if args.trends_csv:
+        register("trends", source="google_trends", path=args.trends_csv, frequency="weekly",
+                 units="relative interest", release_lag_days=7)
+    if args.short_interest:
+        # FINRA publishes about seven business days after the settlement date.
+        register("short_interest", source="finra_short_interest", path=args.short_interest,
+                 frequency="semimonthly", units="shares", release_lag_days=11)
+    df = fetch(args.series)
+    print(df.tail())
@@ -0,0 +1,252 @@
+import hashlib
+
+import numpy as np
+from numba import njit
+
+# Kernels take NaN-free, date-ordered float64 arrays for one symbol and return a
+# tuple of output arrays of the same length, NaN where the indicator is still
+# warming up. They are path-dependent loops, so they are compiled with numba.
+
+
+@njit(cache=True)
+def _sma(x, length):
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    s = 0.0
+    for i in range(n):
+        s += x[i]
+        if i >= length:
+            s -= x[i - length]
+        if i >= length - 1:
+            out[i] = s / length
+    return out
+
+
+@njit(cache=True)
+def _ema(x, length):
+    # Seeded with the simple average of the first `length` values.
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if n < length:
+        return out
+    alpha = 2.0 / (length + 1.0)
+    seed = 0.0
+    for i in range(length):
+        seed += x[i]
+    prev = seed / length
+    out[length - 1] = prev
+    for i in range(length, n):
+        prev = alpha * x[i] + (1.0 - alpha) * prev
+        out[i] = prev
+    return out
+
+
+@njit(cache=True)
+def _rma(x, length, start):
+    # Wilder smoothing of x[start:], seeded with a simple average.
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if n - start < length:
+        return out
+    seed = 0.0
+    for i in range(start, start + length):
+        seed += x[i]
+    prev = seed / length
+    out[start + length - 1] = prev
+    for i in range(start + length, n):
+        prev = (prev * (length - 1) + x[i]) / length
+        out[i] = prev
+    return out
+
+
+@njit(cache=True)
+def sma(close, length):
+    return (_sma(close, length),)
+
+
+@njit(cache=True)
+def ema(close, length):
+    return (_ema(close, length),)
+
+
+@njit(cache=True)
+def rsi(close, length):
+    n = close.shape[0]
+    gains = np.zeros(n)
+    losses = np.zeros(n)
+    for i in range(1, n):
+        change = close[i] - close[i - 1]
+        if change > 0:
+            gains[i] = change
+        else:
+            losses[i] = -change
+    avg_gain = _rma(gains, length, 1)
+    avg_loss = _rma(losses, length, 1)
+    out = np.full(n, np.nan)
+    for i in range(n):
+        if np.isnan(avg_gain[i]):
+            continue
+        if avg_loss[i] == 0.0:
+            out[i] = 100.0 if avg_gain[i] > 0.0 else 50.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain[i] / avg_loss[i])
+    return (out,)
+
+
+@njit(cache=True)
+def atr(high, low, close, length):
+    n = close.shape[0]
+    tr = np.zeros(n)
+    for i in range(n):
+        hl = high[i] - low[i]
+        if i == 0:
+            tr[i] = hl
+        else:
+            tr[i] = max(hl, abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+    return (_rma(tr, length, 1),)
+
+
+@njit(cache=True)
+def macd(close, fast, slow, signal):
+    n = close.shape[0]
+    line = _ema(close, fast) - _ema(close, slow)
+    sig = np.full(n, np.nan)
+    first = slow - 1
+    if n > first:
+        sig_part = _ema(line[first:], signal)
+        sig[first:] = sig_part
+    return (line, sig, line - sig)
+
+
+@njit(cache=True)
+def bollinger(close, length, width):
+    n = close.shape[0]
+    mid = _sma(close, length)
+    upper = np.full(n, np.nan)
+    lower = np.full(n, np.nan)
+    for i in range(length - 1, n):
+        var = 0.0
+        for j in range(i - length + 1, i + 1):
+            d = close[j] - mid[i]
+            var += d * d
+        sd = np.sqrt(var / length)
+        upper[i] = mid[i] + width * sd
+        lower[i] = mid[i] - width * sd
+    return (mid, upper, lower)
+
+
+@njit(cache=True)
+def volatility(close, length, periods):
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    s = 0.0
+    ss = 0.0
+    r = np.zeros(n)
+    for i in range(1, n):
+        r[i] = np.log(close[i] / close[i - 1])
+        s += r[i]
+        ss += r[i] * r[i]
+        if i > length:
+            s -= r[i - length]
+            ss -= r[i - length] * r[i - length]
+        if i >= length:
+            var = (ss - s * s / length) / (length - 1)
+            out[i] = np.sqrt(max(var, 0.0) * periods)
+    return (out,)
+
+
+@njit(cache=True)
+def adv(close, volume, length):
+    """Average daily dollar volume."""
+    return (_sma(close * volume, length),)
+
+
+@njit(cache=True)
+def amihud(close, volume, length):
+    """Amihud illiquidity: rolling mean of |return| per dollar traded, scaled by 1e6."""
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    daily = np.full(n, np.nan)
+    for i in range(1, n):
+        dollar_volume = close[i] * volume[i]
+        if dollar_volume > 0.0:
+            daily[i] = abs(close[i] / close[i - 1] - 1.0) / dollar_volume * 1e6
+    s = 0.0
+    count = 0
+    for i in range(1, n):
+        if not np.isnan(daily[i]):
+            s += daily[i]
+            count += 1
+        if i > length and not np.isnan(daily[i - length]):
+            s -= daily[i - length]
+            count -= 1
+        if i >= length and count > 0:
+            out[i] = s / count
+    return (out,)
+
+
+# Each entry declares one indicator: the kernel, the price columns it reads in
+# order, its parameters, and the feature names of its outputs. Bump `version`
+# when a kernel's maths changes so stored values are recomputed.
+INDICATOR_REGISTRY = {
+    "sma_20": {"kernel": sma, "inputs": ["close"], "params": {"length": 20}},
+    "sma_50": {"kernel": sma, "inputs": ["close"], "params": {"length": 50}},
+    "ema_12": {"kernel": ema, "inputs": ["close"], "params": {"length": 12}},
+    "ema_26": {"kernel": ema, "inputs": ["close"], "params": {"length": 26}},
+    "rsi_14": {"kernel": rsi, "inputs": ["close"], "params": {"length": 14}},
+    "atr_14": {"kernel": atr, "inputs": ["high", "low", "close"], "params": {"length": 14}},
+    "macd_12_26_9": {
+        "kernel": macd, "inputs": ["close"],
+        "params": {"fast": 12, "slow": 26, "signal": 9},
+        "outputs": ["macd_12_26_9", "macd_12_26_9_signal", "macd_12_26_9_hist"],
+    },
+    "bbands_20_2": {
+        "kernel": bollinger, "inputs": ["close"],
+        "params": {"length": 20, "width": 2.0},
+        "outputs": ["bbands_20_2_mid", "bbands_20_2_upper", "bbands_20_2_lower"],
+    },
+    "volatility_30": {"kernel": volatility, "inputs": ["close"], "params": {"length": 30, "periods": 252}},
+    "adv_20": {"kernel": adv, "inputs": ["close", "volume"], "params": {"length": 20}},
+    "amihud_20": {"kernel": amihud, "inputs": ["close", "volume"], "params": {"length": 20}},
+}
+
+
+def outputs(key):
+    return INDICATOR_REGISTRY[key].get("outputs", [key])
+
+
+def definition_hash(key):
+    """Fingerprint of an indicator's declaration; changes whenever it must be recomputed."""
+    spec = INDICATOR_REGISTRY[key]
+    text = "|".join([
+        spec["kernel"].__name__,
+        ",".join(spec["inputs"]),
+        ",".join(f"{k}={v}" for k, v in sorted(spec["params"].items())),
+        ",".join(outputs(key)),
+        str(spec.get("version", 1)),
+    ])
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def compute(key, columns):
+    """
+    Runs indicator `key` on a dict of price arrays. Returns {feature_name: array}.
+
+    Rows where any input is NaN (NULL fields in 'daily_metrics') are left out
+    of the kernel, which sees the remaining bars as consecutive, and are NaN
+    in the output.
+    """
+    spec = INDICATOR_REGISTRY[key]
+    args = [np.asarray(columns[c], dtype=np.float64) for c in spec["inputs"]]
+    valid = np.logical_and.reduce([np.isfinite(a) for a in args])
+    if valid.all():
+        results = spec["kernel"](*[np.ascontiguousarray(a) for a in args], **spec["params"])
+        return dict(zip(outputs(key), results))
+
+    results = spec["kernel"](*[np.ascontiguousarray(a[valid]) for a in args], **spec["params"])
+    out = {}
+    for name, values in zip(outputs(key), results):
+        full = np.full(valid.shape[0], np.nan)
+        full[valid] = values
+        out[name] = full
+    return out
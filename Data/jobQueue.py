@@ -0,0 +1,255 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_BATCH_SIZE = 50
+
+# The queue lives in the SQLite database in WAL mode, whose shared-memory
+# index only works between processes on the same host: run every worker on
+# the machine that holds the database file, never against a network share.
+
+
+def _connect(db_path=None):
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA busy_timeout=30000;")
+    return conn
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(fetcher, symbols, batch_size=DEFAULT_BATCH_SIZE, max_attempts=3, db_path=None):
+    """Splits `symbols` into batches and queues one job per batch. Returns the job count."""
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        conn.executemany(
+            "INSERT INTO jobs (fetcher, payload, max_attempts) VALUES (?, ?, ?);",
+            [(fetcher, json.dumps(batch), max_attempts) for batch in batches],
+        )
+        conn.execute("COMMIT;")
+    finally:
+        conn.close()
+    print(f"Queued {len(batches)} '{fetcher}' jobs for {len(symbols)} symbols.")
+    return len(batches)
+
+
+def claim(worker_id, lease_seconds=DEFAULT_LEASE_SECONDS, fetchers=None, db_path=None):
+    """
+    Atomically leases the oldest pending job, or one whose lease has expired
+    and that has attempts left. Expired leases that are out of attempts are
+    marked failed in the same transaction.
+    Returns (job_id, fetcher, symbols, attempt) or None when nothing is claimable.
+    """
+    now = time.time()
+    fetcher_sql, fetcher_params = "", []
+    if fetchers:
+        fetcher_sql = f" AND fetcher IN ({','.join('?' * len(fetchers))})"
+        fetcher_params = list(fetchers)
+
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        conn.execute(f"""
+        UPDATE jobs SET
+            status = 'failed',
+            lease_owner = NULL,
+            lease_expires_at = NULL,
+            last_error = COALESCE(last_error, 'lease expired'),
+            finished_at = datetime('now')
+        WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= max_attempts{fetcher_sql};
+        """, [now] + fetcher_params)
+        row = conn.execute(f"""
+        UPDATE jobs SET
+            status = 'leased',
+            lease_owner = ?,
+            lease_expires_at = ?,
+            heartbeat_at = ?,
+            attempts = attempts + 1
+        WHERE id = (
+            SELECT id FROM jobs
+            WHERE (status = 'pending'
+                   OR (status = 'leased' AND lease_expires_at < ? AND attempts < max_attempts)){fetcher_sql}
+            ORDER BY id
+            LIMIT 1
+        )
+        RETURNING id, fetcher, payload, attempts;
+        """, [worker_id, now + lease_seconds, now, now] + fetcher_params).fetchone()
+        conn.execute("COMMIT;")
+    except Exception:
+        conn.execute("ROLLBACK;")
+        raise
+    finally:
+        conn.close()
+
+    if row is None:
+        return None
+    return row[0], row[1], json.loads(row[2]), row[3]
+
+
+def heartbeat(job_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS, db_path=None):
+    """Extends a lease. Returns False if the lease was lost to another worker."""
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        cursor = conn.execute("""
+        UPDATE jobs SET lease_expires_at = ?, heartbeat_at = ?
+        WHERE id = ? AND lease_owner = ? AND status = 'leased';
+        """, (now + lease_seconds, now, job_id, worker_id))
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+
+def complete(job_id, worker_id, db_path=None):
+    conn = _connect(db_path)
+    try:
+        cursor = conn.execute("""
+        UPDATE jobs SET status = 'done', finished_at = datetime('now'), lease_expires_at = NULL
+        WHERE id = ? AND lease_owner = ? AND status = 'leased';
+        """, (job_id, worker_id))
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+
+def fail(job_id, worker_id, error, db_path=None):
+    """Releases a failed job for retry, or marks it failed after max_attempts."""
+    conn = _connect(db_path)
+    try:
+        cursor = conn.execute("""
+        UPDATE jobs SET
+            status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+            lease_owner = NULL,
+            lease_expires_at = NULL,
+            last_error = ?,
+            finished_at = CASE WHEN attempts >= max_attempts THEN datetime('now') END
+        WHERE id = ? AND lease_owner = ? AND status = 'leased';
+        """, (str(error)[:1000], job_id, worker_id))
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+
+def status(db_path=None):
+    """Job counts by fetcher and status."""
+    conn = _connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT fetcher, status, COUNT(*) FROM jobs GROUP BY fetcher, status ORDER BY fetcher, status"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def now(db_path=None):
+    """The database's current UTC time, in the format of 'finished_at'."""
+    conn = _connect(db_path)
+    try:
+        return conn.execute("SELECT datetime('now')").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def finished_fetchers(since, db_path=None):
+    """Fetchers with at least one job completed at or after `since` (see `now`)."""
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT DISTINCT fetcher FROM jobs WHERE status = 'done' AND finished_at >= ?", (since,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row[0] for row in rows}
+
+
+def _outstanding(fetchers=None, db_path=None):
+    fetcher_sql, params = "", []
+    if fetchers:
+        fetcher_sql = f" AND fetcher IN ({','.join('?' * len(fetchers))})"
+        params = list(fetchers)
+    conn = _connect(db_path)
+    try:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased'){fetcher_sql}", params
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+class _Heartbeat(threading.Thread):
+    """Renews a job's lease every third of the lease length until stopped."""
+
+    def __init__(self, job_id, worker_id, lease_seconds, db_path):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.db_path = db_path
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.lease_seconds / 3.0):
+            try:
+                if not heartbeat(self.job_id, self.worker_id, self.lease_seconds, self.db_path):
+                    self.lost = True
+                    return
+            except sqlite3.OperationalError as e:
+                print(f"[WARN] Heartbeat for job {self.job_id} failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def run_worker(handler, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+               fetchers=None, poll_interval=2.0, exit_when_idle=True, db_path=None):
+    """
+    Claims and runs jobs until no job is pending or leased (or forever when
+    `exit_when_idle` is False). `handler(fetcher, symbols)` does the work; an
+    exception releases the job for retry. A background heartbeat keeps the
+    lease alive, so only jobs of crashed or stalled workers expire and get
+    reclaimed. Returns the number of jobs completed by this worker.
+    """
+    worker_id = worker_id or default_worker_id()
+    completed = 0
+    while True:
+        job = claim(worker_id, lease_seconds, fetchers, db_path)
+        if job is None:
+            # Leased jobs may still come back if their worker dies, so only
+            # stop once nothing is pending or leased.
+            if exit_when_idle and not _outstanding(fetchers, db_path):
+                break
+            time.sleep(poll_interval)
+            continue
+
+        job_id, fetcher, symbols, attempt = job
+        print(f"[{worker_id}] job {job_id}: {fetcher} x {len(symbols)} symbols (attempt {attempt})")
+        beat = _Heartbeat(job_id, worker_id, lease_seconds, db_path)
+        beat.start()
+        try:
+            handler(fetcher, symbols)
+        except Exception as e:
+            beat.stop()
+            print(f"[{worker_id}] job {job_id} failed: {e}")
+            fail(job_id, worker_id, e, db_path)
+            continue
+        beat.stop()
+
+        if complete(job_id, worker_id, db_path):
+            completed += 1
+        else:
+            print(f"[{worker_id}] lease on job {job_id} was lost; another worker reclaimed it.")
+
+    print(f"[{worker_id}] queue drained after {completed} jobs.")
+    return completed
@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+
+import pandas as pd
+import websockets
+
+import DBManager
+
+BAR_COLUMNS = [
+    "asset_symbol", "bar_time", "open", "high", "low", "close", "volume",
+    "tick_count", "ma_20", "ma_50", "rsi_14", "volatility_30"
+]
+
+
+class RingBuffer:
+    """Fixed-size buffer. `push` is O(1) and returns the value it evicted, if any."""
+
+    __slots__ = ("_data", "_size", "_pos", "count")
+
+    def __init__(self, size):
+        self._data = [0.0] * size
+        self._size = size
+        self._pos = 0
+        self.count = 0
+
+    def push(self, value):
+        evicted = self._data[self._pos] if self.count == self._size else None
+        self._data[self._pos] = value
+        self._pos = (self._pos + 1) % self._size
+        if self.count < self._size:
+            self.count += 1
+        return evicted
+
+    def full(self):
+        return self.count == self._size
+
+    def values(self):
+        """Oldest-to-newest copy of the buffer contents."""
+        if self.count < self._size:
+            return self._data[:self.count]
+        return self._data[self._pos:] + self._data[:self._pos]
+
+
+class RollingMean:
+    """Simple moving average over the last `window` values, NaN until the window fills."""
+
+    __slots__ = ("_ring", "_sum", "value")
+
+    def __init__(self, window):
+        self._ring = RingBuffer(window)
+        self._sum = 0.0
+        self.value = math.nan
+
+    def update(self, x):
+        evicted = self._ring.push(x)
+        self._sum += x - (evicted if evicted is not None else 0.0)
+        if self._ring.full():
+            self.value = self._sum / self._ring.count
+        return self.value
+
+
+class RollingVolatility:
+    """Sample standard deviation of log returns over the last `window` returns."""
+
+    __slots__ = ("_ring", "_sum", "_sumsq", "_last", "value")
+
+    def __init__(self, window):
+        self._ring = RingBuffer(window)
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._last = None
+        self.value = math.nan
+
+    def update(self, price):
+        last, self._last = self._last, price
+        if last is None or last <= 0 or price <= 0:
+            return self.value
+        r = math.log(price / last)
+        evicted = self._ring.push(r)
+        if evicted is not None:
+            self._sum -= evicted
+            self._sumsq -= evicted * evicted
+        self._sum += r
+        self._sumsq += r * r
+        n = self._ring.count
+        if self._ring.full() and n > 1:
+            var = (self._sumsq - self._sum * self._sum / n) / (n - 1)
+            self.value = math.sqrt(var) if var > 0 else 0.0
+        return self.value
+
+
+class WilderRSI:
+    """RSI with Wilder smoothing: seeded by a simple average, then O(1) per update."""
+
+    __slots__ = ("_length", "_last", "_n", "_gain", "_loss", "value")
+
+    def __init__(self, length=14):
+        self._length = length
+        self._last = None
+        self._n = 0
+        self._gain = 0.0
+        self._loss = 0.0
+        self.value = math.nan
+
+    def update(self, price):
+        last, self._last = self._last, price
+        if last is None:
+            return self.value
+        change = price - last
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        length = self._length
+        if self._n < length:
+            self._gain += gain / length
+            self._loss += loss / length
+            self._n += 1
+            if self._n < length:
+                return self.value
+        else:
+            self._gain = (self._gain * (length - 1) + gain) / length
+            self._loss = (self._loss * (length - 1) + loss) / length
+        if self._loss == 0:
+            self.value = 100.0 if self._gain > 0 else 50.0
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + self._gain / self._loss)
+        return self.value
+
+
+class SymbolState:
+    """Per-symbol indicators over tick windows plus the minute bar being built."""
+
+    __slots__ = ("symbol", "ma_20", "ma_50", "rsi_14", "volatility_30", "bar")
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.ma_20 = RollingMean(20)
+        self.ma_50 = RollingMean(50)
+        self.rsi_14 = WilderRSI(14)
+        self.volatility_30 = RollingVolatility(30)
+        self.bar = None
+
+    def on_tick(self, price, size, ts_ms):
+        """Updates indicators and returns the previous minute's bar if this tick closed it."""
+        minute = int(ts_ms // 60000)
+        bar = self.bar
+        completed = None
+        if bar is None or bar[0] != minute:
+            # Close the previous bar before this tick reaches the indicators,
+            # so its snapshot only reflects ticks inside that minute.
+            if bar is not None:
+                completed = self._close_bar()
+            self.bar = [minute, price, price, price, price, size, 1]
+        else:
+            if price > bar[2]:
+                bar[2] = price
+            if price < bar[3]:
+                bar[3] = price
+            bar[4] = price
+            bar[5] += size
+            bar[6] += 1
+
+        self.ma_20.update(price)
+        self.ma_50.update(price)
+        self.rsi_14.update(price)
+        self.volatility_30.update(price)
+        return completed
+
+    def _close_bar(self):
+        minute, o, h, l, c, v, n = self.bar
+        bar_time = time.strftime("%Y-%m-%d %H:%M:00", time.gmtime(minute * 60))
+        return (
+            self.symbol, bar_time, o, h, l, c, v, n,
+            self.ma_20.value, self.ma_50.value, self.rsi_14.value, self.volatility_30.value
+        )
+
+    def flush_open_bar(self):
+        if self.bar is None:
+            return None
+        completed = self._close_bar()
+        self.bar = None
+        return completed
+
+
+class TickIngestor:
+    """
+    Consumes quote/trade messages, keeps per-symbol state, and writes completed
+    minute bars to the database in batches.
+
+    Messages are JSON objects with 'symbol', 'ts' (epoch ms) and either 'price'
+    and 'size' (trades) or 'bid' and 'ask' (quotes, priced at the mid).
+    An optional 'sent' epoch-seconds stamp is used to measure end-to-end latency.
+    """
+
+    def __init__(self, flush_batch_size=500, flush_interval=5.0, latency_samples=100000):
+        self.states = {}
+        self.pending_bars = []
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval
+        self.messages = 0
+        self.bars_written = 0
+        self.latencies = RingBuffer(latency_samples)
+        self._last_flush = time.monotonic()
+
+    def handle(self, msg):
+        symbol = msg.get("symbol")
+        ts = msg.get("ts")
+        if symbol is None or ts is None:
+            return
+        if "price" in msg:
+            price = float(msg["price"])
+            size = float(msg.get("size") or 0.0)
+        elif "bid" in msg and "ask" in msg:
+            price = (float(msg["bid"]) + float(msg["ask"])) / 2.0
+            size = 0.0
+        else:
+            return
+
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = SymbolState(symbol)
+        completed = state.on_tick(price, size, ts)
+        if completed is not None:
+            self.pending_bars.append(completed)
+
+        self.messages += 1
+        sent = msg.get("sent")
+        if sent is not None:
+            self.latencies.push(time.time() - sent)
+
+    def should_flush(self):
+        return (
+            len(self.pending_bars) >= self.flush_batch_size
+            or (self.pending_bars and time.monotonic() - self._last_flush >= self.flush_interval)
+        )
+
+    def take_pending(self, include_open=False):
+        if include_open:
+            for state in self.states.values():
+                bar = state.flush_open_bar()
+                if bar is not None:
+                    self.pending_bars.append(bar)
+        bars, self.pending_bars = self.pending_bars, []
+        self._last_flush = time.monotonic()
+        self.bars_written += len(bars)
+        return pd.DataFrame(bars, columns=BAR_COLUMNS)
+
+    def latency_percentiles(self, percentiles=(50, 99)):
+        samples = sorted(self.latencies.values())
+        if not samples:
+            return {}
+        return {
+            p: samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+            for p in percentiles
+        }
+
+
+async def run(url, ingestor=None, max_messages=None):
+    """
+    Connects to a quote/trade WebSocket at `url` and ingests until the feed
+    closes (or `max_messages` have been handled). Bar flushes run in a worker
+    thread so the socket keeps draining while SQLite writes.
+    """
+    ingestor = ingestor or TickIngestor()
+    flush_task = None
+
+    async with websockets.connect(url, max_queue=None) as ws:
+        async for raw in ws:
+            payload = json.loads(raw)
+            for msg in payload if isinstance(payload, list) else (payload,):
+                ingestor.handle(msg)
+
+            if ingestor.should_flush() and (flush_task is None or flush_task.done()):
+                flush_task = asyncio.create_task(
+                    asyncio.to_thread(DBManager.upsert_intraday_bars, ingestor.take_pending())
+                )
+            if max_messages and ingestor.messages >= max_messages:
+                break
+
+    if flush_task is not None:
+        await flush_task
+    await asyncio.to_thread(DBManager.upsert_intraday_bars, ingestor.take_pending(include_open=True))
+    return ingestor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TT2 live quote ingestion into minute bars.")
+    parser.add_argument("url", help="WebSocket feed URL, e.g. ws://127.0.0.1:8766")
+    parser.add_argument("--max-messages", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = asyncio.run(run(args.url, max_messages=args.max_messages))
+    elapsed = time.perf_counter() - start
+    print(f"Ingested {result.messages} messages for {len(result.states)} symbols "
+          f"in {elapsed:.1f}s; wrote {result.bars_written} minute bars.")
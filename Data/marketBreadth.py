@@ -0,0 +1,124 @@
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import DBManager
+import panels
+
+HIGH_LOW_WINDOW = 252
+HIGH_LOW_MIN_BARS = 200
+# Calendar days of history loaded ahead of the earliest refreshed date so the
+# 52-week window is complete.
+LOOKBACK_DAYS = 380
+
+
+def _row_percentiles(values, percentiles):
+    """Per-row linear-interpolated percentiles ignoring NaN; NaN for empty rows."""
+    ordered = np.sort(values, axis=1)
+    counts = np.isfinite(values).sum(axis=1)
+    out = np.full((values.shape[0], len(percentiles)), np.nan)
+    has = counts > 0
+    rows = np.flatnonzero(has)
+    for j, q in enumerate(percentiles):
+        pos = (counts[has] - 1) * q / 100.0
+        lo = np.floor(pos).astype(int)
+        hi = np.ceil(pos).astype(int)
+        frac = pos - lo
+        out[has, j] = ordered[rows, lo] * (1 - frac) + ordered[rows, hi] * frac
+    return out
+
+
+def compute(dates, close, ma_50d, volatility, rows):
+    """
+    Breadth statistics for the panel rows in `rows`, computed across all
+    symbols at once. Advance/decline compares each symbol's close with its
+    previous available close; new highs/lows compare the close with the
+    extreme of the prior 252 bars of our own price history.
+    """
+    prev_close = np.full_like(close, np.nan)
+    prev_close[1:] = panels.ffill(close)[:-1]
+
+    closes = close[rows]
+    prev = prev_close[rows]
+    both = np.isfinite(closes) & np.isfinite(prev)
+    advancers = ((closes > prev) & both).sum(axis=1)
+    decliners = ((closes < prev) & both).sum(axis=1)
+    unchanged = ((closes == prev) & both).sum(axis=1)
+
+    ma = ma_50d[rows]
+    has_ma = np.isfinite(closes) & np.isfinite(ma)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct_above = ((closes > ma) & has_ma).sum(axis=1) / has_ma.sum(axis=1) * 100.0
+
+    frame = pd.DataFrame(close)
+    prior_max = frame.rolling(HIGH_LOW_WINDOW, min_periods=HIGH_LOW_MIN_BARS).max().shift(1).to_numpy()[rows]
+    prior_min = frame.rolling(HIGH_LOW_WINDOW, min_periods=HIGH_LOW_MIN_BARS).min().shift(1).to_numpy()[rows]
+    with np.errstate(invalid="ignore"):
+        new_highs = (closes > prior_max).sum(axis=1)
+        new_lows = (closes < prior_min).sum(axis=1)
+
+    vol_pct = _row_percentiles(volatility[rows], (10, 50, 90))
+
+    return pd.DataFrame({
+        "date": dates[rows],
+        "advancers": advancers,
+        "decliners": decliners,
+        "unchanged": unchanged,
+        "symbols": np.isfinite(closes).sum(axis=1),
+        "pct_above_ma50": pct_above,
+        "new_highs_52w": new_highs,
+        "new_lows_52w": new_lows,
+        "volatility_p10": vol_pct[:, 0],
+        "volatility_p50": vol_pct[:, 1],
+        "volatility_p90": vol_pct[:, 2],
+    })
+
+
+def refresh(dates=None):
+    """
+    Updates 'market_breadth'. With `dates` (e.g. the dates of the latest
+    daily_metrics upsert) only those dates and the trading day after each are
+    recomputed, since that day's advance/decline depends on them. Without
+    `dates` every stored date is rebuilt.
+    """
+    start = None
+    if dates is not None:
+        dates = sorted({str(d) for d in dates})
+        if not dates:
+            return
+        earliest = date.fromisoformat(dates[0]) - timedelta(days=LOOKBACK_DAYS)
+        start = earliest.isoformat()
+
+    panel_dates, _, arrays = panels.load_panel(
+        ["close", "ma_50d", "volatility_30d"], start=start, db_path=DBManager.DB_PATH
+    )
+    if len(panel_dates) == 0:
+        print("No daily metrics available for market breadth.")
+        return
+
+    if dates is None:
+        rows = np.arange(len(panel_dates))
+    else:
+        touched = np.flatnonzero(np.isin(panel_dates, dates))
+        rows = np.unique(np.concatenate([touched, touched + 1]))
+        rows = rows[rows < len(panel_dates)]
+        if len(rows) == 0:
+            return
+
+    breadth_df = compute(
+        panel_dates, arrays["close"], arrays["ma_50d"], arrays["volatility_30d"], rows
+    )
+    DBManager.upsert_market_breadth(breadth_df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild or refresh market breadth aggregates.")
+    parser.add_argument("--dates", nargs="+", help="Only refresh these YYYY-MM-DD dates.")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    refresh(args.dates)
+    print(f"Market breadth refreshed in {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+
+import adjustments
+import archive
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+PANEL_COLUMNS = {
+    "open", "high", "low", "close", "volume",
+    "volatility_30d", "ma_20d", "ma_50d", "rsi_14d"
+}
+
+
+def load_panel(columns=("close",), symbols=None, start=None, end=None, db_path=None, adjusted=True):
+    """
+    Reads 'daily_metrics' columns into dense dates x symbols arrays.
+    Returns (dates, symbols, {column: float64 array}) with NaN where a symbol
+    has no bar on a date. Dates and symbols are sorted numpy string arrays.
+    Archived years are read from their partitions when the range covers them.
+    With `adjusted`, prices and volume are split/dividend adjusted at read time.
+    """
+    unknown = set(columns) - PANEL_COLUMNS
+    if unknown:
+        raise ValueError(f"Unknown panel columns: {sorted(unknown)}")
+
+    df = archive.read_daily_metrics(columns, symbols, start, end, db_path=db_path or DB_PATH)
+
+    dates, date_idx = np.unique(df["date"].to_numpy(dtype=str), return_inverse=True)
+    syms, sym_idx = np.unique(df["asset_symbol"].to_numpy(dtype=str), return_inverse=True)
+    arrays = {}
+    for column in columns:
+        panel = np.full((len(dates), len(syms)), np.nan)
+        panel[date_idx, sym_idx] = df[column].to_numpy(dtype=np.float64)
+        arrays[column] = panel
+    if adjusted:
+        adjustments.adjust_panel(dates, syms, arrays, db_path=db_path)
+    return dates, syms, arrays
+
+
+def ffill(panel):
+    """Forward-fills NaN down each column of a dates x symbols array."""
+    n = panel.shape[0]
+    idx = np.where(np.isfinite(panel), np.arange(n)[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    filled = panel[idx, np.arange(panel.shape[1])[None, :]]
+    return filled
@@ -0,0 +1,398 @@
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import adjustments
+import archive
+import panels
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+DEFAULT_PORT = 8765
+POOL_SIZE = 8
+CACHE_BYTES = 64 * 1024 * 1024
+STREAM_CHUNK_ROWS = 5000
+
+SNAPSHOT_COLUMNS = [
+    "asset_symbol", "date", "open", "high", "low", "close", "volume", "volatility_30d",
+    "ma_20d", "ma_50d", "rsi_14d", "recommendation_mean", "recommendation_key",
+    "analyst_count", "target_mean_price"
+]
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _list_param(params, name):
+    raw = params.get(name, [""])[0]
+    return [v for v in raw.split(",") if v] or None
+
+
+def _param(params, name, default=None):
+    return params.get(name, [default])[0]
+
+
+def _jsonable(df):
+    return df.astype(object).where(pd.notnull(df), None)
+
+
+class QueryService:
+    """
+    Read-only access to the database for dashboards and notebooks.
+
+    Queries run on a fixed pool of read-only connections; under WAL they
+    neither block nor are blocked by the fetchers' writes. Responses are
+    cached in memory per URL until the next commit by any writer, detected
+    through `PRAGMA data_version` on a dedicated watcher connection.
+    """
+
+    def __init__(self, db_path=None, pool_size=POOL_SIZE, cache_bytes=CACHE_BYTES):
+        self.db_path = os.path.abspath(db_path or DB_PATH)
+        self.boot_id = uuid.uuid4().hex[:8]
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        self._watcher = self._connect()
+        self._watch_lock = threading.Lock()
+        self._data_version = None
+        self.generation = 0
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_limit = cache_bytes
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA query_only=1;")
+        return conn
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+        self._watcher.close()
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def current_generation(self):
+        """Bumps the generation (and drops the cache) when another connection has committed."""
+        with self._watch_lock:
+            version = self._watcher.execute("PRAGMA data_version;").fetchone()[0]
+            if version != self._data_version:
+                self._data_version = version
+                self.generation += 1
+                with self._cache_lock:
+                    self._cache.clear()
+                    self._cache_bytes = 0
+            return self.generation
+
+    def etag(self, generation, key):
+        digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+        return f'"{self.boot_id}-{generation}-{digest}"'
+
+    def cached(self, key, generation):
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == generation:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def store(self, key, generation, body):
+        if len(body) > self._cache_limit // 4:
+            return
+        with self._cache_lock:
+            if generation != self.generation:
+                return
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cache_bytes -= len(old[1])
+            self._cache[key] = (generation, body)
+            self._cache_bytes += len(body)
+            while self._cache_bytes > self._cache_limit:
+                _, (_, evicted) = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def _frame(self, query, params):
+        with self.connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    # --- Endpoints returning a whole JSON document ---
+
+    def assets(self, params):
+        query = "SELECT symbol, name, asset_class, source, is_active FROM assets WHERE 1=1"
+        args = []
+        active = _param(params, "active", "1") == "1"
+        if _param(params, "source"):
+            # Universe membership, not the source a symbol was first seen in.
+            open_only = " AND valid_to IS NULL" if active else ""
+            query += f" AND symbol IN (SELECT asset_symbol FROM universe_membership WHERE universe = ?{open_only})"
+            args.append(_param(params, "source"))
+        if active:
+            query += " AND is_active = 1"
+        query += " ORDER BY symbol"
+        return _jsonable(self._frame(query, args)).to_dict(orient="records")
+
+    def latest(self, params):
+        query = f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM latest_snapshot"
+        symbols = _list_param(params, "symbols")
+        args = []
+        if symbols:
+            query += f" WHERE asset_symbol IN ({','.join('?' * len(symbols))})"
+            args = symbols
+        query += " ORDER BY asset_symbol"
+        return _jsonable(self._frame(query, args)).to_dict(orient="records")
+
+    def earnings(self, params):
+        query = ("SELECT asset_symbol, earnings_date, report_time, eps_estimate, eps_reported, "
+                 "eps_surprise_pct FROM earnings_dates WHERE 1=1")
+        args = []
+        if _param(params, "start"):
+            query += " AND earnings_date >= ?"
+            args.append(_param(params, "start"))
+        if _param(params, "end"):
+            query += " AND earnings_date <= ?"
+            args.append(_param(params, "end") + " 23:59:59")
+        symbols = _list_param(params, "symbols")
+        if symbols:
+            query += f" AND asset_symbol IN ({','.join('?' * len(symbols))})"
+            args += symbols
+        query += " ORDER BY earnings_date, asset_symbol"
+        return _jsonable(self._frame(query, args)).to_dict(orient="records")
+
+    def health(self, params):
+        return {
+            "generation": self.generation,
+            "cache_entries": len(self._cache),
+            "cache_bytes": self._cache_bytes,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+        }
+
+    # --- Streamed endpoint ---
+
+    def panel_chunks(self, params):
+        """
+        Long-format daily_metrics rows (asset_symbol, date, columns...) in
+        chunks of STREAM_CHUNK_ROWS, read incrementally from one cursor and
+        split/dividend adjusted unless adjusted=0.
+        """
+        columns = _list_param(params, "columns") or ["close"]
+        unknown = set(columns) - panels.PANEL_COLUMNS
+        if unknown:
+            raise BadRequest(f"Unknown columns: {sorted(unknown)}")
+        symbols = _list_param(params, "symbols")
+        start, end = _param(params, "start"), _param(params, "end")
+        query = f"SELECT asset_symbol, date, {', '.join(columns)} FROM daily_metrics WHERE 1=1"
+        args = []
+        if symbols:
+            query += f" AND asset_symbol IN ({','.join('?' * len(symbols))})"
+            args += symbols
+        if start:
+            query += " AND date >= ?"
+            args.append(start)
+        if end:
+            query += " AND date <= ?"
+            args.append(end)
+        # Archived years come first, read from their partitions; the cursor
+        # then only covers dates after them.
+        cold_until = archive.cold_until(self.db_path)
+        cold = None
+        if cold_until and (not start or start <= cold_until):
+            cold = archive.read_daily_metrics(
+                columns, symbols, start, min(end or cold_until, cold_until), db_path=self.db_path, order="date",
+            )
+            query += " AND date > ?"
+            args.append(cold_until)
+        query += " ORDER BY date, asset_symbol"
+        names = ["asset_symbol", "date"] + columns
+
+        adjusted = _param(params, "adjusted", "1") == "1"
+        with self.connection() as conn:
+            factors = None
+            if adjusted:
+                where = f" WHERE asset_symbol IN ({','.join('?' * len(symbols))})" if symbols else ""
+                factors = pd.read_sql_query(
+                    f"SELECT {', '.join(adjustments.FACTOR_COLUMNS)} FROM adjustment_factors{where}",
+                    conn, params=symbols or [],
+                )
+            yield names
+            if cold is not None:
+                for offset in range(0, len(cold), STREAM_CHUNK_ROWS):
+                    chunk = cold.iloc[offset:offset + STREAM_CHUNK_ROWS]
+                    if factors is not None and not factors.empty:
+                        chunk = adjustments.adjust_frame(chunk, factors)
+                    yield _jsonable(chunk).itertuples(index=False, name=None)
+            cursor = conn.execute(query, args)
+            while True:
+                rows = cursor.fetchmany(STREAM_CHUNK_ROWS)
+                if not rows:
+                    break
+                if factors is not None and not factors.empty:
+                    chunk = adjustments.adjust_frame(pd.DataFrame(rows, columns=names), factors)
+                    rows = _jsonable(chunk).itertuples(index=False, name=None)
+                yield rows
+
+
+ROUTES = {
+    "/assets": "assets",
+    "/latest": "latest",
+    "/earnings": "earnings",
+    "/health": "health",
+}
+
+
+def make_handler(service):
+    class QueryHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, etag=None, content_type="application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _not_modified(self, etag):
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return True
+            return False
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            key = f"{url.path}?{'&'.join(sorted(url.query.split('&')))}"
+            try:
+                generation = service.current_generation()
+                etag = service.etag(generation, key)
+                if url.path == "/panel":
+                    if not self._not_modified(etag):
+                        self._stream_panel(params, etag)
+                    return
+                method = ROUTES.get(url.path)
+                if method is None:
+                    self._send(404, json.dumps({"error": f"Unknown path {url.path}"}).encode())
+                    return
+                if method != "health" and self._not_modified(etag):
+                    return
+                body = service.cached(key, generation) if method != "health" else None
+                if body is None:
+                    body = json.dumps(getattr(service, method)(params), default=str).encode()
+                    if method != "health":
+                        service.store(key, generation, body)
+                self._send(200, body, etag if method != "health" else None)
+            except BadRequest as e:
+                self._send(400, json.dumps({"error": str(e)}).encode())
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            except Exception as e:
+                self._send(500, json.dumps({"error": str(e)}).encode())
+
+        def _write_chunk(self, data):
+            if data:
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+        def _stream_panel(self, params, etag):
+            chunks = service.panel_chunks(params)
+            try:
+                names = next(chunks)
+                self._write_panel(params, etag, names, chunks)
+            finally:
+                # Returns the pooled connection even if the client went away mid-stream.
+                chunks.close()
+
+        def _write_panel(self, params, etag, names, chunks):
+            ndjson = _param(params, "format") == "ndjson"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson" if ndjson else "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("ETag", etag)
+            self.end_headers()
+            try:
+                if ndjson:
+                    for rows in chunks:
+                        lines = (json.dumps(dict(zip(names, row))) for row in rows)
+                        self._write_chunk(("\n".join(lines) + "\n").encode())
+                else:
+                    self._write_chunk(f'{{"columns": {json.dumps(names)}, "rows": ['.encode())
+                    first = True
+                    for rows in chunks:
+                        body = ",".join(json.dumps(list(row)) for row in rows)
+                        if body:
+                            self._write_chunk(((",") if not first else "").encode() + body.encode())
+                            first = False
+                    self._write_chunk(b"]}")
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as e:
+                # The 200 is already on the wire, so a 500 cannot follow. Drop
+                # the connection without the final chunk so the client sees a
+                # truncated response rather than a complete-looking one.
+                print(f"[WARN] Panel stream for {self.path} failed mid-response: {e}")
+                self.close_connection = True
+                return
+            self.wfile.write(b"0\r\n\r\n")
+
+    return QueryHandler
+
+
+def start_service(db_path=None, host="127.0.0.1", port=0, pool_size=POOL_SIZE):
+    """Starts the service in a daemon thread. Returns (server, service, base_url)."""
+    service = QueryService(db_path, pool_size=pool_size)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, service, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only JSON query service over tt2_data.db.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    args = parser.parse_args()
+
+    service = QueryService(pool_size=args.pool_size)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+    print(f"Serving {service.db_path} on http://{args.host}:{args.port} "
+          f"(/assets, /latest, /panel, /earnings, /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,285 @@
+import argparse
+import json
+import sqlite3
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import DBManager
+import panels
+
+FEATURES = ["index_return", "index_volatility", "index_trend", "pct_above_ma50", "advance_decline"]
+VOL_WINDOW = 20
+TREND_WINDOW = 50
+# Daily updates re-estimate on this many trailing observations, warm-started
+# from the stored parameters, instead of the full history.
+FIT_WINDOW = 504
+WARM_ITERATIONS = 5
+LOOKBACK_DAYS = int((FIT_WINDOW + TREND_WINDOW) * 365 / 252) + 10
+MIN_OBSERVATIONS = 100
+
+
+def build_features(start=None):
+    """
+    Daily index-level and breadth features: equal-weighted log return of the
+    universe, its 20-day annualised volatility, the log distance of the index
+    from its 50-day mean, the share of symbols above their 50-day MA and the
+    net advance/decline ratio from 'market_breadth'. Rows with any missing
+    feature are dropped.
+    """
+    dates, _, arrays = panels.load_panel(["close"], start=start, db_path=DBManager.DB_PATH)
+    if len(dates) == 0:
+        return pd.DataFrame(columns=["date"] + FEATURES)
+
+    close = arrays["close"]
+    log_ret = np.full_like(close, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_ret[1:] = np.log(close[1:] / close[:-1])
+    finite = np.isfinite(log_ret)
+    counts = finite.sum(axis=1)
+    index_return = np.where(finite, log_ret, 0.0).sum(axis=1) / np.maximum(counts, 1)
+    index_return[counts == 0] = np.nan
+
+    r = pd.Series(index_return)
+    level = r.fillna(0.0).cumsum()
+    frame = pd.DataFrame({
+        "date": dates,
+        "index_return": index_return,
+        "index_volatility": r.rolling(VOL_WINDOW).std().to_numpy() * np.sqrt(252),
+        "index_trend": (level - level.rolling(TREND_WINDOW).mean()).to_numpy(),
+    })
+
+    query = "SELECT date, pct_above_ma50, advancers, decliners, symbols FROM market_breadth"
+    params = []
+    if start:
+        query += " WHERE date >= ?"
+        params.append(start)
+    with sqlite3.connect(DBManager.DB_PATH) as conn:
+        breadth = pd.read_sql_query(query, conn, params=params)
+    breadth["pct_above_ma50"] = breadth["pct_above_ma50"] / 100.0
+    breadth["advance_decline"] = (breadth["advancers"] - breadth["decliners"]) / breadth["symbols"].where(breadth["symbols"] > 0)
+
+    merged = frame.merge(breadth[["date", "pct_above_ma50", "advance_decline"]], on="date", how="inner")
+    return merged.dropna().reset_index(drop=True)
+
+
+# --- Gaussian HMM with diagonal covariances ---
+
+def _log_emissions(X, params):
+    means, variances = params["means"], params["variances"]
+    diff = X[:, None, :] - means[None, :, :]
+    return -0.5 * (np.log(2 * np.pi * variances)[None] + diff ** 2 / variances[None]).sum(axis=2)
+
+
+def _forward(log_b, transmat, predicted):
+    """
+    Scaled forward pass. `predicted` is the state distribution before the
+    first observation. Returns (filtered probabilities, scaled emissions,
+    scales, log-likelihood).
+    """
+    shift = log_b.max(axis=1, keepdims=True)
+    b = np.exp(log_b - shift)
+    alpha = np.empty_like(b)
+    scale = np.empty(len(b))
+    for t in range(len(b)):
+        a = predicted * b[t]
+        scale[t] = max(a.sum(), 1e-300)
+        alpha[t] = a / scale[t]
+        predicted = alpha[t] @ transmat
+    return alpha, b, scale, np.log(scale).sum() + shift.sum()
+
+
+def _backward(b, transmat, scale):
+    beta = np.ones_like(b)
+    for t in range(len(b) - 2, -1, -1):
+        beta[t] = transmat @ (b[t + 1] * beta[t + 1]) / scale[t + 1]
+    return beta
+
+
+def _initial_params(X, n_states):
+    """Deterministic start: states seeded from volatility quantile groups."""
+    order = np.argsort(X[:, FEATURES.index("index_volatility")], kind="stable")
+    groups = np.array_split(order, n_states)
+    transmat = np.full((n_states, n_states), 0.1 / max(n_states - 1, 1))
+    np.fill_diagonal(transmat, 0.9 if n_states > 1 else 1.0)
+    return {
+        "startprob": np.full(n_states, 1.0 / n_states),
+        "transmat": transmat,
+        "means": np.array([X[g].mean(axis=0) for g in groups]),
+        "variances": np.tile(X.var(axis=0), (n_states, 1)),
+    }
+
+
+def fit(X, n_states=3, params=None, n_iter=200, tol=1e-6):
+    """
+    Baum-Welch estimation on the rows of X. With `params` the EM iterations
+    start from those values (warm start), otherwise from `_initial_params`.
+    Returns (params, log_likelihood).
+    """
+    params = {k: np.array(v, dtype=np.float64) for k, v in (params or _initial_params(X, n_states)).items()}
+    var_floor = 1e-4 * X.var(axis=0) + 1e-12
+    previous = -np.inf
+    log_likelihood = previous
+    for _ in range(n_iter):
+        alpha, b, scale, log_likelihood = _forward(_log_emissions(X, params), params["transmat"], params["startprob"])
+        beta = _backward(b, params["transmat"], scale)
+        gamma = alpha * beta
+        gamma /= gamma.sum(axis=1, keepdims=True)
+        xi = params["transmat"] * (alpha[:-1].T @ (b[1:] * beta[1:] / scale[1:, None]))
+
+        weights = gamma.sum(axis=0) + 1e-12
+        transmat = xi + 1e-6
+        params["transmat"] = transmat / transmat.sum(axis=1, keepdims=True)
+        params["startprob"] = gamma[0]
+        params["means"] = (gamma.T @ X) / weights[:, None]
+        params["variances"] = np.maximum((gamma.T @ X ** 2) / weights[:, None] - params["means"] ** 2, var_floor)
+
+        if log_likelihood - previous < tol * abs(log_likelihood):
+            break
+        previous = log_likelihood
+    return params, log_likelihood
+
+
+def _order_states(params):
+    """
+    Relabels states by ascending mean index volatility, so state 0 is the
+    calmest. Returns (params, order) where new state i is old state order[i].
+    """
+    order = np.argsort(params["means"][:, FEATURES.index("index_volatility")])
+    return {
+        "startprob": params["startprob"][order],
+        "transmat": params["transmat"][np.ix_(order, order)],
+        "means": params["means"][order],
+        "variances": params["variances"][order],
+    }, order
+
+
+def filter_probabilities(X, params, previous=None):
+    """Filtered (causal) state probabilities, continuing from the previous day's if given."""
+    predicted = params["startprob"] if previous is None else np.asarray(previous) @ params["transmat"]
+    alpha, _, _, _ = _forward(_log_emissions(X, params), params["transmat"], predicted)
+    return alpha
+
+
+# --- Persistence ---
+
+def _load_model(model_key):
+    with sqlite3.connect(DBManager.DB_PATH) as conn:
+        row = conn.execute(
+            "SELECT n_states, params, filter_state, last_date, n_obs FROM regime_models WHERE model_key = ?",
+            (model_key,),
+        ).fetchone()
+    if row is None:
+        return None
+    params = json.loads(row[1])
+    return {
+        "n_states": row[0],
+        "features": params.pop("features"),
+        "params": {k: np.array(v) for k, v in params.items()},
+        "filter_state": np.array(json.loads(row[2])),
+        "last_date": row[3],
+        "n_obs": row[4],
+    }
+
+
+def _long(dates, probabilities):
+    n_states = probabilities.shape[1]
+    return pd.DataFrame({
+        "date": np.repeat(dates, n_states),
+        "state": np.tile(np.arange(n_states), len(dates)),
+        "probability": probabilities.ravel(),
+    })
+
+
+def _save(model_key, params, probabilities, dates, n_obs, log_likelihood, replace):
+    record = {
+        "model_key": model_key,
+        "n_states": len(params["startprob"]),
+        "params": json.dumps(dict({k: v.tolist() for k, v in params.items()}, features=FEATURES)),
+        "filter_state": json.dumps(probabilities[-1].tolist()),
+        "last_date": str(dates[-1]),
+        "n_obs": int(n_obs),
+        "log_likelihood": float(log_likelihood),
+    }
+    DBManager.upsert_regimes(record, _long(dates, probabilities), replace=replace)
+
+
+def update(model_key="default", n_states=3, refit=False):
+    """
+    Keeps the regime model and 'regime_probabilities' current.
+
+    The first run (or `refit`) estimates the model on the full feature history
+    and stores filtered probabilities for every date. Later runs only handle
+    dates after the model's last date: parameters are re-estimated on the
+    trailing FIT_WINDOW observations starting from the stored ones, and the
+    forward filter continues from the stored last-day distribution, so stored
+    history is never rewritten.
+    """
+    model = None if refit else _load_model(model_key)
+    if model is not None and (model["n_states"] != n_states or model["features"] != FEATURES):
+        print(f"Regime model '{model_key}' definition changed; refitting from scratch.")
+        model = None
+
+    if model is None:
+        features = build_features()
+        if len(features) < MIN_OBSERVATIONS:
+            print(f"Need {MIN_OBSERVATIONS} feature rows to fit regimes, have {len(features)} "
+                  "(is 'market_breadth' populated?).")
+            return
+        X = features[FEATURES].to_numpy(dtype=np.float64)
+        params, log_likelihood = fit(X, n_states)
+        params, _ = _order_states(params)
+        probabilities = filter_probabilities(X, params)
+        print(f"Fitted {n_states}-state regime model '{model_key}' on {len(X)} days.")
+        _save(model_key, params, probabilities, features["date"].to_numpy(), len(X), log_likelihood, True)
+        return
+
+    start = (date.fromisoformat(model["last_date"]) - timedelta(days=LOOKBACK_DAYS)).isoformat()
+    features = build_features(start)
+    new = features["date"] > model["last_date"]
+    if not new.any():
+        print(f"Regime model '{model_key}' is up to date.")
+        return
+
+    window = features[FEATURES].to_numpy(dtype=np.float64)[-FIT_WINDOW:]
+    params, log_likelihood = fit(window, n_states, params=model["params"], n_iter=WARM_ITERATIONS)
+    # A warm fit can swap states; relabel and carry the stored filter state along.
+    params, order = _order_states(params)
+    X_new = features.loc[new, FEATURES].to_numpy(dtype=np.float64)
+    probabilities = filter_probabilities(X_new, params, previous=model["filter_state"][order])
+    print(f"Updated regime model '{model_key}' with {len(X_new)} new days.")
+    _save(model_key, params, probabilities, features.loc[new, "date"].to_numpy(),
+          model["n_obs"] + len(X_new), log_likelihood, False)
+
+
+def load_regimes(model_key="default", start=None, end=None):
+    """Wide regime table: date, p_0 .. p_{k-1} and the most likely 'regime'."""
+    query = "SELECT date, state, probability FROM regime_probabilities WHERE model_key = ?"
+    params = [model_key]
+    if start:
+        query += " AND date >= ?"
+        params.append(start)
+    if end:
+        query += " AND date <= ?"
+        params.append(end)
+    with sqlite3.connect(DBManager.DB_PATH) as conn:
+        df = pd.read_sql_query(query, conn, params=params)
+    wide = df.pivot(index="date", columns="state", values="probability").sort_index()
+    wide.columns = [f"p_{state}" for state in wide.columns]
+    wide["regime"] = wide.to_numpy().argmax(axis=1) if len(wide) else []
+    return wide.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit or update the market regime model.")
+    parser.add_argument("--model", default="default")
+    parser.add_argument("--states", type=int, default=3)
+    parser.add_argument("--refit", action="store_true", help="Re-estimate on the full history.")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    update(args.model, args.states, args.refit)
+    print(f"Regimes done in {time.perf_counter() - t0:.2f}s")
+    print(load_regimes(args.model).tail(10).round(3).to_string(index=False))
@@ -0,0 +1,188 @@
+import argparse
+import re
+import sqlite3
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+SNAPSHOT_COLUMNS = [
+    "asset_symbol", "date", "open", "high", "low", "close", "volume",
+    "volatility_30d", "ma_20d", "ma_50d", "rsi_14d",
+    "recommendation_mean", "recommendation_key", "analyst_count", "target_mean_price"
+]
+TEXT_COLUMNS = {"asset_symbol", "date", "recommendation_key"}
+OPERATORS = {"<", "<=", ">", ">=", "=", "!=", "in"}
+
+_CLAUSE_RE = re.compile(r"^\s*(\w+)\s*(<=|>=|!=|=|<|>|\bin\b)\s*(.+?)\s*$", re.IGNORECASE)
+
+
+def _parse_value(text):
+    text = text.strip()
+    if text.startswith("(") and text.endswith(")"):
+        return [_parse_value(part) for part in text[1:-1].split(",") if part.strip()]
+    if text in SNAPSHOT_COLUMNS:
+        return ("column", text)
+    try:
+        return float(text)
+    except ValueError:
+        return text.strip("'\"")
+
+
+def parse(expression):
+    """
+    Parses a screen written as clauses joined by 'and', e.g.
+    "rsi_14d < 30 and close > ma_50d and recommendation_key in (buy, strong_buy)".
+    The right-hand side may be a number, a string, another snapshot column,
+    or a parenthesised list for 'in'. Returns a list of (column, op, value).
+    """
+    filters = []
+    for clause in re.split(r"\s+and\s+", expression.strip(), flags=re.IGNORECASE):
+        match = _CLAUSE_RE.match(clause)
+        if not match:
+            raise ValueError(f"Cannot parse screen clause: '{clause}'")
+        column, op, value = match.group(1), match.group(2).lower(), _parse_value(match.group(3))
+        if op == "in" and not isinstance(value, list):
+            value = [value]
+        filters.append((column, op, value))
+    return filters
+
+
+def _is_column_ref(value):
+    return isinstance(value, tuple)
+
+
+def _coerce(column, value):
+    """Checks one right-hand value against the column's type; numbers become floats."""
+    if column in TEXT_COLUMNS:
+        if not isinstance(value, str):
+            raise ValueError(f"Column '{column}' is text; compare it with a string, not {value!r}.")
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Column '{column}' is numeric; cannot compare it with {value!r}.") from None
+
+
+def _validate(filters, rank_by):
+    """Checks columns, operators and value types. Returns the filters with values coerced."""
+    checked = []
+    for column, op, value in filters:
+        if column not in SNAPSHOT_COLUMNS:
+            raise ValueError(f"Unknown screen column '{column}'.")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown screen operator '{op}'.")
+        if op == "in":
+            if any(_is_column_ref(v) for v in value):
+                raise ValueError(f"'in' takes a list of values, not columns, for '{column}'.")
+            value = [_coerce(column, v) for v in value]
+        elif _is_column_ref(value):
+            if len(value) != 2 or value[0] != "column" or value[1] not in SNAPSHOT_COLUMNS:
+                raise ValueError(f"Unknown screen column {value!r} compared with '{column}'.")
+            if (column in TEXT_COLUMNS) != (value[1] in TEXT_COLUMNS):
+                raise ValueError(f"Cannot compare text and numeric columns '{column}' and '{value[1]}'.")
+        else:
+            value = _coerce(column, value)
+        checked.append((column, op, value))
+    if rank_by is not None and rank_by not in SNAPSHOT_COLUMNS:
+        raise ValueError(f"Unknown rank column '{rank_by}'.")
+    return checked
+
+
+def compile_sql(filters, rank_by=None, ascending=True, limit=None):
+    """Compiles filters into one parameterised query over 'latest_snapshot'."""
+    filters = _validate(filters, rank_by)
+    clauses, params = [], []
+    for column, op, value in filters:
+        if op == "in":
+            clauses.append(f"{column} IN ({','.join('?' * len(value))})")
+            params += list(value)
+        elif _is_column_ref(value):
+            clauses.append(f"{column} {op} {value[1]}")
+        else:
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+
+    query = f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM latest_snapshot"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    if rank_by:
+        query += f" ORDER BY {rank_by} IS NULL, {rank_by} {'ASC' if ascending else 'DESC'}"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    return query, params
+
+
+def load_snapshot():
+    with sqlite3.connect(DB_PATH) as conn:
+        return pd.read_sql_query(f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM latest_snapshot", conn)
+
+
+_NUMPY_OPS = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater,
+    ">=": np.greater_equal, "=": np.equal, "!=": np.not_equal,
+}
+
+
+def mask(snapshot_df, filters):
+    """Evaluates filters as one boolean NumPy mask over an in-memory snapshot."""
+    filters = _validate(filters, None)
+    result = np.ones(len(snapshot_df), dtype=bool)
+
+    def _values(column):
+        # NULLs in a numeric column can leave it object-typed; NaN never matches.
+        if column in TEXT_COLUMNS:
+            return snapshot_df[column].to_numpy()
+        return pd.to_numeric(snapshot_df[column], errors="coerce").to_numpy(dtype=float)
+
+    for column, op, value in filters:
+        lhs = _values(column)
+        if op == "in":
+            result &= np.isin(lhs, value)
+            continue
+        rhs = _values(value[1]) if _is_column_ref(value) else value
+        if column in TEXT_COLUMNS:
+            present = pd.notnull(lhs) & pd.notnull(rhs)
+            result &= _NUMPY_OPS[op](lhs.astype(str), np.asarray(rhs, dtype=str)) & present
+        else:
+            rhs = np.asarray(rhs, dtype=float)
+            result &= _NUMPY_OPS[op](lhs, rhs) & ~np.isnan(lhs) & ~np.isnan(rhs)
+    return result
+
+
+def screen(filters, rank_by=None, ascending=True, limit=None, snapshot_df=None):
+    """
+    Runs a screen. `filters` is a list of (column, op, value) or an expression
+    string for `parse`. With `snapshot_df` the screen is a vectorised mask over
+    that frame; otherwise it is a single indexed query against SQLite.
+    """
+    if isinstance(filters, str):
+        filters = parse(filters)
+
+    if snapshot_df is not None:
+        result = snapshot_df[mask(snapshot_df, filters)]
+        if rank_by:
+            _validate([], rank_by)
+            result = result.sort_values(rank_by, ascending=ascending, na_position="last")
+        return result.head(limit) if limit else result
+
+    query, params = compile_sql(filters, rank_by, ascending, limit)
+    with sqlite3.connect(DB_PATH) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Screen the latest snapshot of every symbol.")
+    parser.add_argument("expression", help="e.g. \"rsi_14d < 30 and close > ma_50d\"")
+    parser.add_argument("--rank-by")
+    parser.add_argument("--desc", action="store_true")
+    parser.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = screen(args.expression, args.rank_by, not args.desc, args.limit)
+    print(result.to_string(index=False))
+    print(f"\n{len(result)} matches in {(time.perf_counter() - start) * 1000:.1f} ms")
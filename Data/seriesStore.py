@@ -0,0 +1,112 @@
+import argparse
+import sqlite3
+import os
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+
+def trading_dates(start=None, end=None, db_path=None):
+    """Sorted distinct 'daily_metrics' dates as a numpy string array."""
+    query = "SELECT DISTINCT date FROM daily_metrics WHERE 1=1"
+    params = []
+    if start:
+        query += " AND date >= ?"
+        params.append(start)
+    if end:
+        query += " AND date <= ?"
+        params.append(end)
+    with sqlite3.connect(db_path or DB_PATH) as conn:
+        rows = conn.execute(query + " ORDER BY date", params).fetchall()
+    return np.array([r[0] for r in rows], dtype=str)
+
+
+def load_observations(series_ids, released_by=None, db_path=None):
+    """All stored vintages of the given series, optionally only those released by a date."""
+    query = (
+        "SELECT series_id, obs_date, release_date, value FROM series_observations "
+        f"WHERE series_id IN ({','.join('?' * len(series_ids))})"
+    )
+    params = list(series_ids)
+    if released_by:
+        query += " AND release_date <= ?"
+        params.append(released_by)
+    with sqlite3.connect(db_path or DB_PATH) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def _as_of(obs_dates, release_dates, values, dates):
+    """
+    Value known on each of `dates` for one series: among rows released on or
+    before the date, the latest observation date, in its latest vintage.
+    """
+    order = np.lexsort((obs_dates, release_dates))
+    obs_dates, release_dates, values = obs_dates[order], release_dates[order], values[order]
+    # Walking forward in release time, a row becomes the current value only if
+    # it is for the newest period seen so far (or revises it); late releases of
+    # older periods never replace a newer reading.
+    headline = obs_dates == np.maximum.accumulate(obs_dates)
+    obs_dates, release_dates, values = obs_dates[headline], release_dates[headline], values[headline]
+
+    idx = np.searchsorted(release_dates, dates, side="right") - 1
+    known = idx >= 0
+    idx = np.maximum(idx, 0)
+    out = np.where(known, values[idx], np.nan)
+    return out, np.where(known, obs_dates[idx], np.datetime64("NaT"))
+
+
+def align(series_ids, start=None, end=None, max_age_days=None, dates=None, db_path=None):
+    """
+    Aligns series onto the 'daily_metrics' trading calendar (or `dates`)
+    without look-ahead: each date sees only observations whose release_date
+    is on or before it. Values older than `max_age_days` (by observation date)
+    become NaN. Returns (dates, series_ids, float64 dates x series array).
+    """
+    series_ids = list(series_ids)
+    dates = trading_dates(start, end, db_path=db_path) if dates is None else np.asarray(dates, dtype=str)
+    panel = np.full((len(dates), len(series_ids)), np.nan)
+    if len(dates) == 0 or not series_ids:
+        return dates, np.array(series_ids, dtype=str), panel
+
+    obs = load_observations(series_ids, released_by=str(dates[-1]), db_path=db_path)
+    day = dates.astype("datetime64[D]")
+    for series_id, group in obs.groupby("series_id", sort=False):
+        column = series_ids.index(series_id)
+        values, seen = _as_of(
+            group["obs_date"].to_numpy(dtype="datetime64[D]"),
+            group["release_date"].to_numpy(dtype="datetime64[D]"),
+            group["value"].to_numpy(dtype=np.float64),
+            day,
+        )
+        if max_age_days is not None:
+            with np.errstate(invalid="ignore"):
+                values[(day - seen) > np.timedelta64(max_age_days, "D")] = np.nan
+        panel[:, column] = values
+    return dates, np.array(series_ids, dtype=str), panel
+
+
+def list_series(db_path=None):
+    query = """
+    SELECT c.series_id, c.source, c.name, c.frequency, c.release_lag_days,
+           MIN(o.obs_date) AS first_obs, MAX(o.obs_date) AS last_obs, COUNT(o.value) AS observations
+    FROM series_catalog c LEFT JOIN series_observations o ON o.series_id = c.series_id
+    GROUP BY c.series_id ORDER BY c.series_id
+    """
+    with sqlite3.connect(db_path or DB_PATH) as conn:
+        return pd.read_sql_query(query, conn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect stored macro / alternative-data series.")
+    parser.add_argument("--align", nargs="+", help="Series ids to align onto the trading calendar.")
+    parser.add_argument("--start")
+    parser.add_argument("--max-age", type=int, help="Drop values older than this many days.")
+    args = parser.parse_args()
+
+    if args.align:
+        dates, ids, panel = align(args.align, start=args.start, max_age_days=args.max_age)
+        print(pd.DataFrame(panel, index=dates, columns=ids).tail(20).to_string())
+    else:
+        print(list_series().to_string(index=False))
@@ -0,0 +1,262 @@
+import argparse
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+import indicators
+import panels
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+PERIODS = 252
+CACHE_ENTRIES = 32
+
+# Shared, read-only state of a pool worker: the price panels attached from
+# shared memory and an LRU cache of indicator panels built from them.
+_PANELS = {}
+_SHM = []
+_CACHE = OrderedDict()
+
+
+def _panel_indicator(kernel, close, *params):
+    """Runs a 1-D indicator kernel down each column, skipping the NaN head before listing."""
+    out = np.full_like(close, np.nan)
+    for j in range(close.shape[1]):
+        column = close[:, j]
+        finite = np.flatnonzero(np.isfinite(column))
+        if len(finite):
+            out[finite[0]:, j] = kernel(np.ascontiguousarray(column[finite[0]:]), *params)[0]
+    return out
+
+
+def indicator(name, *params):
+    """Indicator panel over the shared closes, cached per worker across parameter sets."""
+    key = (name,) + params
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+    value = _panel_indicator(getattr(indicators, name), _PANELS["close"], *params)
+    _CACHE[key] = value
+    if len(_CACHE) > CACHE_ENTRIES:
+        _CACHE.popitem(last=False)
+    return value
+
+
+# --- Strategies ---
+# A signal maps a parameter dict to a dates x symbols boolean "hold" panel,
+# decided at the close of each day and traded from the next day.
+
+def _ma_cross(p):
+    return indicator("sma", p["fast"]) > indicator("sma", p["slow"])
+
+
+def _rsi_reversion(p):
+    rsi = indicator("rsi", p["length"])
+    state = np.full(rsi.shape, np.nan)
+    state[rsi < p["lower"]] = 1.0
+    state[rsi > p["upper"]] = 0.0
+    return np.nan_to_num(panels.ffill(state)) > 0
+
+
+def _trend_low_vol(p):
+    close = _PANELS["close"]
+    vol = indicator("volatility", p["vol_length"], PERIODS)
+    return (close > indicator("sma", p["ma_length"])) & (vol < p["max_vol"])
+
+
+STRATEGIES = {
+    "ma_cross": {
+        "signal": _ma_cross,
+        "grid": {"fast": [5, 10, 15, 20, 30], "slow": [50, 75, 100, 150, 200]},
+        "valid": lambda p: p["fast"] < p["slow"],
+    },
+    "rsi_reversion": {
+        "signal": _rsi_reversion,
+        "grid": {"length": [7, 14, 21], "lower": [20, 25, 30, 35], "upper": [60, 65, 70, 75]},
+        "valid": lambda p: p["lower"] < p["upper"],
+    },
+    "trend_low_vol": {
+        "signal": _trend_low_vol,
+        "grid": {"ma_length": [20, 50, 100, 200], "vol_length": [20, 30, 60], "max_vol": [0.2, 0.3, 0.4, 0.6]},
+        "valid": lambda p: True,
+    },
+}
+
+
+def expand_grid(strategy, grid=None):
+    """
+    All valid parameter dicts of a grid in lexicographic order, so neighbouring
+    sets share their leading parameters (and therefore cached indicators).
+    """
+    spec = STRATEGIES[strategy]
+    grid = grid or spec["grid"]
+    keys = list(grid)
+    combos = (dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys)))
+    return [p for p in combos if spec["valid"](p)]
+
+
+def walk_forward_folds(n_dates, train_days, test_days):
+    """Rolling (train_start, train_end, test_end) index triples; test windows tile the tail without overlap."""
+    folds = []
+    start = 0
+    while start + train_days + test_days <= n_dates:
+        folds.append((start, start + train_days, start + train_days + test_days))
+        start += test_days
+    return folds
+
+
+def portfolio_returns(hold, returns, cost_bps=0.0):
+    """Equal-weight daily returns of a hold panel, traded the day after each signal."""
+    weights = np.zeros_like(returns)
+    held = hold[:-1].astype(np.float64)
+    counts = held.sum(axis=1, keepdims=True)
+    weights[1:] = np.divide(held, counts, out=np.zeros_like(held), where=counts > 0)
+    gross = (weights * returns).sum(axis=1)
+    turnover = np.abs(np.diff(weights, axis=0, prepend=0.0)).sum(axis=1)
+    return gross - turnover * cost_bps / 1e4
+
+
+def _metrics(r):
+    std = r.std(ddof=1) if len(r) > 1 else 0.0
+    sharpe = r.mean() / std * math.sqrt(PERIODS) if std > 0 else 0.0
+    equity = np.cumprod(1.0 + r)
+    drawdown = (equity / np.maximum.accumulate(equity) - 1.0).min() if len(r) else 0.0
+    return sharpe, equity[-1] - 1.0 if len(r) else 0.0, drawdown
+
+
+def _attach(specs):
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        array.flags.writeable = False
+        _SHM.append(shm)
+        _PANELS[name] = array
+    _CACHE.clear()
+
+
+def _evaluate(task):
+    strategy, params, folds, cost_bps = task
+    r = portfolio_returns(STRATEGIES[strategy]["signal"](params), _PANELS["returns"], cost_bps)
+    rows = []
+    for i, (train_start, train_end, test_end) in enumerate(folds):
+        train = _metrics(r[train_start:train_end])
+        test = _metrics(r[train_end:test_end])
+        rows.append((i,) + train + test)
+    return params, rows
+
+
+def _share(arrays):
+    """Copies arrays into new shared memory blocks. Returns (blocks, attach specs)."""
+    blocks, specs = [], {}
+    for name, array in arrays.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+        blocks.append(shm)
+        specs[name] = (shm.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def load_prices(symbols=None, start=None, end=None):
+    """Adjusted, forward-filled closes as (dates, symbols, dates x symbols array)."""
+    dates, syms, arrays = panels.load_panel(["close"], symbols, start, end, db_path=DB_PATH)
+    return dates, syms, panels.ffill(arrays["close"])
+
+
+def run_sweep(strategy, grid=None, train_days=504, test_days=126, workers=None,
+              cost_bps=5.0, symbols=None, start=None, end=None, prices=None):
+    """
+    Walk-forward parameter sweep of one strategy.
+
+    The close panel is loaded once and placed in shared memory; a process pool
+    evaluates the grid in contiguous chunks so each worker reuses cached
+    indicator panels between neighbouring parameter sets. `prices` may be a
+    (dates, symbols, close) tuple to skip the database.
+
+    Returns (ranked, selection): `ranked` has one row per parameter set sorted
+    by mean out-of-sample Sharpe; `selection` holds, per fold, the set with the
+    best in-sample Sharpe and how it did on the following test window.
+    """
+    dates, syms, close = prices if prices is not None else load_prices(symbols, start, end)
+    folds = walk_forward_folds(len(dates), train_days, test_days)
+    if not folds:
+        print(f"Need at least {train_days + test_days} dates for one fold, have {len(dates)}.")
+        return pd.DataFrame(), pd.DataFrame()
+
+    returns = np.zeros_like(close)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns[1:] = close[1:] / close[:-1] - 1.0
+    returns[~np.isfinite(returns)] = 0.0
+
+    param_sets = expand_grid(strategy, grid)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, math.ceil(len(param_sets) / (workers * 4)))
+    tasks = [(strategy, p, folds, cost_bps) for p in param_sets]
+
+    print(f"Sweeping {len(param_sets)} '{strategy}' parameter sets over {len(folds)} folds "
+          f"({close.shape[0]} dates x {close.shape[1]} symbols) on {workers} workers...")
+    blocks, specs = _share({"close": close, "returns": returns})
+    try:
+        with Pool(workers, initializer=_attach, initargs=(specs,)) as pool:
+            results = list(pool.imap(_evaluate, tasks, chunksize=chunksize))
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    columns = ["fold", "train_sharpe", "train_return", "train_drawdown",
+               "test_sharpe", "test_return", "test_drawdown"]
+    frames = []
+    for params, rows in results:
+        df = pd.DataFrame(rows, columns=columns)
+        for k, v in params.items():
+            df[k] = v
+        df["params"] = ", ".join(f"{k}={v}" for k, v in params.items())
+        frames.append(df)
+    folds_df = pd.concat(frames, ignore_index=True)
+
+    param_cols = list(param_sets[0])
+    ranked = folds_df.groupby("params", sort=False).agg(
+        **{k: (k, "first") for k in param_cols},
+        train_sharpe=("train_sharpe", "mean"),
+        test_sharpe=("test_sharpe", "mean"),
+        test_return=("test_return", lambda r: np.prod(1.0 + r) - 1.0),
+        worst_test_drawdown=("test_drawdown", "min"),
+        positive_folds=("test_return", lambda r: (r > 0).mean()),
+    ).sort_values("test_sharpe", ascending=False).reset_index()
+
+    best = folds_df.loc[folds_df.groupby("fold")["train_sharpe"].idxmax()]
+    selection = best[["fold", "params", "train_sharpe", "test_sharpe", "test_return"]].reset_index(drop=True)
+    selection.insert(1, "test_start", [dates[train_end] for _, train_end, _ in folds])
+    selection.insert(2, "test_end", [dates[test_end - 1] for _, _, test_end in folds])
+    return ranked, selection
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward parameter sweep over the stored universe.")
+    parser.add_argument("strategy", choices=list(STRATEGIES))
+    parser.add_argument("--train-days", type=int, default=504)
+    parser.add_argument("--test-days", type=int, default=126)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cost-bps", type=float, default=5.0)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="Write the full ranked table to this CSV file.")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    ranked, selection = run_sweep(args.strategy, train_days=args.train_days, test_days=args.test_days,
+                                  workers=args.workers, cost_bps=args.cost_bps)
+    if not ranked.empty:
+        print(f"Finished in {time.perf_counter() - t0:.2f}s\n")
+        print(ranked.drop(columns="params").head(args.top).round(3).to_string(index=False))
+        print("\n--- Walk-forward selection ---")
+        print(selection.round(3).to_string(index=False))
+        oos = np.prod(1.0 + selection["test_return"]) - 1.0
+        print(f"\nStitched out-of-sample return of the selected sets: {oos:.2%}")
+        if args.out:
+            ranked.to_csv(args.out, index=False)
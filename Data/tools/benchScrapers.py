@@ -0,0 +1,113 @@
+"""
+Parse-time benchmark for the S&P 500 and movers scrapers.
+
+Compares the old `pd.read_html` path (parse every table, take tables[0])
+with the targeted lxml/XPath parsers on recorded HTML fixtures:
+
+    python Data/tools/benchScrapers.py --record        # save live pages once
+    python Data/tools/benchScrapers.py                 # benchmark the fixtures
+
+Without recorded fixtures a synthetic page of similar shape is used.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fetchers import updateSP500
+from fetchers import updateMovers
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'html')
+
+
+def record_fixtures(fixture_dir=FIXTURE_DIR):
+    os.makedirs(fixture_dir, exist_ok=True)
+    pages = {'sp500': updateSP500.SP500_URL, **updateMovers.SCREENER_URLS}
+    with requests.Session() as session:
+        session.headers.update({'User-Agent': 'Mozilla/5.0'})
+        for name, url in pages.items():
+            try:
+                response = session.get(url, timeout=30)
+                response.raise_for_status()
+            except Exception as e:
+                print(f"  - Failed to record {name}: {e}")
+                continue
+            with open(os.path.join(fixture_dir, f"{name}.html"), 'w', encoding='utf-8') as f:
+                f.write(response.text)
+            print(f"  - Recorded {name} ({len(response.text) / 1024:.0f} KiB)")
+
+
+def _synthetic_page(table_id, headers, n_rows, n_extra_tables=20):
+    """A page with one large target table followed by many unrelated tables."""
+    parts = ["<html><body>", f"<table id='{table_id}'><thead><tr>"]
+    parts += [f"<th>{h}</th>" for h in headers]
+    parts.append("</tr></thead><tbody>")
+    for i in range(n_rows):
+        parts.append("<tr>" + "".join(
+            f"<td><a href='#'>{h[:3].upper()}{i}</a></td>" for h in headers
+        ) + "</tr>")
+    parts.append("</tbody></table>")
+    for t in range(n_extra_tables):
+        parts.append("<table><tr><th>Date</th><th>Added</th><th>Removed</th></tr>")
+        parts += [f"<tr><td>2020-01-{t:02d}</td><td>X{i}</td><td>Y{i}</td></tr>" for i in range(50)]
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    fixtures = {}
+    if os.path.isdir(fixture_dir):
+        for filename in sorted(os.listdir(fixture_dir)):
+            if filename.endswith('.html'):
+                with open(os.path.join(fixture_dir, filename), encoding='utf-8') as f:
+                    fixtures[filename[:-5]] = f.read()
+    if not fixtures:
+        print("No recorded fixtures found; using synthetic pages.")
+        fixtures['sp500'] = _synthetic_page(
+            'constituents', ['Symbol', 'Security', 'GICS Sector', 'GICS Sub-Industry',
+                             'Headquarters Location', 'Date added', 'CIK', 'Founded'], 503)
+        fixtures['gainer'] = _synthetic_page(
+            'screener', ['Symbol', 'Name', 'Price', 'Change', 'Change %', 'Volume',
+                         'Avg Vol (3M)', 'Market Cap', 'P/E Ratio (TTM)'], 100, n_extra_tables=2)
+    return fixtures
+
+
+def _time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(repeat=5, fixture_dir=FIXTURE_DIR):
+    fixtures = load_fixtures(fixture_dir)
+    print(f"{'page':<14}{'read_html ms':>14}{'xpath ms':>12}{'speedup':>10}{'rows':>8}")
+    for name, page in fixtures.items():
+        parser = updateSP500.parse if name == 'sp500' else updateMovers.parse
+        baseline = _time(lambda: pd.read_html(io.StringIO(page))[0], repeat)
+        targeted = _time(lambda: parser(page), repeat)
+        rows = len(parser(page))
+        print(f"{name:<14}{baseline * 1000:>14.1f}{targeted * 1000:>12.1f}"
+              f"{baseline / targeted:>9.1f}x{rows:>8}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark scraper HTML parsing.")
+    arg_parser.add_argument("--record", action="store_true", help="Record live pages as fixtures first.")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    args = arg_parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.fixtures)
+    run(repeat=args.repeat, fixture_dir=args.fixtures)
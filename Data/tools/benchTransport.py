@@ -0,0 +1,73 @@
+"""
+Compares per-request connections (bare `requests.get`) with the shared pooled
+transport over a thread pool, counting new connections and setup time.
+
+Against the local OData stub (plain HTTP, so setup is only the TCP connect):
+
+    python Data/tools/benchTransport.py --requests 2000 --workers 16
+
+Against a real HTTPS endpoint, where TLS setup dominates:
+
+    python Data/tools/benchTransport.py --url https://query1.finance.yahoo.com/v8/finance/chart/AAPL --requests 500
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fetchers import httpTransport
+import stubODataServer
+
+
+def run(get, url, n_requests, workers):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        statuses = list(executor.map(lambda _: get(url).status_code, range(n_requests)))
+    elapsed = time.perf_counter() - start
+    failures = sum(1 for s in statuses if s >= 400)
+    return elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Endpoint to hit; defaults to a local OData stub.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, base_url = stubODataServer.start_server(n_records=200)
+        url = f"{base_url}?$top=10"
+
+    try:
+        bare, bare_failures = run(lambda u: requests.get(u, timeout=30), url, args.requests, args.workers)
+        print(f"requests.get per call : {bare:6.2f}s  {args.requests / bare:8.0f} req/s  "
+              f"{args.requests} new connections  ({bare_failures} errors)")
+
+        session = httpTransport.PooledSession(per_host_limit=args.workers)
+        pooled, pooled_failures = run(session.get, url, args.requests, args.workers)
+        stats = session.stats()
+        session.close()
+        print(f"pooled session        : {pooled:6.2f}s  {args.requests / pooled:8.0f} req/s  "
+              f"{stats['new_connections']} new connections, {stats['setup_seconds']:.3f}s setup  "
+              f"({pooled_failures} errors)")
+        avg_setup = stats["setup_seconds"] / max(stats["new_connections"], 1)
+        print(f"Connection setups avoided: {args.requests - stats['new_connections']} "
+              f"(~{(args.requests - stats['new_connections']) * avg_setup:.2f}s of setup); "
+              f"wall-clock speedup {bare / pooled:.2f}x")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Checks that NULL bars in 'daily_metrics' do not poison the feature store.
+
+Stores a synthetic price history in a throwaway database with one bar whose
+close and volume are NULL half-way through, refreshes every registry
+indicator, and checks that the stored values after the gap match the same
+indicator computed on the history with that bar left out.
+
+    python Data/tools/checkFeatureNulls.py
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import DBManager
+import DBMigrations
+import adjustments
+import archive
+import featureStore
+import indicators
+
+N_DAYS = 200
+GAP = 120
+
+
+def main():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range("2024-01-02", periods=N_DAYS).strftime("%Y-%m-%d").to_numpy()
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, N_DAYS)))
+    bars = pd.DataFrame({
+        "asset_symbol": "S000", "date": dates,
+        "open": close * 0.999, "high": close * 1.01, "low": close * 0.99,
+        "close": close, "volume": rng.integers(1e5, 1e6, N_DAYS).astype(float),
+    })
+    bars.loc[GAP, ["close", "volume"]] = np.nan
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "features.db")
+        DBMigrations.migrate(db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("INSERT INTO assets (symbol, name, asset_class, source) VALUES ('S000', 'S000', 'equity', 'sp500')")
+            conn.executemany(
+                "INSERT INTO daily_metrics (asset_symbol, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                bars.astype(object).where(bars.notna(), None).itertuples(index=False, name=None),
+            )
+        DBManager.DB_PATH = featureStore.DB_PATH = adjustments.DB_PATH = archive.DB_PATH = db_path
+        featureStore.refresh()
+
+        checked = 0
+        kept = bars.drop(index=GAP).reset_index(drop=True)
+        for key in indicators.INDICATOR_REGISTRY:
+            expected = indicators.compute(key, {c: kept[c].to_numpy() for c in featureStore.PRICE_COLUMNS})
+            for feature, values in expected.items():
+                stored = featureStore.load_features([feature]).set_index("date")["value"]
+                after = kept["date"].to_numpy() > dates[GAP]
+                want = pd.Series(values[after], index=kept["date"][after]).dropna()
+                assert len(want), feature
+                assert want.index.isin(stored.index).all(), f"{feature}: values missing after the NULL bar"
+                assert np.allclose(stored.loc[want.index].to_numpy(), want.to_numpy()), f"{feature}: values differ"
+                assert dates[GAP] not in stored.index, f"{feature}: value stored for the NULL bar"
+                checked += len(want)
+
+    print(f"OK: {checked} feature values after a NULL bar match the gap-free computation.")
+
+
+if __name__ == "__main__":
+    main()
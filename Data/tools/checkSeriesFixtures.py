@@ -0,0 +1,100 @@
+"""
+Runs the series fetchers against local fixture files and checks the as-of join.
+
+FRED requests are answered from fixtures/series/fred_<ID>.csv by a fake
+session; the Google Trends and FINRA sources read their fixture files
+directly. Everything is stored in a throwaway database with a synthetic
+trading calendar, then aligned, and each aligned value is checked against a
+brute-force lookup of what was public on that date.
+
+    python Data/tools/checkSeriesFixtures.py
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import DBManager
+import DBMigrations
+import seriesStore
+from fetchers import updateSeries
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "series")
+
+
+class FixtureResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class FixtureSession:
+    """Serves FRED graph CSV URLs from fixture files."""
+
+    def get(self, url):
+        fred_id = url.rsplit("id=", 1)[1]
+        with open(os.path.join(FIXTURES, f"fred_{fred_id}.csv"), encoding="utf-8") as f:
+            return FixtureResponse(f.read())
+
+
+def brute_force(obs, series_id, day):
+    """Latest obs_date released by `day`, in its latest vintage."""
+    visible = obs[(obs["series_id"] == series_id) & (obs["release_date"] <= day)]
+    if visible.empty:
+        return np.nan
+    latest = visible[visible["obs_date"] == visible["obs_date"].max()]
+    return latest.sort_values("release_date")["value"].iloc[-1]
+
+
+def main():
+    updateSeries.SERIES = {k: updateSeries.DEFAULT_SERIES[k] for k in ("DGS10", "CPIAUCSL")}
+    updateSeries.register("trends", source="google_trends", path=os.path.join(FIXTURES, "multiTimeline.csv"),
+                          frequency="weekly", units="relative interest", release_lag_days=7)
+    updateSeries.register("short_interest", source="finra_short_interest",
+                          path=os.path.join(FIXTURES, "finra_short_interest.txt"),
+                          frequency="semimonthly", units="shares", release_lag_days=11)
+
+    observations = updateSeries.fetch(session=FixtureSession())
+    # A revised DGS10 print for 2024-01-04, published a week later.
+    revision = pd.DataFrame([{"series_id": "DGS10", "obs_date": "2024-01-04",
+                              "release_date": "2024-01-11", "value": 3.97}])
+    observations = pd.concat([observations, revision], ignore_index=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "series.db")
+        DBMigrations.migrate(db_path)
+        calendar = pd.bdate_range("2023-11-01", "2024-03-29").strftime("%Y-%m-%d")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("INSERT INTO assets (symbol, name, asset_class, source) VALUES ('S000', 'S000', 'equity', 'sp500')")
+            conn.executemany("INSERT INTO daily_metrics (asset_symbol, date, close) VALUES ('S000', ?, 100.0)",
+                             [(d,) for d in calendar])
+
+        DBManager.DB_PATH = db_path
+        DBManager.upsert_series(observations, updateSeries.catalog(observations["series_id"].unique()))
+        stored = seriesStore.load_observations(list(observations["series_id"].unique()), db_path=db_path)
+        series_ids = sorted(stored["series_id"].unique())
+        dates, ids, panel = seriesStore.align(series_ids, db_path=db_path)
+
+    print(pd.DataFrame(panel, index=dates, columns=ids).loc["2024-01-02":"2024-01-19"].to_string())
+    mismatches = 0
+    for j, series_id in enumerate(ids):
+        expected = np.array([brute_force(stored, series_id, d) for d in dates])
+        same = (expected == panel[:, j]) | (np.isnan(expected) & np.isnan(panel[:, j]))
+        mismatches += int((~same).sum())
+    assert len(series_ids) == 5, series_ids
+    assert mismatches == 0, f"{mismatches} aligned values differ from the brute-force lookup"
+    # DGS10 prints are public the next day, so on 2024-01-04 the latest known value is the 3rd's.
+    assert panel[list(dates).index("2024-01-04"), list(ids).index("DGS10")] == 3.91
+    print(f"OK: {len(ids)} series x {len(dates)} trading dates match the point-in-time lookup.")
+
+
+if __name__ == "__main__":
+    main()
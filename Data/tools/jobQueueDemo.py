@@ -0,0 +1,140 @@
+"""
+Runs the SQLite job queue end to end against a fake transport.
+
+Queues synthetic symbol batches in a throwaway database and starts N worker
+processes running the real `dataFetcher.run_job` handler, with the
+'daily_metrics' fetcher swapped for one that sleeps to mimic network latency
+and builds synthetic bars. Each batch goes through `store_data` (upsert,
+adjustments, features); market breadth and regimes are refreshed once after
+the queue drains, as `dataFetcher.run_workers` does. With --kill-one, the
+first worker is killed mid-lease so the reclaim path is exercised.
+
+    python Data/tools/jobQueueDemo.py --workers 4 --symbols 400 --kill-one
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import DBManager
+import DBMigrations
+import adjustments
+import archive
+import dataFetcher
+import featureStore
+import jobQueue
+
+N_DAYS = 300
+
+
+def fake_fetch(symbols, latency):
+    """Stand-in for a fetcher: network wait plus some pandas work per symbol."""
+    time.sleep(latency * len(symbols))
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=N_DAYS).strftime("%Y-%m-%d")
+    frames = []
+    for symbol in symbols:
+        rng = np.random.default_rng(abs(hash(symbol)) % (2 ** 32))
+        close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, N_DAYS))))
+        frames.append(pd.DataFrame({
+            "asset_symbol": symbol,
+            "date": dates,
+            "open": close.shift(1).fillna(close[0]),
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": rng.integers(1e5, 1e6, N_DAYS),
+            "volatility_30d": close.pct_change().rolling(30).std(),
+            "ma_20d": close.rolling(20).mean(),
+            "ma_50d": close.rolling(50).mean(),
+            "rsi_14d": 50.0,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+class FakeDailyMetrics:
+    """Stands in for fetchers.updateDailyMetrics inside `dataFetcher.run_job`."""
+
+    def __init__(self, latency, hang):
+        self.latency = latency
+        self.hang = hang
+
+    def fetch(self, scope):
+        if self.hang:
+            # Simulates a worker that dies holding its lease.
+            time.sleep(3600)
+        data_df = fake_fetch(scope, self.latency)
+        data_df.attrs['failed_symbols'] = []
+        return data_df
+
+
+def _use_database(db_path):
+    DBManager.DB_PATH = featureStore.DB_PATH = adjustments.DB_PATH = archive.DB_PATH = db_path
+
+
+def _worker(db_path, latency, lease_seconds, hang):
+    _use_database(db_path)
+    dataFetcher.FETCHER_MAPPING["daily_metrics"]["module"] = FakeDailyMetrics(latency, hang)
+    jobQueue.run_worker(dataFetcher.run_job, lease_seconds=lease_seconds, poll_interval=0.2, db_path=db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--symbols", type=int, default=400)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01, help="Fake seconds of network time per symbol.")
+    parser.add_argument("--lease", type=float, default=3.0)
+    parser.add_argument("--kill-one", action="store_true", help="Kill one worker while it holds a lease.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "queue_demo.db")
+        DBMigrations.migrate(db_path)
+        symbols = [f"S{i:04d}" for i in range(args.symbols)]
+        jobQueue.enqueue("daily_metrics", symbols, batch_size=args.batch_size, db_path=db_path)
+        started = jobQueue.now(db_path)
+
+        start = time.perf_counter()
+        processes = []
+        for i in range(args.workers):
+            hang = args.kill_one and i == 0
+            process = multiprocessing.Process(target=_worker, args=(db_path, args.latency, args.lease, hang))
+            process.start()
+            processes.append(process)
+
+        if args.kill_one:
+            time.sleep(min(1.0, args.lease / 2))
+            processes[0].kill()
+            print(f"Killed worker pid {processes[0].pid}; its job is reclaimed after the lease expires.")
+
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        _use_database(db_path)
+        dataFetcher.refresh_market_aggregates(jobQueue.finished_fetchers(started, db_path))
+
+        for fetcher, status, count in jobQueue.status(db_path):
+            print(f"{fetcher:<15} {status:<8} {count}")
+        conn = jobQueue._connect(db_path)
+        try:
+            rows = conn.execute("SELECT COUNT(DISTINCT asset_symbol) FROM daily_metrics").fetchone()[0]
+            retried = conn.execute("SELECT COUNT(*) FROM jobs WHERE attempts > 1").fetchone()[0]
+            breadth_dates = conn.execute("SELECT COUNT(*) FROM market_breadth").fetchone()[0]
+        finally:
+            conn.close()
+        print(f"{rows}/{len(symbols)} symbols stored by {args.workers} workers in {elapsed:.2f}s "
+              f"({len(symbols) / elapsed:.0f} symbols/s); {retried} jobs reclaimed after a lost lease.")
+        print(f"Market breadth stored for {breadth_dates} dates after the queue drained.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Load-tests the read-only query service on localhost.
+
+Builds a synthetic database, starts the service and runs concurrent
+keep-alive clients over a mix of endpoints while a writer thread commits
+daily_metrics upserts (forcing cache invalidation). Reports p50/p99 latency
+per endpoint plus cache and 304 counts.
+
+    python Data/tools/loadTestQueryService.py --clients 16 --seconds 10 --write-interval 1
+"""
+
+import argparse
+import http.client
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import DBManager
+import DBMigrations
+import queryService
+
+
+def build_database(path, n_symbols, n_days, seed=0):
+    DBMigrations.migrate(path)
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=n_days).strftime("%Y-%m-%d")
+    symbols = [f"S{i:04d}" for i in range(n_symbols)]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_symbols)), axis=0))
+    frame = pd.DataFrame({
+        "asset_symbol": np.tile(symbols, n_days),
+        "date": np.repeat(dates, n_symbols),
+        "close": close.ravel(),
+    })
+    frame["open"] = frame["close"]
+    frame["high"] = frame["close"] * 1.01
+    frame["low"] = frame["close"] * 0.99
+    frame["volume"] = rng.integers(1e5, 1e7, len(frame)).astype(float)
+    for col in ["volatility_30d", "ma_20d", "ma_50d", "rsi_14d"]:
+        frame[col] = np.nan
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO assets (symbol, name, asset_class, source) VALUES (?, ?, 'equity', 'sp500')",
+            [(s, s) for s in symbols],
+        )
+        conn.executemany(
+            "INSERT INTO universe_membership (universe, asset_symbol, valid_from) VALUES ('sp500', ?, ?)",
+            [(s, dates[0]) for s in symbols],
+        )
+        conn.executemany(
+            "INSERT INTO earnings_dates (asset_symbol, earnings_date, eps_estimate) VALUES (?, ?, ?)",
+            [(s, d, 1.0) for s in symbols for d in dates[::63]],
+        )
+    DBManager.DB_PATH = path
+    DBManager.upsert_daily_metrics(frame)
+    return symbols, list(dates)
+
+
+def make_requests(symbols, dates):
+    def pick(n):
+        return ",".join(random.sample(symbols, n))
+
+    return [
+        ("assets", lambda: "/assets?source=sp500"),
+        ("latest", lambda: f"/latest?symbols={pick(20)}"),
+        ("latest_all", lambda: "/latest"),
+        ("earnings", lambda: f"/earnings?start={dates[len(dates) // 2]}"),
+        ("panel_1y", lambda: f"/panel?columns=close,volume&symbols={pick(10)}&start={dates[-252]}"),
+        ("panel_full", lambda: f"/panel?columns=close&symbols={random.choice(symbols)}"),
+    ]
+
+
+def client(base, mix, deadline, results, use_etags):
+    host, port = base.replace("http://", "").split(":")
+    conn = http.client.HTTPConnection(host, int(port), timeout=30)
+    etags = {}
+    while time.perf_counter() < deadline:
+        name, path_fn = random.choice(mix)
+        path = path_fn()
+        headers = {"If-None-Match": etags[path]} if use_etags and path in etags else {}
+        start = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if response.getheader("ETag"):
+            etags[path] = response.getheader("ETag")
+        results[name].append((elapsed, response.status))
+    conn.close()
+
+
+def writer(db_path, symbols, dates, deadline, interval, counter):
+    DBManager.DB_PATH = db_path
+    while time.perf_counter() < deadline:
+        time.sleep(interval)
+        batch = pd.DataFrame({
+            "asset_symbol": symbols[:50], "date": dates[-1],
+            "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.0 + random.random(), "volume": 1e6,
+            "volatility_30d": None, "ma_20d": None, "ma_50d": None, "rsi_14d": None,
+        })
+        DBManager.upsert_daily_metrics(batch)
+        counter.append(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--write-interval", type=float, default=1.0, help="Seconds between writer commits; 0 disables.")
+    parser.add_argument("--no-etags", action="store_true", help="Clients never send If-None-Match.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load.db")
+        print(f"Building {args.symbols} x {args.days} synthetic database...")
+        symbols, dates = build_database(db_path, args.symbols, args.days)
+
+        server, service, base = queryService.start_service(db_path)
+        mix = make_requests(symbols, dates)
+        results = defaultdict(list)
+        writes = []
+        deadline = time.perf_counter() + args.seconds
+        threads = [
+            threading.Thread(target=client, args=(base, mix, deadline, results, not args.no_etags))
+            for _ in range(args.clients)
+        ]
+        if args.write_interval > 0:
+            threads.append(threading.Thread(
+                target=writer, args=(db_path, symbols, dates, deadline, args.write_interval, writes)
+            ))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        server.shutdown()
+        service.close()
+
+        total = sum(len(v) for v in results.values())
+        print(f"\n{total} requests from {args.clients} clients in {args.seconds:.0f}s "
+              f"({total / args.seconds:,.0f} req/s), {len(writes)} concurrent write commits, "
+              f"generation {service.generation}, cache hits {service.hits} / misses {service.misses}")
+        print(f"{'endpoint':<12} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'304s':>6} {'errors':>6}")
+        for name, samples in sorted(results.items()):
+            latencies = np.array([s[0] for s in samples])
+            statuses = np.array([s[1] for s in samples])
+            print(f"{name:<12} {len(samples):>7} {np.percentile(latencies, 50):>8.2f} "
+                  f"{np.percentile(latencies, 99):>8.2f} {(statuses == 304).sum():>6} {(statuses >= 400).sum():>6}")
+
+
+if __name__ == "__main__":
+    main()
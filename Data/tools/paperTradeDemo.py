@@ -0,0 +1,112 @@
+"""
+Replays synthetic minute bars through the simulated broker with a toy
+moving-average strategy, then prints the ledger and latency report.
+
+Order sizes are large relative to bar volume so partial fills over several
+bars show up. The broker is recreated half-way through to show that resting
+orders are reloaded from the ledger.
+
+    python Data/tools/paperTradeDemo.py --symbols 20 --sessions 3
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import DBMigrations
+import execution
+
+MINUTES_PER_SESSION = 390
+
+
+def synthetic_bars(n_symbols, n_sessions, seed=0):
+    rng = np.random.default_rng(seed)
+    bars = []
+    for day in pd.bdate_range("2024-01-02", periods=n_sessions):
+        minutes = pd.date_range(day + pd.Timedelta(hours=9, minutes=30), periods=MINUTES_PER_SESSION, freq="min")
+        stamps = minutes.strftime("%Y-%m-%d %H:%M")
+        for i in range(n_symbols):
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, MINUTES_PER_SESSION)))
+            open_ = np.r_[close[0], close[:-1]]
+            high = np.maximum(open_, close) * 1.0005
+            low = np.minimum(open_, close) * 0.9995
+            volume = rng.integers(500, 5000, MINUTES_PER_SESSION)
+            for t in range(MINUTES_PER_SESSION):
+                bars.append((f"S{i:03d}", stamps[t], open_[t], high[t], low[t], close[t], float(volume[t])))
+    bars.sort(key=lambda b: (b[1], b[0]))
+    return bars
+
+
+def make_strategy(fast=5, slow=20, order_qty=2000):
+    history = defaultdict(lambda: deque(maxlen=slow))
+    previous = {}
+
+    def on_bar(broker, bar, fills):
+        signal_at = time.time()
+        symbol, close = bar[0], bar[5]
+        closes = history[symbol]
+        closes.append(close)
+        if len(closes) < slow:
+            return
+        values = list(closes)
+        above = sum(values[-fast:]) / fast > sum(values) / slow
+        if previous.get(symbol) is not None and above != previous[symbol]:
+            side = "buy" if above else "sell"
+            order_type = "market" if len(closes) % 2 else "limit"
+            limit = close * (1.0005 if side == "buy" else 0.9995) if order_type == "limit" else None
+            broker.submit_order(symbol, order_qty, side, order_type, limit, "day", signal_at=signal_at)
+        previous[symbol] = above
+
+    return on_bar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--participation", type=float, default=0.2)
+    args = parser.parse_args()
+
+    bars = synthetic_bars(args.symbols, args.sessions)
+    strategy = make_strategy()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "paper.db")
+        DBMigrations.migrate(db_path)
+
+        half = len(bars) // 2
+        start = time.perf_counter()
+        ledger = execution.Ledger("demo", db_path=db_path)
+        broker = execution.SimulatedBroker(ledger, participation=args.participation)
+        execution.replay(broker, bars[:half], strategy)
+        resting = len(broker.list_orders())
+        ledger.close()
+
+        ledger = execution.Ledger("demo", db_path=db_path)
+        broker = execution.SimulatedBroker(ledger, participation=args.participation)
+        print(f"Restarted broker: {len(broker.list_orders())} of {resting} resting orders reloaded from the ledger.")
+        execution.replay(broker, bars[half:], strategy)
+        elapsed = time.perf_counter() - start
+
+        conn = ledger.conn
+        n_orders, = conn.execute("SELECT COUNT(*) FROM paper_orders").fetchone()
+        n_fills, = conn.execute("SELECT COUNT(*) FROM paper_fills").fetchone()
+        multi, = conn.execute(
+            "SELECT COUNT(*) FROM (SELECT order_id FROM paper_fills GROUP BY order_id HAVING COUNT(*) > 1)"
+        ).fetchone()
+        statuses = conn.execute("SELECT status, COUNT(*) FROM paper_orders GROUP BY status").fetchall()
+        print(f"Replayed {len(bars)} bars in {elapsed:.2f}s ({len(bars) / elapsed:,.0f} bars/s)")
+        print(f"{n_orders} orders, {n_fills} fills, {multi} orders filled over several bars; status {dict(statuses)}")
+        execution.print_report(ledger)
+        ledger.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Local stand-in for the ListingTrack OData feed.
+
+Serves a synthetic `/odata/companies` collection supporting `$skip`, `$top`,
+`$count` and `@odata.nextLink`, with optional per-request latency and random
+failures. Run it standalone, or with --bench to measure the paginated client:
+
+    python Data/tools/stubODataServer.py --records 20000 --latency 0.05 --bench
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+LISTING_METHODS = ['IPO', 'SPAC', 'Direct Listing', 'Uplisting']
+SERVER_PAGE_SIZE = 100
+
+
+def make_records(n):
+    return [
+        {
+            'symbol': f"T{i:05d}",
+            'name': f"Test Company {i}",
+            'ipo': {'listingMethod': LISTING_METHODS[i % len(LISTING_METHODS)]},
+        }
+        for i in range(n)
+    ]
+
+
+def make_handler(records, latency=0.0, failure_rate=0.0):
+    class ODataHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without this, keep-alive
+        # clients stall on delayed ACKs.
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path != '/odata/companies':
+                self.send_error(404)
+                return
+            if latency:
+                time.sleep(latency)
+            if failure_rate and random.random() < failure_rate:
+                self.send_error(503)
+                return
+
+            query = parse_qs(parsed.query)
+            skip = int(query.get('$skip', ['0'])[0])
+            top = int(query.get('$top', [str(SERVER_PAGE_SIZE)])[0])
+            body = {'value': records[skip:skip + top]}
+            if query.get('$count', ['false'])[0] == 'true':
+                body['@odata.count'] = len(records)
+            if '$top' not in query and skip + top < len(records):
+                body['@odata.nextLink'] = (
+                    f"http://{self.headers['Host']}/odata/companies?$skip={skip + top}"
+                )
+
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return ODataHandler
+
+
+def start_server(n_records=5000, latency=0.0, failure_rate=0.0, port=0):
+    """Starts the stub in a daemon thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', port), make_handler(make_records(n_records), latency, failure_rate)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/odata/companies?select=symbol,name,ipo"
+
+
+def bench(n_records, latency, failure_rate, page_size):
+    from fetchers import updateListingTrack
+    import DBMigrations
+
+    server, base_url = start_server(n_records, latency, failure_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep resume bookkeeping out of the real database.
+        updateListingTrack.DB_PATH = os.path.join(tmp, 'bench.db')
+        DBMigrations.migrate(updateListingTrack.DB_PATH)
+
+        for workers in (1, 4, 8, 16):
+            start = time.perf_counter()
+            rows = sum(len(batch) for batch in updateListingTrack.iter_batches(
+                base_url, page_size=page_size, max_workers=workers, resume=True
+            ))
+            elapsed = time.perf_counter() - start
+            print(f"workers={workers:<3} rows={rows:<7} {elapsed:7.2f}s  {rows / elapsed:10.0f} rows/s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub ListingTrack OData server.")
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds of delay per request.")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--bench", action="store_true", help="Benchmark the client instead of serving.")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.records, args.latency, args.failure_rate, args.page_size)
+    else:
+        server, base_url = start_server(args.records, args.latency, args.failure_rate, args.port)
+        print(f"Serving {args.records} records at {base_url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,145 @@
+"""
+Replays recorded ticks over a local WebSocket at N x real-time speed.
+
+Ticks are read from a JSON-lines file (one message per line with 'symbol',
+'ts' in epoch ms and 'price'/'size' or 'bid'/'ask'); without a file a random
+walk is generated. Each message is stamped with 'sent' so the consumer can
+measure end-to-end latency.
+
+    python Data/tools/tickReplayServer.py --ticks ticks.jsonl --speed 50
+    python Data/tools/tickReplayServer.py --synthetic 200000 --speed 0 --bench
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def load_ticks(path):
+    with open(path, encoding='utf-8') as f:
+        ticks = [json.loads(line) for line in f if line.strip()]
+    ticks.sort(key=lambda t: t['ts'])
+    return ticks
+
+
+def synthetic_ticks(n, n_symbols=500, rate=2000.0, start_ms=1_700_000_000_000):
+    """Random-walk trades across `n_symbols` arriving at roughly `rate` per second."""
+    prices = {f"S{i:04d}": 100.0 for i in range(n_symbols)}
+    symbols = list(prices)
+    ts = float(start_ms)
+    ticks = []
+    for _ in range(n):
+        ts += random.expovariate(rate) * 1000.0
+        symbol = random.choice(symbols)
+        prices[symbol] *= 1.0 + random.gauss(0.0, 0.0005)
+        ticks.append({
+            'symbol': symbol, 'ts': int(ts),
+            'price': round(prices[symbol], 4), 'size': random.randint(1, 500),
+        })
+    return ticks
+
+
+def make_handler(ticks, speed=1.0, batch_size=1):
+    """
+    Returns a connection handler streaming `ticks` at `speed` x the recorded
+    pace (0 = as fast as possible). `batch_size` > 1 sends JSON arrays.
+    """
+    async def handler(ws):
+        t0_ticks = ticks[0]['ts'] if ticks else 0
+        t0_wall = time.monotonic()
+        for i in range(0, len(ticks), batch_size):
+            chunk = ticks[i:i + batch_size]
+            if speed > 0:
+                due = (chunk[0]['ts'] - t0_ticks) / 1000.0 / speed
+                delay = due - (time.monotonic() - t0_wall)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            sent = time.time()
+            if batch_size == 1:
+                await ws.send(json.dumps({**chunk[0], 'sent': sent}))
+            else:
+                await ws.send(json.dumps([{**t, 'sent': sent} for t in chunk]))
+        await ws.close()
+
+    return handler
+
+
+def start_server(ticks, speed=1.0, batch_size=1, port=0):
+    """Runs the replay server on its own event loop thread. Returns (url, stop)."""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def main():
+        state['stop'] = asyncio.Event()
+        async with websockets.serve(make_handler(ticks, speed, batch_size), '127.0.0.1', port) as server:
+            state['port'] = server.sockets[0].getsockname()[1]
+            ready.set()
+            await state['stop'].wait()
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(main(),), daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        loop.call_soon_threadsafe(state['stop'].set)
+        thread.join()
+
+    return f"ws://127.0.0.1:{state['port']}", stop
+
+
+def bench(ticks, speed, batch_size):
+    import DBManager
+    import DBMigrations
+    import liveIngest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        DBManager.DB_PATH = os.path.join(tmp, 'bench.db')
+        DBMigrations.migrate(DBManager.DB_PATH)
+
+        url, stop = start_server(ticks, speed, batch_size)
+        start = time.perf_counter()
+        ingestor = asyncio.run(liveIngest.run(url))
+        elapsed = time.perf_counter() - start
+        stop()
+
+    pct = ingestor.latency_percentiles((50, 99))
+    print(f"messages={ingestor.messages} symbols={len(ingestor.states)} bars={ingestor.bars_written}")
+    print(f"throughput={ingestor.messages / elapsed:,.0f} msg/s over {elapsed:.2f}s")
+    if pct:
+        print(f"latency p50={pct[50] * 1000:.2f} ms  p99={pct[99] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local tick replay WebSocket server.")
+    parser.add_argument("--ticks", help="JSON-lines file of recorded ticks.")
+    parser.add_argument("--synthetic", type=int, default=100000, help="Ticks to generate without --ticks.")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiple; 0 = unthrottled.")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--bench", action="store_true", help="Run liveIngest against the replay and report.")
+    args = parser.parse_args()
+
+    ticks = load_ticks(args.ticks) if args.ticks else synthetic_ticks(args.synthetic, args.symbols)
+
+    if args.bench:
+        bench(ticks, args.speed, args.batch_size)
+    else:
+        url, stop = start_server(ticks, args.speed, args.batch_size, args.port)
+        print(f"Replaying {len(ticks)} ticks at {url} (speed {args.speed}x)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            stop()
@@ -0,0 +1,96 @@
+import argparse
+import sqlite3
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'tt2_data.db')
+
+
+def constituents(universe, day, db_path=None):
+    """Sorted members of `universe` on `day` (YYYY-MM-DD); valid_to is exclusive."""
+    with sqlite3.connect(db_path or DB_PATH) as conn:
+        rows = conn.execute("""
+        SELECT asset_symbol FROM universe_membership
+        WHERE universe = ? AND valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)
+        ORDER BY asset_symbol
+        """, (universe, day, day)).fetchall()
+    return [row[0] for row in rows]
+
+
+def intervals(universe=None, symbols=None, start=None, end=None, db_path=None):
+    """Membership intervals, optionally limited to those overlapping [start, end]."""
+    query = "SELECT universe, asset_symbol, valid_from, valid_to FROM universe_membership WHERE 1=1"
+    params = []
+    if universe:
+        query += " AND universe = ?"
+        params.append(universe)
+    if symbols:
+        query += f" AND asset_symbol IN ({','.join('?' * len(symbols))})"
+        params += list(symbols)
+    if start:
+        query += " AND (valid_to IS NULL OR valid_to > ?)"
+        params.append(start)
+    if end:
+        query += " AND valid_from <= ?"
+        params.append(end)
+    with sqlite3.connect(db_path or DB_PATH) as conn:
+        return pd.read_sql_query(query + " ORDER BY universe, asset_symbol, valid_from", conn, params=params)
+
+
+def membership_mask(universe, dates, symbols=None, db_path=None):
+    """
+    Dates x symbols bool mask of membership in `universe`, e.g. to drop
+    non-members from a `panels.load_panel` panel before ranking. `symbols`
+    defaults to everyone who was a member at some point in the date range.
+    Returns (symbols, mask).
+    """
+    dates = np.asarray(dates, dtype=str)
+    if len(dates) == 0:
+        return np.array(sorted(symbols or []), dtype=str), np.zeros((0, len(symbols or [])), dtype=bool)
+    df = intervals(universe, symbols, start=str(dates[0]), end=str(dates[-1]), db_path=db_path)
+    if symbols is None:
+        symbols = np.unique(df["asset_symbol"].to_numpy(dtype=str))
+    symbols = np.array(sorted(symbols), dtype=str)
+    mask = np.zeros((len(dates), len(symbols)), dtype=bool)
+    if df.empty:
+        return symbols, mask
+
+    # +1 where an interval starts and -1 where it ends; a running sum over
+    # dates is then > 0 exactly on member days.
+    cols = np.searchsorted(symbols, df["asset_symbol"].to_numpy(dtype=str))
+    first = np.searchsorted(dates, df["valid_from"].to_numpy(dtype=str), side="left")
+    valid_to = df["valid_to"].fillna("9999-12-31").to_numpy(dtype=str)
+    stop = np.searchsorted(dates, valid_to, side="left")
+    delta = np.zeros((len(dates) + 1, len(symbols)), dtype=np.int32)
+    np.add.at(delta, (first, cols), 1)
+    np.add.at(delta, (stop, cols), -1)
+    mask[:] = np.cumsum(delta[:-1], axis=0) > 0
+    return symbols, mask
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Point-in-time universe membership.")
+    parser.add_argument("--universe", default="sp500")
+    parser.add_argument("--as-of", help="List the constituents on this YYYY-MM-DD date.")
+    parser.add_argument("--mask", nargs=2, metavar=("START", "END"),
+                        help="Build the business-day membership mask for a date range and time it.")
+    parser.add_argument("--symbol", help="Show the membership history of one symbol.")
+    args = parser.parse_args()
+
+    if args.as_of:
+        t0 = time.perf_counter()
+        members = constituents(args.universe, args.as_of)
+        print(f"{len(members)} members of '{args.universe}' on {args.as_of} "
+              f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+        print(", ".join(members))
+    if args.mask:
+        dates = pd.bdate_range(*args.mask).strftime("%Y-%m-%d").to_numpy()
+        t0 = time.perf_counter()
+        symbols, mask = membership_mask(args.universe, dates)
+        print(f"{len(dates)} dates x {len(symbols)} symbols, {int(mask.sum())} member-days "
+              f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    if args.symbol:
+        print(intervals(symbols=[args.symbol]).to_string(index=False))